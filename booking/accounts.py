@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UserImportError(Exception):
+    """Raised when an import fails on write; no users were created"""
+
+
+class UserImportService:
+    """Creates many accounts at once for corporate onboarding.
+
+    Rows are validated together beforehand (see BulkUserRegistrationSerializer),
+    so this only hashes and inserts: passwords are hashed in a thread pool,
+    since the hashers spend their time in C code that releases the GIL, and
+    the users are written with bulk_create in one transaction.
+    """
+
+    @staticmethod
+    def hash_passwords(passwords):
+        workers = getattr(settings, 'USER_IMPORT_HASH_WORKERS', 4)
+        if workers <= 1 or len(passwords) <= 1:
+            return [make_password(password) for password in passwords]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash') as executor:
+            return list(executor.map(make_password, passwords))
+
+    @staticmethod
+    def create_users(rows):
+        """Create a user per validated row; all or nothing"""
+        hashes = UserImportService.hash_passwords([row['password'] for row in rows])
+        users = [
+            User(
+                username=row['username'],
+                email=row.get('email', ''),
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', ''),
+                password=password_hash
+            )
+            for row, password_hash in zip(rows, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    users, batch_size=getattr(settings, 'USER_IMPORT_BATCH_SIZE', 500)
+                )
+        except IntegrityError:
+            # A username was registered after the rows were validated
+            logger.warning(f"User import of {len(users)} rows hit a concurrent signup")
+            raise UserImportError(
+                'A username in the batch was taken while importing; no users were created'
+            )
+        logger.info(f"Imported {len(users)} users")
+        return users
@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Movie, Show, Booking
+from django.db.models import Count, Q
+from .models import (
+    Movie, Show, Booking, Venue, Screen, ScreenLayout, WaitlistEntry, ArchivedBooking, ShowStats, MovieDailyStats,
+    ReminderCursor, BookingEvent
+)
+from .db_routers import shard_aliases
+from .pagination import EstimatedCountPaginator
+from .search import MovieSearch
 
 
 @admin.register(Movie)
@@ -9,23 +16,162 @@ class MovieAdmin(admin.ModelAdmin):
     search_fields = ['title']
     ordering = ['title']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the title index instead of a LIKE '%term%' scan
+        if not search_term:
+            return queryset, False
+        matches = MovieSearch.search(search_term, limit=500)
+        return queryset.filter(id__in=[movie_id for movie_id, _, _ in matches]), False
+
+
+@admin.register(ScreenLayout)
+class ScreenLayoutAdmin(admin.ModelAdmin):
+    list_display = ['name', 'total_seats', 'version', 'updated_at']
+    search_fields = ['name']
+    readonly_fields = ['total_seats', 'version', 'created_at', 'updated_at']
+
+
+class ScreenInline(admin.TabularInline):
+    model = Screen
+    extra = 0
+    autocomplete_fields = ['layout']
+
+
+@admin.register(Venue)
+class VenueAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'city', 'created_at']
+    search_fields = ['name', 'city']
+    prepopulated_fields = {'slug': ['name']}
+    inlines = [ScreenInline]
+
+
+@admin.register(Screen)
+class ScreenAdmin(admin.ModelAdmin):
+    list_display = ['name', 'venue', 'layout']
+    list_filter = ['venue']
+    list_select_related = ['venue', 'layout']
+    search_fields = ['name', 'venue__name']
+    autocomplete_fields = ['venue', 'layout']
+
 
 @admin.register(Show)
 class ShowAdmin(admin.ModelAdmin):
-    list_display = ['movie', 'screen_name', 'date_time', 'total_seats', 'available_seats']
-    list_filter = ['screen_name', 'date_time', 'movie']
+    list_display = ['movie', 'venue', 'screen_name', 'date_time', 'total_seats', 'available_seats']
+    list_filter = ['venue', 'hot_mode', 'date_time']
+    list_select_related = ['movie', 'venue']
     search_fields = ['movie__title', 'screen_name']
+    autocomplete_fields = ['movie', 'screen', 'layout']
+    readonly_fields = ['venue']
     ordering = ['date_time']
     
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if shard_aliases():
+            # Bookings are on other databases; read the rollup kept by StatsService
+            return queryset.select_related('stats')
+        # One aggregated query instead of a COUNT per row
+        return queryset.annotate(
+            booked_count=Count('bookings', filter=Q(bookings__status='booked'))
+        )
+    
     def available_seats(self, obj):
-        return obj.available_seats
+        if shard_aliases():
+            stats = getattr(obj, 'stats', None)
+            return obj.total_seats - (stats.booked_seats if stats else 0)
+        return obj.total_seats - obj.booked_count
     available_seats.short_description = 'Available Seats'
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['user', 'show', 'seat_number', 'status', 'created_at']
-    list_filter = ['status', 'created_at', 'show__movie']
+    list_filter = ['status', 'created_at']
+    list_select_related = ['user', 'show', 'show__movie']
+    search_fields = ['user__username', 'show__movie__title']
+    raw_id_fields = ['user']
+    autocomplete_fields = ['show']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # The changelist and forms query a single database and join to users and
+    # shows, so they are disabled while bookings are sharded (use the API)
+
+    def has_module_permission(self, request):
+        return not shard_aliases() and super().has_module_permission(request)
+
+    def has_view_permission(self, request, obj=None):
+        return not shard_aliases() and super().has_view_permission(request, obj)
+
+    def has_add_permission(self, request):
+        return not shard_aliases() and super().has_add_permission(request)
+
+    def has_change_permission(self, request, obj=None):
+        return not shard_aliases() and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return not shard_aliases() and super().has_delete_permission(request, obj)
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'show', 'status', 'offered_seat', 'hold_expires_at', 'created_at']
+    list_filter = ['status']
+    list_select_related = ['user', 'show', 'show__movie']
     search_fields = ['user__username', 'show__movie__title']
+    raw_id_fields = ['user']
+    autocomplete_fields = ['show']
+    ordering = ['id']
+    readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'user', 'movie_title', 'venue_name', 'show_date_time', 'seat_number', 'status'
+    ]
+    list_filter = ['status']
+    list_select_related = ['user']
+    search_fields = ['movie_title']
     ordering = ['-created_at']
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    raw_id_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ShowStats)
+class ShowStatsAdmin(admin.ModelAdmin):
+    list_display = ['show', 'date', 'capacity', 'booked_seats', 'cancellations', 'updated_at']
+    list_select_related = ['show__movie']
+    raw_id_fields = ['show', 'movie']
+    ordering = ['-date']
+
+
+@admin.register(MovieDailyStats)
+class MovieDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['movie', 'date', 'shows', 'capacity', 'booked_seats', 'cancellations']
+    list_select_related = ['movie']
+    raw_id_fields = ['movie']
+    ordering = ['-date']
+
+
+@admin.register(ReminderCursor)
+class ReminderCursorAdmin(admin.ModelAdmin):
+    list_display = ['name', 'high_water_mark', 'updated_at']
+
+
+@admin.register(BookingEvent)
+class BookingEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_type', 'show_id', 'seat_number', 'booking_id', 'user_id', 'created_at']
+    list_filter = ['event_type']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
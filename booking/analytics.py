@@ -0,0 +1,200 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .db_routers import booking_aliases
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def local_date(value):
+    if timezone.is_naive(value):
+        return value.date()
+    return timezone.localtime(value).date()
+
+
+def show_day(show):
+    return local_date(show.date_time)
+
+
+def occupancy(booked_seats, capacity):
+    return round(booked_seats / capacity, 4) if capacity else 0.0
+
+
+class StatsService:
+    """Incrementally maintained per-show and per-movie-per-day rollups.
+
+    Booking and cancellation deltas are buffered until their transaction
+    commits, then written in batches with F() updates, so booking
+    transactions never wait on the rollup rows and reads never aggregate the
+    Booking table. Deltas buffered when a process dies are recovered by
+    rebuild_stats.
+    """
+
+    _pending = {}
+    _pending_lock = threading.Lock()
+    _flush_lock = threading.Lock()
+
+    @staticmethod
+    def _bump_daily(movie_id, day, **deltas):
+        from .models import MovieDailyStats
+
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not updates:
+            return
+        updates['updated_at'] = timezone.now()
+        if not MovieDailyStats.objects.filter(movie_id=movie_id, date=day).update(**updates):
+            MovieDailyStats.objects.get_or_create(movie_id=movie_id, date=day)
+            MovieDailyStats.objects.filter(movie_id=movie_id, date=day).update(**updates)
+
+    @staticmethod
+    def _write(pending):
+        """Apply buffered (show, booked, cancelled) deltas, one UPDATE per row"""
+        from .models import ShowStats
+
+        daily = defaultdict(lambda: [0, 0])
+        with transaction.atomic():
+            # Fixed row order so concurrent flushes can't deadlock
+            for show_id in sorted(pending):
+                show, booked, cancelled = pending[show_id]
+                updates = {
+                    'booked_seats': F('booked_seats') + booked,
+                    'cancellations': F('cancellations') + cancelled,
+                    'updated_at': timezone.now(),
+                }
+                if not ShowStats.objects.filter(show_id=show_id).update(**updates):
+                    StatsService.show_saved(show)
+                    ShowStats.objects.filter(show_id=show_id).update(**updates)
+                totals = daily[(show.movie_id, show_day(show))]
+                totals[0] += booked
+                totals[1] += cancelled
+            for (movie_id, day), (booked, cancelled) in sorted(daily.items()):
+                StatsService._bump_daily(
+                    movie_id, day, booked_seats=booked, cancellations=cancelled
+                )
+
+    @staticmethod
+    def _committed(show, booked, cancelled):
+        """Buffer a committed delta, then flush unless another thread is flushing"""
+        with StatsService._pending_lock:
+            _, total_booked, total_cancelled = StatsService._pending.get(show.id, (show, 0, 0))
+            StatsService._pending[show.id] = (
+                show, total_booked + booked, total_cancelled + cancelled
+            )
+        # Rechecked after each release, so a delta buffered while another
+        # thread was writing is never left behind
+        while StatsService._pending and StatsService._flush_lock.acquire(blocking=False):
+            try:
+                with StatsService._pending_lock:
+                    pending, StatsService._pending = StatsService._pending, {}
+                try:
+                    StatsService._write(pending)
+                except Exception as e:
+                    logger.error(f"Failed to record stats for shows {sorted(pending)}: {str(e)}")
+            finally:
+                StatsService._flush_lock.release()
+
+    @staticmethod
+    def seats_booked(show, count=1):
+        """Count newly booked seats once the booking transaction commits"""
+        transaction.on_commit(lambda: StatsService._committed(show, count, 0))
+
+    @staticmethod
+    def seats_cancelled(show, count=1):
+        """Count cancelled seats once the cancellation transaction commits"""
+        transaction.on_commit(lambda: StatsService._committed(show, -count, count))
+
+    @staticmethod
+    def show_saved(show):
+        """Create or move a show's rollup when it is added, rescheduled or resized"""
+        from .models import ShowStats
+
+        day = show_day(show)
+        with transaction.atomic():
+            stats = ShowStats.objects.select_for_update().filter(show_id=show.id).first()
+            if stats is None:
+                ShowStats.objects.create(
+                    show_id=show.id, movie_id=show.movie_id, date=day, capacity=show.total_seats
+                )
+                StatsService._bump_daily(show.movie_id, day, shows=1, capacity=show.total_seats)
+                return
+            if (stats.movie_id, stats.date, stats.capacity) == (show.movie_id, day, show.total_seats):
+                return
+
+            StatsService._bump_daily(
+                stats.movie_id, stats.date,
+                shows=-1, capacity=-stats.capacity,
+                booked_seats=-stats.booked_seats, cancellations=-stats.cancellations
+            )
+            StatsService._bump_daily(
+                show.movie_id, day,
+                shows=1, capacity=show.total_seats,
+                booked_seats=stats.booked_seats, cancellations=stats.cancellations
+            )
+            stats.movie_id = show.movie_id
+            stats.date = day
+            stats.capacity = show.total_seats
+            stats.save(update_fields=['movie', 'date', 'capacity', 'updated_at'])
+
+    @staticmethod
+    def show_deleted(show):
+        """Remove a deleted show's counts from its day"""
+        from .models import ShowStats
+
+        stats = ShowStats.objects.filter(show_id=show.id).first()
+        if stats is not None:
+            StatsService._bump_daily(
+                stats.movie_id, stats.date,
+                shows=-1, capacity=-stats.capacity,
+                booked_seats=-stats.booked_seats, cancellations=-stats.cancellations
+            )
+
+    @staticmethod
+    def rebuild(batch_size=1000):
+        """Recompute every rollup from bookings and archived bookings.
+
+        Returns (show rows, daily rows). Bookings made while this runs may be
+        missed; run it when traffic is low.
+        """
+        from .models import ArchivedBooking, Booking, MovieDailyStats, Show, ShowStats
+
+        # Bookings are counted per database (they may be sharded) and
+        # matched to shows in Python
+        counts = defaultdict(lambda: [0, 0])
+        sources = [ArchivedBooking.objects] + [
+            Booking.objects.using(alias) for alias in booking_aliases()
+        ]
+        for source in sources:
+            for show_id, booking_status, total in source.values_list(
+                'show_id', 'status'
+            ).annotate(total=Count('id')).order_by():
+                counts[show_id][0 if booking_status == 'booked' else 1] += total
+
+        shows = Show.objects.values_list('id', 'movie_id', 'date_time', 'total_seats')
+
+        show_rows = []
+        daily = defaultdict(lambda: {'shows': 0, 'capacity': 0, 'booked_seats': 0, 'cancellations': 0})
+        for show_id, movie_id, date_time, total_seats in shows.iterator():
+            booked, cancelled = counts[show_id]
+            day = local_date(date_time)
+            show_rows.append(ShowStats(
+                show_id=show_id, movie_id=movie_id, date=day, capacity=total_seats,
+                booked_seats=booked, cancellations=cancelled
+            ))
+            totals = daily[movie_id, day]
+            totals['shows'] += 1
+            totals['capacity'] += total_seats
+            totals['booked_seats'] += booked
+            totals['cancellations'] += cancelled
+
+        with transaction.atomic():
+            ShowStats.objects.all().delete()
+            MovieDailyStats.objects.all().delete()
+            ShowStats.objects.bulk_create(show_rows, batch_size=batch_size)
+            MovieDailyStats.objects.bulk_create([
+                MovieDailyStats(movie_id=movie_id, date=day, **totals)
+                for (movie_id, day), totals in daily.items()
+            ], batch_size=batch_size)
+        return len(show_rows), len(daily)
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'booking'
\ No newline at end of file
+    name = 'booking'
+
+    def ready(self):
+        # Connect signal handlers
+        from . import signals
+        # Register the shared cache deploy check
+        from . import caching
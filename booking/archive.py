@@ -0,0 +1,92 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .versions import BookingVersion
+import gzip
+import json
+
+# Columns copied into ArchivedBooking, joined from the show and movie
+ARCHIVE_FIELDS = {
+    'id': 'id',
+    'user_id': 'user_id',
+    'show_id': 'show_id',
+    'movie_title': 'show__movie__title',
+    'venue_name': 'show__venue__name',
+    'screen_name': 'show__screen_name',
+    'show_date_time': 'show__date_time',
+    'total_seats': 'show__total_seats',
+    'seat_number': 'seat_number',
+    'status': 'status',
+    'price': 'price',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+
+def archivable_bookings(show_age_days=1, cancelled_age_days=7):
+    """Bookings for long-past shows and cancellations older than the cutoff"""
+    from .models import Booking
+
+    now = timezone.now()
+    return Booking.objects.filter(
+        Q(show__date_time__lt=now - timedelta(days=show_age_days)) |
+        Q(status='cancelled', updated_at__lt=now - timedelta(days=cancelled_age_days))
+    )
+
+
+def iter_archive_chunks(queryset, chunk_size=1000):
+    """Yield lists of archive rows in primary key order using keyset pagination"""
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list(*ARCHIVE_FIELDS.values())[:chunk_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [dict(zip(ARCHIVE_FIELDS, row)) for row in rows]
+
+
+class BookingArchiver:
+    """Moves bookings out of the hot table in short, bounded transactions"""
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path
+        self._file = None
+
+    def __enter__(self):
+        if self.output_path:
+            self._file = gzip.open(self.output_path, 'at', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            self._file.close()
+
+    def archive_chunk(self, rows):
+        """Copy one chunk to the archive and delete it from the hot table"""
+        from .models import ArchivedBooking, Booking, BookingTombstone
+
+        if self._file is not None:
+            for row in rows:
+                self._file.write(json.dumps(row, default=str) + '\n')
+            # Make sure the rows are on disk before deleting them
+            self._file.flush()
+
+        with transaction.atomic():
+            if self._file is None:
+                ArchivedBooking.objects.bulk_create(
+                    [ArchivedBooking(**row) for row in rows],
+                    ignore_conflicts=True
+                )
+            else:
+                # Only the ids stay behind, for clients syncing with ?since=
+                BookingTombstone.objects.bulk_create(
+                    [BookingTombstone(id=row['id'], user_id=row['user_id']) for row in rows],
+                    ignore_conflicts=True
+                )
+            BookingVersion.bump(*(row['user_id'] for row in rows))
+            return Booking.objects.filter(id__in=[row['id'] for row in rows]).delete()[0]
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose contents are private to one process
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def is_local_cache(alias='default'):
+    """True when each process sees its own copy of the cache"""
+    return settings.CACHES[alias]['BACKEND'] in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Deploy check: revoked JTIs and hot show leases must be visible to every worker"""
+    if not is_local_cache():
+        return []
+    return [
+        Error(
+            'Token revocation and hot show mode need a cache shared by every worker.',
+            hint=(
+                f'Set CACHE_BACKEND to a shared backend (e.g. Redis) instead of '
+                f'{settings.CACHES["default"]["BACKEND"]}.'
+            ),
+            id='booking.E001',
+        )
+    ]
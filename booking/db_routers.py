@@ -0,0 +1,154 @@
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+import random
+import threading
+
+_state = threading.local()
+
+PINNED_CACHE_KEY = 'db-pinned:{user_id}'
+
+# Booking ids on shard N (1-based) start at N << SHARD_ID_BITS, so the id
+# alone identifies the shard holding a booking
+SHARD_ID_BITS = 40
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def choose_replica():
+    """Return a random replica alias, or 'default' when none are configured"""
+    replicas = replica_aliases()
+    return random.choice(replicas) if replicas else 'default'
+
+
+def pin_to_primary(user):
+    """Send the user's reads to the primary for a short window after a write"""
+    if user is not None and user.is_authenticated:
+        cache.set(
+            PINNED_CACHE_KEY.format(user_id=user.pk),
+            True,
+            getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+        )
+
+
+def is_pinned(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return cache.get(PINNED_CACHE_KEY.format(user_id=user.pk), False)
+
+
+@contextmanager
+def use_replicas(user=None):
+    """Route reads inside the block to a replica unless the user is pinned"""
+    if not replica_aliases() or is_pinned(user):
+        yield
+        return
+    previous = getattr(_state, 'alias', None)
+    _state.alias = choose_replica()
+    try:
+        yield
+    finally:
+        _state.alias = previous
+
+
+def shard_aliases():
+    return getattr(settings, 'BOOKING_SHARDS', [])
+
+
+def booking_aliases():
+    """Databases holding bookings; None stands for the router's usual choice"""
+    return shard_aliases() or [None]
+
+
+def shard_for_show(show_id):
+    """Return the shard holding a show's bookings, or None when not sharded"""
+    shards = shard_aliases()
+    if not shards or show_id is None:
+        return None
+    return shards[show_id % len(shards)]
+
+
+def shard_for_booking(booking_id):
+    """Return the shard holding a booking, or None when not sharded"""
+    shards = shard_aliases()
+    index = (booking_id >> SHARD_ID_BITS) - 1
+    return shards[index] if 0 <= index < len(shards) else None
+
+
+def shard_id_floor(alias):
+    return (shard_aliases().index(alias) + 1) << SHARD_ID_BITS
+
+
+@contextmanager
+def booking_shard(show_id):
+    """Route Booking queries without an instance hint to the show's shard"""
+    previous = getattr(_state, 'shard', None)
+    _state.shard = shard_for_show(show_id)
+    try:
+        yield _state.shard
+    finally:
+        _state.shard = previous
+
+
+class BookingShardRouter:
+    """Pins each show's bookings to one of BOOKING_SHARDS.
+
+    Bookings are placed by show id; every other model stays on the primary
+    (and its replicas), including shows and users reached from a sharded
+    booking. Does nothing when no shards are configured.
+    """
+
+    def _db(self, model, hints):
+        shards = shard_aliases()
+        if not shards:
+            return None
+        instance = hints.get('instance')
+        if model._meta.label == 'booking.Booking':
+            if isinstance(instance, model) and instance.show_id:
+                return shard_for_show(instance.show_id)
+            if instance is not None and instance._meta.label == 'booking.Show' and instance.pk:
+                # show.bookings
+                return shard_for_show(instance.pk)
+            return getattr(_state, 'shard', None)
+        if instance is not None and instance._state.db in shards:
+            return 'default'
+        return None
+
+    def db_for_read(self, model, **hints):
+        alias = self._db(model, hints)
+        if alias == 'default':
+            return getattr(_state, 'alias', None) or alias
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Shards only hold the booking table
+        if db in shard_aliases():
+            return app_label == 'booking' and model_name == 'booking'
+        return None
+
+
+class ReplicaRouter:
+    """Sends reads to a replica only inside use_replicas(); writes always go to default"""
+
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any of them can relate
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
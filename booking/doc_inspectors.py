@@ -0,0 +1,33 @@
+from drf_yasg import openapi
+from drf_yasg.inspectors import SwaggerAutoSchema
+from .docs import DocParameter, DocResponse
+
+
+def _resolve(value):
+    if isinstance(value, DocResponse):
+        return openapi.Response(value.description, value.schema)
+    if isinstance(value, DocParameter):
+        return openapi.Parameter(
+            value.name,
+            value.location,
+            description=value.description,
+            type=value.type,
+            required=value.required
+        )
+    return value
+
+
+class LazyAutoSchema(SwaggerAutoSchema):
+    """Converts booking.docs declarations into drf_yasg objects at generation time"""
+
+    def __init__(self, view, path, method, components, request, overrides, operation_keys=None):
+        overrides = dict(overrides)
+        if 'responses' in overrides:
+            overrides['responses'] = {
+                code: _resolve(response) for code, response in overrides['responses'].items()
+            }
+        if 'manual_parameters' in overrides:
+            overrides['manual_parameters'] = [
+                _resolve(parameter) for parameter in overrides['manual_parameters']
+            ]
+        super().__init__(view, path, method, components, request, overrides, operation_keys)
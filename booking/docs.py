@@ -0,0 +1,53 @@
+"""Lightweight API documentation declarations.
+
+Views describe themselves with :func:`api_doc` instead of drf_yasg's
+``swagger_auto_schema`` so that drf_yasg is only imported when the schema is
+actually generated. The declarations are stored in the same
+``_swagger_auto_schema`` attribute drf_yasg reads, and the stand-in
+``DocResponse``/``DocParameter`` objects are converted to their drf_yasg
+equivalents by ``booking.doc_inspectors.LazyAutoSchema``.
+"""
+
+TYPE_STRING = 'string'
+TYPE_INTEGER = 'integer'
+TYPE_BOOLEAN = 'boolean'
+
+IN_QUERY = 'query'
+IN_HEADER = 'header'
+
+
+class DocResponse:
+    """Stand-in for drf_yasg.openapi.Response"""
+
+    def __init__(self, description, schema=None):
+        self.description = description
+        self.schema = schema
+
+
+class DocParameter:
+    """Stand-in for drf_yasg.openapi.Parameter"""
+
+    def __init__(self, name, location, type=TYPE_STRING, description='', required=False):
+        self.name = name
+        self.location = location
+        self.type = type
+        self.description = description
+        self.required = required
+
+
+def api_doc(method=None, **overrides):
+    """Attach schema overrides to a view method or an @api_view function.
+
+    Accepts the same keyword arguments as drf_yasg's ``swagger_auto_schema``;
+    pass ``method`` when decorating an @api_view function.
+    """
+    def decorator(view):
+        if method is None:
+            view._swagger_auto_schema = overrides
+        else:
+            existing = getattr(view, '_swagger_auto_schema', {})
+            existing[method.lower()] = overrides
+            view._swagger_auto_schema = existing
+        return view
+
+    return decorator
@@ -44,6 +44,13 @@ class EmailService:
             logger.error(f"Failed to send booking confirmation email: {str(e)}")
             return False
     
+    @staticmethod
+    def send_group_confirmations(bookings):
+        """Send a booking confirmation to each member of a group booking"""
+        sent = sum(EmailService.send_booking_confirmation(booking) for booking in bookings)
+        logger.info(f"Sent {sent} of {len(bookings)} group booking confirmations")
+        return sent
+
     @staticmethod
     def send_cancellation_notification(booking):
         """Send booking cancellation email"""
@@ -108,16 +115,49 @@ class EmailService:
             logger.error(f"Failed to send reminder email: {str(e)}")
             return False
     
+    @staticmethod
+    def send_waitlist_offer(entry):
+        """Send a waitlist seat offer email"""
+        try:
+            subject = f'A seat is available - {entry.show.movie.title}'
+            
+            context = {
+                'user': entry.user,
+                'entry': entry,
+                'show': entry.show,
+                'movie': entry.show.movie,
+            }
+            
+            html_message = render_to_string('emails/waitlist_offer.html', context)
+            plain_message = strip_tags(html_message)
+            
+            send_mail(
+                subject=subject,
+                message=plain_message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[entry.user.email],
+                html_message=html_message,
+                fail_silently=False,
+            )
+            
+            logger.info(f"Waitlist offer email sent to {entry.user.email}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to send waitlist offer email: {str(e)}")
+            return False
+    
     @staticmethod
     def get_bookings_for_reminder():
         """Get bookings that need 24-hour reminder"""
         from .models import Booking
+        from .db_routers import choose_replica
         
         tomorrow = timezone.now() + timedelta(days=1)
         start_time = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
         end_time = tomorrow.replace(hour=23, minute=59, second=59, microsecond=999999)
         
-        return Booking.objects.filter(
+        return Booking.objects.using(choose_replica()).filter(
             show__date_time__range=(start_time, end_time),
             status='booked'
         ).select_related('user', 'show', 'show__movie')
\ No newline at end of file
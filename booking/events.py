@@ -0,0 +1,205 @@
+"""Append-only booking event log and the projections built from it.
+
+Write paths call :class:`EventLog` inside their own transaction, so an event
+exists exactly when the state change it describes was committed. Consumers
+read the log in sequence order with :meth:`EventLog.tail`, and projections
+rebuild a read model from scratch by replaying it.
+
+Sequence numbers are assigned at insert but become visible at commit, so a
+transaction can commit an event below an id a reader has already passed.
+Readers therefore only see events older than EVENT_LOG_COMMIT_LAG_SECONDS,
+which must exceed the longest write transaction.
+"""
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+class EventLog:
+    """Append to and read from the BookingEvent log"""
+
+    @staticmethod
+    def record(event_type, show_id, seat_numbers, user_id=None, booking_ids=None):
+        """Append one event per seat; call inside the transaction making the change"""
+        from .models import BookingEvent
+
+        booking_ids = booking_ids or [None] * len(seat_numbers)
+        events = [
+            BookingEvent(
+                event_type=event_type,
+                show_id=show_id,
+                seat_number=seat_number,
+                booking_id=booking_id,
+                user_id=user_id
+            )
+            for seat_number, booking_id in zip(seat_numbers, booking_ids)
+        ]
+        if len(events) == 1:
+            events[0].save()
+            return events
+        return BookingEvent.objects.bulk_create(events)
+
+    @staticmethod
+    def bookings_created(bookings):
+        """Record 'booked' events for bookings of one show"""
+        EventLog._booking_events('booked', bookings)
+
+    @staticmethod
+    def bookings_cancelled(bookings):
+        """Record 'cancelled' events for bookings of one show"""
+        EventLog._booking_events('cancelled', bookings)
+
+    @staticmethod
+    def _booking_events(event_type, bookings):
+        from .models import BookingEvent
+
+        # Bookings may belong to different users (see booking.hotshow)
+        if bookings:
+            BookingEvent.objects.bulk_create([
+                BookingEvent(
+                    event_type=event_type,
+                    show_id=booking.show_id,
+                    seat_number=booking.seat_number,
+                    booking_id=booking.id,
+                    user_id=booking.user_id
+                )
+                for booking in bookings
+            ])
+
+    @staticmethod
+    def tail(after=0, limit=500, show_id=None, event_types=None):
+        """Return up to `limit` events with sequence numbers greater than `after`"""
+        from .models import BookingEvent
+
+        events = BookingEvent.objects.filter(id__gt=after)
+        lag = getattr(settings, 'EVENT_LOG_COMMIT_LAG_SECONDS', 5)
+        if lag:
+            # Stop below the first event still inside the lag window: an
+            # uncommitted event could yet appear under any later id
+            cutoff = timezone.now() - timedelta(seconds=lag)
+            horizon = events.filter(created_at__gt=cutoff).order_by('id').values_list(
+                'id', flat=True
+            ).first()
+            if horizon is not None:
+                events = events.filter(id__lt=horizon)
+        if show_id is not None:
+            events = events.filter(show_id=show_id)
+        if event_types:
+            events = events.filter(event_type__in=event_types)
+        return list(events.order_by('id')[:limit])
+
+    @staticmethod
+    def stream(after=0, batch_size=1000, show_id=None):
+        """Yield every event after `after` in sequence order, one batch at a time"""
+        while True:
+            batch = EventLog.tail(after, batch_size, show_id=show_id)
+            if not batch:
+                return
+            yield from batch
+            after = batch[-1].id
+
+    @staticmethod
+    def consume(name, handler, batch_size=500):
+        """Feed the next batch after a named consumer's offset to handler(events).
+
+        The offset advances in the same transaction as the handler's writes,
+        so each batch is applied once. Returns the number of events handled.
+        """
+        from .models import EventConsumerOffset
+
+        with transaction.atomic():
+            offset, _ = EventConsumerOffset.objects.select_for_update().get_or_create(name=name)
+            events = EventLog.tail(offset.position, batch_size)
+            if not events:
+                return 0
+            handler(events)
+            offset.position = events[-1].id
+            offset.save(update_fields=['position', 'updated_at'])
+        return len(events)
+
+
+class Projection(ABC):
+    """Read model derived purely from the event log"""
+    name = None
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.position = 0
+        self.show_id = None
+
+    @abstractmethod
+    def apply(self, event):
+        """Fold one event into the read model"""
+
+    def replay(self, show_id=None, batch_size=1000):
+        """Rebuild from scratch by streaming the whole log"""
+        self.reset()
+        self.show_id = show_id
+        for event in EventLog.stream(0, batch_size, show_id=show_id):
+            self.apply(event)
+            self.position = event.id
+        return self
+
+    def catch_up(self, batch_size=1000):
+        """Apply events appended since the last replay or catch_up"""
+        for event in EventLog.stream(self.position, batch_size, show_id=self.show_id):
+            self.apply(event)
+            self.position = event.id
+        return self
+
+
+class SeatMapProjection(Projection):
+    """Booked and held seats per show"""
+    name = 'seat-map'
+
+    def reset(self):
+        super().reset()
+        self.booked = defaultdict(set)
+        self.held = defaultdict(set)
+
+    def apply(self, event):
+        booked, held = self.booked[event.show_id], self.held[event.show_id]
+        if event.event_type == 'booked':
+            booked.add(event.seat_number)
+        elif event.event_type == 'cancelled':
+            booked.discard(event.seat_number)
+        elif event.event_type == 'hold_offered':
+            held.add(event.seat_number)
+        else:
+            # Accepted holds are followed by their own 'booked' event
+            held.discard(event.seat_number)
+
+    def snapshot(self, show_id):
+        return {
+            'booked': sorted(self.booked.get(show_id, ())),
+            'held': sorted(self.held.get(show_id, ())),
+        }
+
+
+class CounterProjection(Projection):
+    """Running booked seat and cancellation counts per show"""
+    name = 'counters'
+
+    def reset(self):
+        super().reset()
+        self.counts = defaultdict(lambda: {'booked_seats': 0, 'cancellations': 0})
+
+    def apply(self, event):
+        if event.event_type == 'booked':
+            self.counts[event.show_id]['booked_seats'] += 1
+        elif event.event_type == 'cancelled':
+            self.counts[event.show_id]['booked_seats'] -= 1
+            self.counts[event.show_id]['cancellations'] += 1
+
+    def snapshot(self, show_id):
+        return dict(self.counts.get(show_id, {'booked_seats': 0, 'cancellations': 0}))
+
+
+PROJECTIONS = {
+    projection.name: projection for projection in (SeatMapProjection, CounterProjection)
+}
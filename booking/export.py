@@ -0,0 +1,114 @@
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from itertools import chain
+import csv
+import io
+import zlib
+
+# Export columns, joined from the user, show and movie
+EXPORT_FIELDS = {
+    'id': 'id',
+    'user_id': 'user_id',
+    'username': 'user__username',
+    'show_id': 'show_id',
+    'movie_title': 'show__movie__title',
+    'venue_name': 'show__venue__name',
+    'screen_name': 'show__screen_name',
+    'show_date_time': 'show__date_time',
+    'seat_number': 'seat_number',
+    'status': 'status',
+    'price': 'price',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_chunk_size():
+    return getattr(settings, 'BOOKING_EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_rows(start_date, end_date, status=None, using=None):
+    """Yield value tuples for bookings created between two dates, inclusive.
+
+    Rows are fetched in chunks with iterator() so memory use does not grow
+    with the size of the range.
+    """
+    from .db_routers import shard_aliases
+    from .models import Booking
+    from .sharding import iter_joined_rows
+
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    queryset = Booking.objects.filter(created_at__gte=start, created_at__lt=end)
+    if status:
+        queryset = queryset.filter(status=status)
+
+    shards = shard_aliases()
+    if shards:
+        # Shard id ranges are ordered, so shard by shard is still id order
+        return chain.from_iterable(
+            iter_joined_rows(
+                queryset.using(alias), EXPORT_FIELDS.values(), export_chunk_size(), using
+            )
+            for alias in shards
+        )
+    return queryset.using(using).order_by('id').values_list(*EXPORT_FIELDS.values()).iterator(
+        chunk_size=export_chunk_size()
+    )
+
+
+def iter_csv(rows, batch_size=500):
+    """Yield CSV text in batches of rows, starting with the header"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows, batch_size=500):
+    """Yield newline-delimited JSON objects in batches of rows"""
+    encoder = DjangoJSONEncoder()
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(dict(zip(EXPORT_FIELDS, row))))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def iter_export(rows, export_format='csv'):
+    if export_format == 'ndjson':
+        return iter_ndjson(rows)
+    return iter_csv(rows)
+
+
+def iter_gzip(chunks):
+    """Compress a stream of text chunks into a gzip stream"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_filename(start_date, end_date, export_format, compress=False):
+    name = f'bookings-{start_date.isoformat()}-{end_date.isoformat()}.{export_format}'
+    return f'{name}.gz' if compress else name
@@ -0,0 +1,420 @@
+"""In-memory seat state with batched write-behind for hot shows.
+
+A show with ``hot_mode`` set is served by one engine per deployment: the one
+in the process holding the show's lease in the cache. The engine's owner
+thread keeps the set of booked seats in memory and takes booking and
+cancellation commands from a queue one at a time, so a conflict check is a
+set lookup instead of a query contending on the show's rows. Accepted
+commands are written in micro-batches (one transaction, one bulk insert)
+and each request is answered only after its batch has committed.
+
+Requests reaching a process that does not hold the lease, or arriving while
+the engine is down, are answered 503 with Retry-After rather than written
+through the database; best-seat and group allocation are refused while a show
+is hot. Bookings written before the show turned hot are picked up on the next
+heartbeat, and a booking that loses to one fails on its own without failing
+the rest of its batch. A lease that is not renewed within
+HOT_SHOW_LEASE_SECONDS (the owner died or stalled) is taken over by the next
+process to see a request for the show. The lease only means anything in a
+cache shared by every worker (see the booking.E001 deploy check).
+"""
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.utils import timezone
+from .analytics import StatsService
+from .db_routers import shard_for_show
+from .events import EventLog
+from .pricing import PricingService
+from .seating import SeatIndex
+from .versions import BookingVersion
+from .waitlist import WaitlistService
+import logging
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+HOT_SHOW_LEASE_KEY = 'hot-show-owner:{show_id}'
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+class HotShowUnavailable(Exception):
+    """Raised when no engine in this process can take a command; the client retries"""
+
+
+class SeatUnavailable(Exception):
+    """Raised when the engine rejects a booking or cancellation"""
+
+
+def hot_show_setting(name, default):
+    return getattr(settings, f'HOT_SHOW_{name}', default)
+
+
+class SeatCommand:
+    """A booking or cancellation waiting in an engine's queue"""
+
+    def __init__(self, kind, user, seat_number, booking=None):
+        self.kind = kind
+        self.user = user
+        self.seat_number = seat_number
+        self.booking = booking
+        self.held = False
+        self.future = Future()
+
+
+class HotShowEngine:
+    """Owns one show's seat state and serializes writes to its bookings"""
+
+    def __init__(self, show):
+        self.show = show
+        self.show_id = show.id
+        self.shard = shard_for_show(show.id)
+        self.token = uuid.uuid4().hex
+        self.booked = set()
+        self.commands = queue.Queue()
+        self.stopped = threading.Event()
+        self._next_heartbeat = 0
+        # Serializes inline processing when tasks run eagerly (no owner thread)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def eager(self):
+        # Process commands inline in the submitting request (tests, debugging)
+        return hot_show_setting('EAGER', False)
+
+    # Lease
+
+    @staticmethod
+    def lease_key(show_id):
+        return HOT_SHOW_LEASE_KEY.format(show_id=show_id)
+
+    @staticmethod
+    def lease_seconds():
+        return hot_show_setting('LEASE_SECONDS', 10)
+
+    def acquire_lease(self):
+        return cache.add(self.lease_key(self.show_id), self.token, self.lease_seconds())
+
+    def renew_lease(self):
+        if cache.get(self.lease_key(self.show_id)) != self.token:
+            return False
+        cache.set(self.lease_key(self.show_id), self.token, self.lease_seconds())
+        return True
+
+    def release_lease(self):
+        if cache.get(self.lease_key(self.show_id)) == self.token:
+            cache.delete(self.lease_key(self.show_id))
+
+    # State
+
+    def load(self):
+        """Reload the show and its booked seats from the database"""
+        from .models import Booking, Show
+
+        self.show = Show.objects.filter(pk=self.show_id).first()
+        if self.show is None or not self.show.hot_mode:
+            return False
+        self.booked = set(
+            Booking.objects.using(self.shard).filter(show_id=self.show_id, status='booked')
+            .values_list('seat_number', flat=True)
+        )
+        return True
+
+    def heartbeat(self):
+        """Renew the lease and resync with writes made outside the engine.
+
+        Returns False when the engine must stop: the lease was lost or the
+        show left hot mode.
+        """
+        if time.monotonic() < self._next_heartbeat:
+            return True
+        if not self.renew_lease():
+            logger.warning(f"Hot show engine for show {self.show_id} lost its lease")
+            return False
+        if not self.load():
+            return False
+        self._next_heartbeat = time.monotonic() + self.lease_seconds() / 3
+        return True
+
+    # Client side
+
+    def book(self, user, seat_number):
+        """Book a seat; returns the saved Booking once its batch has committed"""
+        return self.submit(SeatCommand('book', user, seat_number))
+
+    def cancel(self, booking):
+        """Cancel a booking; returns it once its batch has committed"""
+        return self.submit(SeatCommand('cancel', booking.user, booking.seat_number, booking))
+
+    def submit(self, command):
+        if self.stopped.is_set():
+            raise HotShowUnavailable(f'No engine is running for show {self.show_id}')
+
+        if self.eager:
+            with self._lock:
+                if not self.heartbeat():
+                    self.stop()
+                    raise HotShowUnavailable(f'No engine is running for show {self.show_id}')
+                command.future.set_running_or_notify_cancel()
+                self.process([command])
+            return command.future.result()
+
+        self.commands.put(command)
+        try:
+            return command.future.result(timeout=hot_show_setting('REQUEST_TIMEOUT', 5))
+        except FutureTimeout:
+            if command.future.cancel():
+                # Never picked up, so never written: safe to retry elsewhere
+                raise HotShowUnavailable(f'Engine for show {self.show_id} timed out')
+            # Already part of a batch; its outcome is on the way
+            return command.future.result()
+
+    # Owner side
+
+    def start(self):
+        if self.eager:
+            # Commands are processed inline by the requests submitting them
+            return
+        self._thread = threading.Thread(
+            target=self.run, name=f'hot-show-{self.show_id}', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self._thread is None:
+            self.release_lease()
+        elif self._thread is not threading.current_thread():
+            # Wake the owner thread if it is waiting for a command
+            self.commands.put(None)
+            self._thread.join()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set() and self.heartbeat():
+                batch = self.next_batch()
+                if batch:
+                    self.process(batch)
+        except Exception as e:
+            logger.error(f"Hot show engine for show {self.show_id} failed: {str(e)}")
+        finally:
+            self.stopped.set()
+            self.fail_pending()
+            self.release_lease()
+            connections.close_all()
+
+    def next_batch(self):
+        """Wait for a command, then take whatever else arrives within the batch window"""
+        try:
+            first = self.commands.get(timeout=max(0.01, self._next_heartbeat - time.monotonic()))
+        except queue.Empty:
+            return []
+        if first is None:
+            return []
+        batch = [first]
+        batch_size = hot_show_setting('BATCH_SIZE', 100)
+        deadline = time.monotonic() + hot_show_setting('BATCH_WAIT_MS', 2) / 1000
+        while len(batch) < batch_size:
+            try:
+                batch.append(self.commands.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        # Requests that gave up waiting are dropped here, before any write
+        return [
+            command for command in batch
+            if command is not None and command.future.set_running_or_notify_cancel()
+        ]
+
+    def fail_pending(self):
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            if command is not None and command.future.set_running_or_notify_cancel():
+                command.future.set_exception(
+                    HotShowUnavailable(f'Engine for show {self.show_id} stopped')
+                )
+
+    def process(self, commands):
+        """Check a batch against the in-memory state, write it, then answer it"""
+        bookings, cancellations = [], []
+        holds = WaitlistService.seat_holds(self.show_id) if any(
+            command.kind == 'book' for command in commands
+        ) else {}
+        claimed = set()
+        for command in commands:
+            seat = command.seat_number
+            if command.kind == 'cancel':
+                cancellations.append(command)
+            elif seat in self.booked or seat in claimed:
+                command.future.set_exception(
+                    SeatUnavailable(f'Seat {seat} is already booked for this show')
+                )
+            elif holds.get(seat) and command.user.id not in holds[seat]:
+                command.future.set_exception(
+                    SeatUnavailable(f'Seat {seat} is being held for a waitlisted customer')
+                )
+            else:
+                command.held = bool(holds.get(seat))
+                claimed.add(seat)
+                bookings.append(command)
+
+        try:
+            conflicts = self.write(bookings, cancellations, occupied=len(self.booked | set(holds)))
+        except Exception as e:
+            logger.error(f"Hot show batch for show {self.show_id} failed: {str(e)}")
+            close_old_connections()
+            self.fail(bookings + cancellations, HotShowUnavailable(str(e)))
+            return
+
+        if conflicts:
+            # Seats were booked outside the engine
+            logger.warning(f"Stale seat state for hot show {self.show_id}, {len(conflicts)} seats taken")
+        for command in conflicts:
+            self.booked.add(command.seat_number)
+            command.future.set_exception(
+                SeatUnavailable(f'Seat {command.seat_number} is already booked for this show')
+            )
+        conflicts = set(conflicts)
+        for command in bookings:
+            if command not in conflicts:
+                self.booked.add(command.seat_number)
+                command.future.set_result(command.booking)
+        for command in cancellations:
+            if command.booking.status == 'cancelled':
+                self.booked.discard(command.seat_number)
+                command.future.set_result(command.booking)
+            else:
+                command.future.set_exception(SeatUnavailable('Booking is already cancelled'))
+
+    def fail(self, commands, error):
+        for command in commands:
+            command.future.set_exception(error)
+
+    def insert(self, bookings, prices):
+        """Insert the batch's bookings; returns (created, conflicting commands).
+
+        Seats booked outside the engine are weeded out first, so the batch
+        normally goes in with one bulk insert. If a seat is taken in between,
+        each booking is retried in its own savepoint and only the ones that
+        conflict fail.
+        """
+        from .models import Booking
+
+        def build(command):
+            return Booking(
+                user=command.user, show=self.show, seat_number=command.seat_number,
+                status='booked', price=prices.price(command.seat_number)
+            )
+
+        taken = set(
+            Booking.objects.using(self.shard).filter(
+                show_id=self.show_id, status='booked',
+                seat_number__in=[command.seat_number for command in bookings]
+            ).values_list('seat_number', flat=True)
+        )
+        conflicts = [command for command in bookings if command.seat_number in taken]
+        bookings = [command for command in bookings if command.seat_number not in taken]
+
+        try:
+            with transaction.atomic(using=self.shard):
+                created = Booking.objects.using(self.shard).bulk_create(
+                    [build(command) for command in bookings]
+                )
+            return list(zip(bookings, created)), conflicts
+        except IntegrityError:
+            pass
+
+        created = []
+        for command in bookings:
+            try:
+                with transaction.atomic(using=self.shard):
+                    created.extend(
+                        (command, booking)
+                        for booking in Booking.objects.using(self.shard).bulk_create([build(command)])
+                    )
+            except IntegrityError:
+                conflicts.append(command)
+        return created, conflicts
+
+    def write(self, bookings, cancellations, occupied):
+        """Write one batch in a single transaction; returns the bookings that conflicted"""
+        from .models import Booking
+
+        if not bookings and not cancellations:
+            return []
+        show = self.show
+        with transaction.atomic(), transaction.atomic(using=self.shard):
+            cancelled = []
+            for command in cancellations:
+                # Row by row: a booking cancelled elsewhere must not count twice
+                if Booking.objects.using(self.shard).filter(
+                    id=command.booking.id, status='booked'
+                ).update(status='cancelled', updated_at=timezone.now()):
+                    cancelled.append(command.booking)
+            if cancelled:
+                EventLog.bookings_cancelled(cancelled)
+                StatsService.seats_cancelled(show, len(cancelled))
+                SeatIndex.seats_released(show.id, [booking.seat_number for booking in cancelled])
+                for booking in cancelled:
+                    WaitlistService.seat_released(show.id, booking.seat_number)
+
+            inserted, conflicts = [], []
+            if bookings:
+                # Priced at the occupancy before this batch
+                prices = PricingService.table(show, occupied=occupied)
+                inserted, conflicts = self.insert(bookings, prices)
+            created = [booking for _, booking in inserted]
+            if created:
+                EventLog.bookings_created(created)
+                SeatIndex.seats_booked(show.id, [booking.seat_number for booking in created])
+                StatsService.seats_booked(show, len(created))
+                for command, _ in inserted:
+                    if command.held:
+                        WaitlistService.accept(show.id, command.user, command.seat_number)
+
+            BookingVersion.bump(*{booking.user_id for booking in cancelled + created})
+
+        for booking in cancelled:
+            booking.status = 'cancelled'
+        for command, booking in inserted:
+            command.booking = booking
+        return conflicts
+
+
+def engine_for(show):
+    """Return this process's engine for a hot show, or None when the show isn't hot.
+
+    Raises HotShowUnavailable when another process holds the show's lease.
+    """
+    if not show.hot_mode:
+        return None
+    with _engines_lock:
+        engine = _engines.get(show.id)
+        if engine is not None and not engine.stopped.is_set():
+            return engine
+        engine = HotShowEngine(show)
+        if not engine.acquire_lease():
+            # Owned by another process, or by one that died and whose
+            # lease has not yet expired
+            raise HotShowUnavailable(f'Show {show.id} is served by another process')
+        _engines[show.id] = engine
+        engine.start()
+        return engine
+
+
+def stop_engines():
+    """Stop every engine in this process and release their leases"""
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.stop()
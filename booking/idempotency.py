@@ -0,0 +1,143 @@
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+import hashlib
+import json
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Responses that say nothing about the outcome and must not be replayed
+NON_REPLAYABLE_STATUSES = {
+    status.HTTP_429_TOO_MANY_REQUESTS,
+    status.HTTP_503_SERVICE_UNAVAILABLE,
+}
+
+
+def _fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}:{request.path}:{payload}'.encode()).hexdigest()
+
+
+def transient_failure(message):
+    """400 for a failure worth retrying; never stored against the key"""
+    response = Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+    response.replayable = False
+    return response
+
+
+def _replayable(response):
+    return (
+        response.status_code < 500
+        and response.status_code not in NON_REPLAYABLE_STATUSES
+        and getattr(response, 'replayable', True)
+    )
+
+
+def _claim(user, key, fingerprint):
+    """Insert a pending record for the key; return (record, claimed).
+
+    An existing record is only replaced once it has expired, so a retry that
+    arrives while the first request is still running never runs the view.
+    """
+    from .models import IdempotencyKey
+
+    now = timezone.now()
+    pending_until = now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_PENDING_SECONDS', 300))
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+            return IdempotencyKey.objects.create(
+                user=user, key=key, request_fingerprint=fingerprint, expires_at=pending_until
+            ), True
+    except IntegrityError:
+        # Claimed by a concurrent request with the same key
+        return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def _in_progress(record):
+    """409 for a retry that arrives while its key is still claimed"""
+    retry_after = 1
+    if record is not None:
+        retry_after = max(1, int((record.expires_at - timezone.now()).total_seconds()))
+    response = Response(
+        {'error': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'},
+        status=status.HTTP_409_CONFLICT
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def idempotent(view_func):
+    """Replay the stored response when a request repeats an Idempotency-Key.
+
+    Keys are scoped to the authenticated user and expire after
+    IDEMPOTENCY_KEY_TTL_HOURS. A replay skips validation, writes and emails;
+    a retry while the first request is still running gets 409.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        from .models import IdempotencyKey
+
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = _fingerprint(request)
+        record, claimed = _claim(request.user, key, fingerprint)
+        if not claimed:
+            if record is not None and record.request_fingerprint != fingerprint:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record is None or record.status_code is None:
+                # The first request is still running (or has just failed)
+                return _in_progress(record)
+            response = Response(record.response_body, status=record.status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if _replayable(response):
+            ttl = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code,
+                response_body=response.data,
+                expires_at=timezone.now() + ttl
+            )
+        else:
+            # Free the key so the client can retry
+            record.delete()
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys(batch_size=1000):
+    """Delete expired idempotency keys in bounded batches; return the count"""
+    from .models import IdempotencyKey
+
+    deleted = 0
+    now = timezone.now()
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+import json
+
+LAYOUT_CACHE_KEY = 'screen-layout:{layout_id}'
+
+
+def compile_layout(rows):
+    """Compile a row definition into the compact layout blob.
+
+    Each row is a dict with ``label`` and ``seats`` plus optional
+    ``section``, ``tier`` and ``aisles_after`` (seat positions within the
+    row that are followed by an aisle). Seats are numbered 1..N across
+    rows so they stay compatible with ``Booking.seat_number``.
+    """
+    if not isinstance(rows, list) or not rows:
+        raise ValidationError('Layout must define at least one row')
+
+    sections, tiers = [], []
+    compiled_rows, breaks = [], []
+    left, right = [0], [0]
+    next_seat = 1
+
+    for row in rows:
+        if not isinstance(row, dict) or 'label' not in row or 'seats' not in row:
+            raise ValidationError('Each row needs a label and a seat count')
+        count = row['seats']
+        if not isinstance(count, int) or count < 1:
+            raise ValidationError(f"Row {row['label']} must have at least one seat")
+        aisles = sorted(set(row.get('aisles_after', [])))
+        if any(not isinstance(a, int) or a < 1 or a >= count for a in aisles):
+            raise ValidationError(f"Row {row['label']} has an aisle outside the row")
+
+        section = row.get('section', '')
+        tier = row.get('tier', 'standard')
+        if section not in sections:
+            sections.append(section)
+        if tier not in tiers:
+            tiers.append(tier)
+
+        first_seat = next_seat
+        for position in range(1, count + 1):
+            seat = first_seat + position - 1
+            has_left = position > 1 and (position - 1) not in aisles
+            has_right = position < count and position not in aisles
+            left.append(seat - 1 if has_left else 0)
+            right.append(seat + 1 if has_right else 0)
+            if not has_right:
+                breaks.append(seat)
+
+        compiled_rows.append([
+            row['label'], first_seat, count,
+            sections.index(section), tiers.index(tier), aisles
+        ])
+        next_seat += count
+
+    return {
+        'total_seats': next_seat - 1,
+        'sections': sections,
+        'tiers': tiers,
+        # [label, first seat, seat count, section index, tier index, aisles]
+        'rows': compiled_rows,
+        # Seats after which a contiguous block must end (row ends and aisles)
+        'breaks': breaks,
+        # Neighbouring seat numbers indexed by seat, 0 when there is none
+        'left': left,
+        'right': right,
+    }
+
+
+class LayoutCache:
+    """Process-shared cache of compiled layouts, one blob per layout"""
+
+    @staticmethod
+    def cache_key(layout_id):
+        return LAYOUT_CACHE_KEY.format(layout_id=layout_id)
+
+    @staticmethod
+    def get(layout_id):
+        """Return (version, compiled dict, serialized JSON) for a layout"""
+        entry = cache.get(LayoutCache.cache_key(layout_id))
+        if entry is None:
+            from .models import ScreenLayout
+
+            layout = ScreenLayout.objects.only('version', 'compiled').get(pk=layout_id)
+            entry = LayoutCache.store(layout)
+        return entry
+
+    @staticmethod
+    def store(layout):
+        blob = dict(layout.compiled, id=layout.pk, version=layout.version)
+        entry = (layout.version, blob, json.dumps(blob, separators=(',', ':')))
+        cache.set(
+            LayoutCache.cache_key(layout.pk),
+            entry,
+            getattr(settings, 'LAYOUT_CACHE_TIMEOUT', 3600)
+        )
+        return entry
+
+    @staticmethod
+    def invalidate(layout_id):
+        cache.delete(LayoutCache.cache_key(layout_id))
+
+    @staticmethod
+    def breaks(layout_id):
+        if layout_id is None:
+            return []
+        return LayoutCache.get(layout_id)[1]['breaks']
+
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from booking.db_routers import shard_aliases
+from booking.archive import BookingArchiver, archivable_bookings, iter_archive_chunks
+import time
+
+
+class Command(BaseCommand):
+    help = 'Move bookings for past shows and old cancellations out of the hot Booking table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show-age-days', type=int, default=1,
+            help='Archive bookings for shows that started more than this many days ago'
+        )
+        parser.add_argument(
+            '--cancelled-age-days', type=int, default=7,
+            help='Archive cancellations older than this many days'
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows moved per transaction')
+        parser.add_argument(
+            '--output',
+            help='Write rows to this gzipped JSONL file instead of the ArchivedBooking table'
+        )
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between chunks')
+        parser.add_argument('--dry-run', action='store_true', help='Only count archivable rows')
+
+    def handle(self, *args, **options):
+        if shard_aliases():
+            # Archiving selects by show date, which needs a join shards cannot do
+            raise CommandError('Archiving sharded bookings is not supported')
+
+        queryset = archivable_bookings(options['show_age_days'], options['cancelled_age_days'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{queryset.count()} bookings would be archived')
+            return
+
+        self.stdout.write('Archiving bookings...')
+        archived = 0
+        with BookingArchiver(options['output']) as archiver:
+            for rows in iter_archive_chunks(queryset, options['chunk_size']):
+                archived += archiver.archive_chunk(rows)
+                self.stdout.write(f'Archived {archived} bookings')
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully archived {archived} bookings')
+        )
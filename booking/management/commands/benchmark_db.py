@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from booking.signals import apply_sqlite_pragmas
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent SQLite read/write throughput with default pragmas and SQLITE_PRAGMAS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent writer threads')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+        parser.add_argument('--rows', type=int, default=10000, help='Rows seeded before each run')
+
+    def handle(self, *args, **options):
+        runs = [
+            ('rollback journal (before)', {'journal_mode': 'delete', 'synchronous': 'full'}),
+            ('configured pragmas (after)', getattr(settings, 'SQLITE_PRAGMAS', {})),
+        ]
+
+        self.stdout.write('Running SQLite concurrency benchmark...')
+        self.stdout.write(
+            f'{options["readers"]} readers, {options["writers"]} writers, '
+            f'{options["duration"]}s per run'
+        )
+        self.stdout.write('\n' + '='*50)
+        for label, pragmas in runs:
+            reads, writes, errors = self.run_benchmark(pragmas, options)
+            duration = options['duration']
+            self.stdout.write(f'{label}: {pragmas}')
+            self.stdout.write(
+                f'  reads/s: {reads / duration:.0f}  writes/s: {writes / duration:.0f}  '
+                f'lock errors: {errors}'
+            )
+        self.stdout.write('='*50)
+        self.stdout.write(self.style.SUCCESS('Benchmark completed!'))
+
+    def run_benchmark(self, pragmas, options):
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        counters = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def connect():
+            # Same lock timeout as the Django connection
+            timeout = settings.DATABASES['default'].get('OPTIONS', {}).get('timeout', 5)
+            connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+            apply_sqlite_pragmas(connection.cursor(), pragmas)
+            return connection
+
+        setup = connect()
+        setup.execute(
+            'CREATE TABLE booking (id INTEGER PRIMARY KEY, show_id INTEGER, seat INTEGER, status TEXT)'
+        )
+        setup.execute('CREATE INDEX booking_show ON booking (show_id, status)')
+        setup.executemany(
+            'INSERT INTO booking (show_id, seat, status) VALUES (?, ?, ?)',
+            [(i % 100, i % 500, 'booked') for i in range(options['rows'])]
+        )
+        setup.close()
+
+        deadline = time.monotonic() + options['duration']
+
+        def reader():
+            connection = connect()
+            count = errors = 0
+            while time.monotonic() < deadline:
+                try:
+                    connection.execute(
+                        'SELECT seat FROM booking WHERE show_id = ? AND status = ?',
+                        (count % 100, 'booked')
+                    ).fetchall()
+                    count += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+            connection.close()
+            with lock:
+                counters['reads'] += count
+                counters['errors'] += errors
+
+        def writer():
+            connection = connect()
+            count = errors = 0
+            while time.monotonic() < deadline:
+                try:
+                    connection.execute('BEGIN IMMEDIATE')
+                    connection.execute(
+                        'INSERT INTO booking (show_id, seat, status) VALUES (?, ?, ?)',
+                        (count % 100, count % 500, 'booked')
+                    )
+                    connection.execute('COMMIT')
+                    count += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+            connection.close()
+            with lock:
+                counters['writes'] += count
+                counters['errors'] += errors
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['readers'] + options['writers']) as executor:
+                for _ in range(options['readers']):
+                    executor.submit(reader)
+                for _ in range(options['writers']):
+                    executor.submit(writer)
+        finally:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+        return counters['reads'], counters['writes'], counters['errors']
@@ -0,0 +1,113 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from booking.hotshow import stop_engines
+from booking.models import Movie, Show
+import logging
+import random
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare bookings/sec on one show with and without hot show mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help='Concurrent clients')
+        parser.add_argument('--seats', type=int, default=500, help='Seats in the test show')
+        parser.add_argument(
+            '--duration', type=int, default=30, help='Maximum seconds per run if the show does not sell out'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Booking a {options["seats"]}-seat show with {options["clients"]} concurrent clients...'
+        )
+        # Rejections are expected here; don't log a warning for each one
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        # Admission control would cap both runs at the same rate
+        admission = {'USER_RATE': 0, 'SHOW_RATE': 0, 'MAX_IN_FLIGHT': options['clients'] + 1}
+        results = []
+        with override_settings(BOOKING_ADMISSION=admission):
+            for hot_mode in (False, True):
+                try:
+                    results.append((hot_mode, self.run_benchmark(hot_mode, options)))
+                finally:
+                    stop_engines()
+
+        self.stdout.write('\n' + '='*50)
+        for hot_mode, (booked, elapsed, statuses) in results:
+            label = 'hot show (in-memory engine)' if hot_mode else 'database path'
+            self.stdout.write(f'{label}:')
+            self.stdout.write(
+                f'  {booked} seats in {elapsed:.2f}s: {booked / elapsed:.1f} bookings/s'
+            )
+            self.stdout.write(f'  Status codes: {dict(sorted(statuses.items()))}')
+        self.stdout.write('='*50)
+        self.stdout.write(self.style.SUCCESS('Benchmark completed!'))
+
+    def run_benchmark(self, hot_mode, options):
+        movie = Movie.objects.create(title='Hot Show Benchmark', duration_minutes=120)
+        show = Show.objects.create(
+            movie=movie,
+            screen_name=f'Benchmark {time.time_ns()}',
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=options['seats'],
+            hot_mode=hot_mode
+        )
+        users = [
+            User.objects.create_user(username=f'benchmark_{show.id}_{i}')
+            for i in range(options['clients'])
+        ]
+        tokens = [str(RefreshToken.for_user(user).access_token) for user in users]
+        url = reverse('book-seat', kwargs={'show_id': show.id})
+
+        # Clients pick from the seats they have not seen taken, like a seat
+        # map that refreshes after every attempt
+        free = set(range(1, show.total_seats + 1))
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def worker(token):
+            client = Client()
+            statuses = Counter()
+            try:
+                while time.monotonic() < deadline:
+                    with lock:
+                        if not free:
+                            break
+                        seat = random.choice(tuple(free))
+                    response = client.post(
+                        url,
+                        {'seat_number': seat},
+                        content_type='application/json',
+                        HTTP_AUTHORIZATION=f'Bearer {token}'
+                    )
+                    statuses[response.status_code] += 1
+                    # A 400 with an 'error' is a failed write, not a taken seat
+                    if response.status_code == 201 or 'seat_number' in response.json():
+                        with lock:
+                            free.discard(seat)
+            finally:
+                close_old_connections()
+            return statuses
+
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=options['clients']) as executor:
+                statuses = sum(executor.map(worker, tokens), Counter())
+            elapsed = time.monotonic() - started
+            booked = show.bookings.filter(status='booked').count()
+        finally:
+            show.delete()
+            movie.delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+        return booked, elapsed, statuses
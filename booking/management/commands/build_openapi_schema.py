@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI schema once and write it to OPENAPI_SCHEMA_FILE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=None,
+            help='File to write (defaults to OPENAPI_SCHEMA_FILE)'
+        )
+
+    def handle(self, *args, **options):
+        from booking.schema import write_schema
+
+        output = options['output'] or getattr(settings, 'OPENAPI_SCHEMA_FILE', '')
+        if not output:
+            raise CommandError('Set OPENAPI_SCHEMA_FILE or pass --output')
+
+        self.stdout.write('Generating OpenAPI schema...')
+        schema = write_schema(output)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {len(schema.body)} bytes to {output} (ETag {schema.etag})'
+            )
+        )
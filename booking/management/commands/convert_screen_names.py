@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils.text import slugify
+from booking.models import Show, Venue, Screen
+
+
+class Command(BaseCommand):
+    help = 'Assign shows without a venue to Screen rows created from their screen_name values'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venue', required=True, help='Name of the venue the shows belong to')
+        parser.add_argument('--slug', help='Venue slug (defaults to the slugified name)')
+        parser.add_argument('--city', default='', help='City of a newly created venue')
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Report what would change without writing'
+        )
+
+    def handle(self, *args, **options):
+        slug = options['slug'] or slugify(options['venue'])
+        if not slug:
+            raise CommandError('A venue slug is required')
+
+        unassigned = Show.objects.filter(venue__isnull=True)
+        names = sorted(set(unassigned.values_list('screen_name', flat=True)))
+        if not names:
+            self.stdout.write('No shows need converting')
+            return
+
+        if options['dry_run']:
+            counts = dict(
+                unassigned.values('screen_name').annotate(count=Count('id'))
+                .values_list('screen_name', 'count')
+            )
+            for name in names:
+                self.stdout.write(f'{name}: {counts[name]} shows')
+            return
+
+        with transaction.atomic():
+            venue, created = Venue.objects.get_or_create(
+                slug=slug, defaults={'name': options['venue'], 'city': options['city']}
+            )
+            Screen.objects.bulk_create(
+                [Screen(venue=venue, name=name) for name in names], ignore_conflicts=True
+            )
+            screen_ids = dict(
+                Screen.objects.filter(venue=venue, name__in=names).values_list('name', 'id')
+            )
+            # One UPDATE per distinct screen name rather than one per show
+            converted = 0
+            for name in names:
+                converted += unassigned.filter(screen_name=name).update(
+                    venue=venue, screen_id=screen_ids[name]
+                )
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('Conversion complete!'))
+        self.stdout.write(f'Venue: {venue.name} ({"created" if created else "existing"})')
+        self.stdout.write(f'Screens: {len(names)}')
+        self.stdout.write(f'Shows converted: {converted}')
+        self.stdout.write('='*50)
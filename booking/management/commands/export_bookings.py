@@ -0,0 +1,49 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from booking.db_routers import choose_replica
+from booking.export import EXPORT_FORMATS, export_rows, iter_export, iter_gzip
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings created in a date range to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='First booking date (YYYY-MM-DD)')
+        parser.add_argument('--end', required=True, help='Last booking date (YYYY-MM-DD)')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--status', choices=['booked', 'cancelled'], default=None)
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('--output', default='-', help='Output file ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start'])
+            end = date.fromisoformat(options['end'])
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        if end < start:
+            raise CommandError('--end must not be before --start')
+
+        rows = export_rows(start, end, options['status'], using=choose_replica())
+        chunks = iter_export(rows, options['export_format'])
+        to_stdout = options['output'] == '-'
+
+        if options['gzip']:
+            out = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+            chunks = iter_gzip(chunks)
+        else:
+            out = self.stdout if to_stdout else open(options['output'], 'w', encoding='utf-8', newline='')
+
+        try:
+            for chunk in chunks:
+                if out is self.stdout:
+                    self.stdout.write(chunk, ending='')
+                else:
+                    out.write(chunk)
+        finally:
+            if not to_stdout:
+                out.close()
+
+        if not to_stdout:
+            self.stderr.write(self.style.SUCCESS(f'Exported bookings to {options["output"]}'))
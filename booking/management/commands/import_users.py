@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from booking.accounts import UserImportError
+from booking.serializers import BulkUserRegistrationSerializer
+import csv
+import time
+
+IMPORT_COLUMNS = ['username', 'email', 'first_name', 'last_name', 'password']
+
+
+class Command(BaseCommand):
+    help = 'Create user accounts from a CSV file (username, email, first_name, last_name, password)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV file with a header row')
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Validate the file without creating users'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='') as handle:
+                reader = csv.DictReader(handle)
+                missing = {'username', 'password'} - set(reader.fieldnames or [])
+                if missing:
+                    raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+                rows = [
+                    {column: row[column] for column in IMPORT_COLUMNS if row.get(column)}
+                    for row in reader
+                ]
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["csv_file"]}: {e}')
+        if not rows:
+            raise CommandError('The file has no users')
+
+        started = time.monotonic()
+        serializer = BulkUserRegistrationSerializer(
+            data={'users': rows}, context={'max_users': len(rows)}
+        )
+        if not serializer.is_valid():
+            for message in self.format_errors(serializer.errors['users']):
+                self.stderr.write(message)
+            raise CommandError('No users were created')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{len(rows)} users are valid'))
+            return
+
+        try:
+            users = serializer.save()
+        except UserImportError as e:
+            raise CommandError(str(e))
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('Import complete!'))
+        self.stdout.write(f'Users created: {len(users)}')
+        self.stdout.write(f'Time: {time.monotonic() - started:.2f}s')
+
+    def format_errors(self, errors):
+        """Flatten batch-level messages and per-row field errors into lines"""
+        for position, error in enumerate(errors, 1):
+            if isinstance(error, dict):
+                for field, messages in error.items():
+                    yield f'Row {position}: {field}: {" ".join(messages)}'
+            elif error:
+                yield str(error)
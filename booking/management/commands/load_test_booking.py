@@ -0,0 +1,100 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from booking.models import Movie, Show
+import logging
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Flood the booking endpoint for one show and report throughput under overload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--duration', type=int, default=10, help='Test duration in seconds')
+        parser.add_argument('--seats', type=int, default=500, help='Seats in the test show')
+
+    def handle(self, *args, **options):
+        clients = options['clients']
+        duration = options['duration']
+
+        self.stdout.write(f'Setting up show with {options["seats"]} seats and {clients} clients...')
+        movie = Movie.objects.create(title='Load Test Premiere', duration_minutes=120)
+        show = Show.objects.create(
+            movie=movie,
+            screen_name=f'Load Test {time.time_ns()}',
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=options['seats']
+        )
+        users = [
+            User.objects.create_user(username=f'loadtest_{show.id}_{i}')
+            for i in range(clients)
+        ]
+        tokens = [str(RefreshToken.for_user(user).access_token) for user in users]
+        url = reverse('book-seat', kwargs={'show_id': show.id})
+        # Rejections are expected here; don't log a warning for each one
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        deadline = time.monotonic() + duration
+        started = time.monotonic()
+
+        def worker(token):
+            client = Client()
+            results = []
+            try:
+                while time.monotonic() < deadline:
+                    request_start = time.monotonic()
+                    response = client.post(
+                        url,
+                        {'seat_number': random.randint(1, show.total_seats)},
+                        content_type='application/json',
+                        HTTP_AUTHORIZATION=f'Bearer {token}'
+                    )
+                    results.append((
+                        int(request_start - started),
+                        response.status_code,
+                        time.monotonic() - request_start
+                    ))
+            finally:
+                close_old_connections()
+            return results
+
+        try:
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                results = [r for batch in executor.map(worker, tokens) for r in batch]
+        finally:
+            show.delete()
+            movie.delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+        per_second = defaultdict(Counter)
+        for second, status_code, _ in results:
+            per_second[second][status_code] += 1
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('second  total  201  400  429  503')
+        for second in sorted(per_second):
+            counts = per_second[second]
+            self.stdout.write(
+                f'{second:>6}  {sum(counts.values()):>5}  {counts[201]:>3}  {counts[400]:>3}  '
+                f'{counts[429]:>3}  {counts[503]:>3}'
+            )
+
+        latencies = sorted(latency for _, _, latency in results)
+        totals = Counter(status_code for _, status_code, _ in results)
+        self.stdout.write('='*50)
+        self.stdout.write(f'Requests: {len(results)} ({len(results) / duration:.1f}/s)')
+        self.stdout.write(f'Status codes: {dict(sorted(totals.items()))}')
+        if latencies:
+            self.stdout.write(
+                f'Latency p50: {latencies[len(latencies) // 2] * 1000:.1f}ms, '
+                f'p99: {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms'
+            )
+        self.stdout.write(self.style.SUCCESS('Load test completed!'))
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from booking.models import Movie, Show
+from booking.models import Movie, Show, Venue, Screen
 from datetime import datetime, timedelta
 import random
 
@@ -30,8 +30,16 @@ class Command(BaseCommand):
                 movies.append(movie)
                 self.stdout.write(f'Created movie: {movie.title}')
         
+        # Create a sample venue and its screens
+        venue, _ = Venue.objects.get_or_create(
+            slug='downtown', defaults={'name': 'Downtown Cinema', 'city': 'Springfield'}
+        )
+        screens = [
+            Screen.objects.get_or_create(venue=venue, name=name)[0]
+            for name in ['Screen A', 'Screen B', 'Screen C', 'IMAX 1', 'IMAX 2']
+        ]
+        
         # Create sample shows
-        screens = ['Screen A', 'Screen B', 'Screen C', 'IMAX 1', 'IMAX 2']
         base_date = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
         
         shows_created = 0
@@ -43,7 +51,7 @@ class Command(BaseCommand):
                 
                 show, created = Show.objects.get_or_create(
                     movie=movie,
-                    screen_name=screen,
+                    screen=screen,
                     date_time=show_date,
                     defaults={'total_seats': total_seats}
                 )
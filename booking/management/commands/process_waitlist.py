@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from booking.waitlist import WaitlistService
+
+
+class Command(BaseCommand):
+    help = 'Expire lapsed waitlist holds and offer their seats to the next waiting user'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Processing waitlist holds...')
+        
+        expired_count = WaitlistService.expire_holds()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Expired {expired_count} waitlist holds')
+        )
@@ -0,0 +1,35 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from booking.profiling import PROFILE_MODES, ProfileRun
+import argparse
+
+
+class Command(BaseCommand):
+    help = 'Run another management command under the profiler and write its profile and SQL log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('command_name', help='Command to profile, e.g. send_reminder_emails')
+        parser.add_argument(
+            'command_args', nargs=argparse.REMAINDER,
+            help='Arguments passed to the profiled command'
+        )
+        parser.add_argument(
+            '--mode', choices=PROFILE_MODES, default=None,
+            help='Sampling (collapsed stacks) or cProfile (default PROFILING_MODE)'
+        )
+        parser.add_argument('--output-dir', default=None, help='Directory for profile runs')
+
+    def handle(self, *args, **options):
+        name = options['command_name']
+        with ProfileRun(f'command {name}', options['mode'], options['output_dir']) as run:
+            call_command(name, *options['command_args'], stdout=self.stdout, stderr=self.stderr)
+
+        queries = run.queries
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'Profile written to {run.path}'))
+        self.stdout.write(f'Mode: {run.mode}')
+        self.stdout.write(f'Duration: {run.duration * 1000:.1f}ms')
+        self.stdout.write(
+            f"Queries: {len(queries)} ({sum(query['time_ms'] for query in queries):.1f}ms)"
+        )
+        self.stdout.write('='*50)
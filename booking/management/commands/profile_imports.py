@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import os
+import subprocess
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Report the slowest imports when starting Django and loading a module (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', default=None,
+            help='Module imported after django.setup() (defaults to ROOT_URLCONF)'
+        )
+        parser.add_argument('--top', type=int, default=15, help='Number of modules to list')
+
+    def handle(self, *args, **options):
+        module = options['module'] or settings.ROOT_URLCONF
+        code = f'import django; django.setup(); import {module}'
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'movie_booking.settings'
+        ))
+
+        self.stdout.write(f'Profiling imports for django.setup() + {module}...')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            errors = [
+                line for line in result.stderr.splitlines() if not line.startswith('import time:')
+            ]
+            self.stdout.write(self.style.ERROR(errors[-1] if errors else 'Import failed'))
+            return
+
+        timings = self.parse(result.stderr)
+        top = options['top']
+        total = sum(self_us for _, self_us, _ in timings)
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Total import time: {total / 1000:.1f}ms ({len(timings)} modules)')
+        self.stdout.write('\nSlowest by cumulative time:')
+        for name, _, cumulative_us in sorted(timings, key=lambda t: t[2], reverse=True)[:top]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f}ms  {name}')
+        self.stdout.write('\nSlowest by self time:')
+        for name, self_us, _ in sorted(timings, key=lambda t: t[1], reverse=True)[:top]:
+            self.stdout.write(f'  {self_us / 1000:8.1f}ms  {name}')
+        self.stdout.write('='*50)
+
+    @staticmethod
+    def parse(output):
+        """Parse `import time: self | cumulative | name` lines"""
+        timings = []
+        for line in output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue
+            timings.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+        return timings
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from booking.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per batch')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Purging expired idempotency keys...')
+        
+        deleted = purge_expired_keys(options['batch_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys')
+        )
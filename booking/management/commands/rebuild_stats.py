@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from booking.analytics import StatsService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-show and per-movie-per-day analytics rollups from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per batch')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding analytics rollups...')
+
+        shows, days = StatsService.rebuild(options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt stats for {shows} shows and {days} movie days')
+        )
@@ -0,0 +1,64 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from booking.db_routers import booking_aliases
+from booking.events import PROJECTIONS, SeatMapProjection
+from booking.models import Booking
+import json
+
+
+class Command(BaseCommand):
+    help = 'Rebuild a projection by replaying the booking event log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projection', choices=list(PROJECTIONS), default='seat-map')
+        parser.add_argument('--show', type=int, default=None, help='Replay a single show')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Events read per query')
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Compare the replayed seat map with the bookings table'
+        )
+
+    def handle(self, *args, **options):
+        projection = PROJECTIONS[options['projection']]()
+        self.stdout.write(f'Replaying booking events into {projection.name}...')
+        projection.replay(show_id=options['show'], batch_size=options['batch_size'])
+        self.stdout.write(f'Replayed up to event #{projection.position}')
+
+        if options['show'] is not None:
+            self.stdout.write(json.dumps(projection.snapshot(options['show'])))
+
+        if options['verify']:
+            self.verify(options['show'], options['batch_size'])
+
+    def verify(self, show_id, batch_size):
+        """Report shows whose replayed booked seats differ from live bookings"""
+        projection = SeatMapProjection().replay(show_id=show_id, batch_size=batch_size)
+        live = defaultdict(set)
+        bookings = Booking.objects.filter(status='booked')
+        if show_id is not None:
+            bookings = bookings.filter(show_id=show_id)
+        for alias in booking_aliases():
+            for booked_show_id, seat_number in bookings.using(alias).values_list(
+                'show_id', 'seat_number'
+            ).iterator():
+                live[booked_show_id].add(seat_number)
+
+        # Shows with no live bookings left (archived) are not compared
+        mismatched = [
+            live_show_id for live_show_id, seats in live.items()
+            if projection.booked.get(live_show_id, set()) != seats
+        ]
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Shows checked: {len(live)}')
+        self.stdout.write(f'Shows differing from the event log: {len(mismatched)}')
+        self.stdout.write('='*50)
+        if mismatched:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Mismatched shows: {sorted(mismatched)[:20]} '
+                    '(bookings made before the event log existed are not in it)'
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS('Event log matches the bookings table'))
@@ -1,5 +1,8 @@
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from booking.db_routers import shard_aliases
 from booking.email_service import EmailService
+from booking.reminders import ReminderScheduler
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,8 +11,30 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Send reminder emails for bookings 24 hours before show time'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuous', action='store_true',
+            help='Run as a scheduler, sending reminders for a sliding window ahead of now'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the sliding window a single time (for frequent cron runs)'
+        )
+        parser.add_argument(
+            '--interval', type=int, default=None,
+            help='Seconds between scheduler ticks (default REMINDER_INTERVAL_SECONDS)'
+        )
+        parser.add_argument(
+            '--rate', type=float, default=None,
+            help='Maximum emails per second (default REMINDER_SEND_RATE, 0 for unlimited)'
+        )
+
     def handle(self, *args, **options):
         """Send reminder emails to users with bookings tomorrow"""
+        if options['continuous'] or options['once']:
+            return self.handle_windowed(options)
+        if shard_aliases():
+            raise CommandError('Bookings are sharded; use --once or --continuous')
         
         self.stdout.write('Starting reminder email process...')
         
@@ -54,4 +79,24 @@ class Command(BaseCommand):
         else:
             self.stdout.write(
                 self.style.SUCCESS('All reminder emails sent successfully!')
-            )
\ No newline at end of file
+            )
+
+    def handle_windowed(self, options):
+        """Send reminders for the sliding window using the stored high-water mark"""
+        scheduler = ReminderScheduler(send_rate=options['rate'], stdout=self.stdout)
+        if options['once']:
+            sent, failed = scheduler.tick()
+            self.stdout.write(
+                self.style.SUCCESS(f'Window processed: {sent} sent, {failed} failed')
+            )
+            return
+
+        interval = options['interval'] or getattr(settings, 'REMINDER_INTERVAL_SECONDS', 60)
+        self.stdout.write(
+            f'Reminder scheduler running every {interval}s, '
+            f'{scheduler.lead} ahead, up to {scheduler.send_rate} emails/s'
+        )
+        try:
+            scheduler.run(interval)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Reminder scheduler stopped'))
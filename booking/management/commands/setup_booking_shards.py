@@ -0,0 +1,22 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from booking.db_routers import shard_aliases, shard_id_floor
+from booking.sharding import prepare_shard
+
+
+class Command(BaseCommand):
+    help = 'Create the booking table on every configured shard and reserve its id range'
+
+    def handle(self, *args, **options):
+        shards = shard_aliases()
+        if not shards:
+            raise CommandError('No booking shards configured (set BOOKING_SHARD_DATABASES)')
+
+        for alias in shards:
+            try:
+                prepare_shard(alias)
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'{alias}: booking ids from {shard_id_floor(alias) + 1}')
+
+        self.stdout.write(self.style.SUCCESS(f'Prepared {len(shards)} booking shards'))
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 
 class Movie(models.Model):
@@ -18,25 +20,213 @@ class Movie(models.Model):
     def __str__(self):
         return f"{self.title} ({self.duration_minutes} mins)"
 
+    def save(self, *args, **kwargs):
+        from .versions import BookingVersion
+
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Booking listings show the movie; clients must refetch them
+            BookingVersion.shows_changed(self.shows.values_list('id', flat=True))
+
+
+class ScreenLayout(models.Model):
+    """Reusable seat layout (rows, sections, price tiers, aisles) for a screen"""
+    name = models.CharField(max_length=100, unique=True)
+    rows = models.JSONField(
+        help_text='List of rows: {"label", "seats", "section", "tier", "aisles_after"}'
+    )
+    compiled = models.JSONField(default=dict, editable=False)
+    total_seats = models.PositiveIntegerField(default=0, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.total_seats} seats)"
+
+    def clean(self):
+        """Validate the row definition and precompute the compiled layout"""
+        from django.core.exceptions import ValidationError
+        from .layouts import compile_layout
+
+        self.compiled = compile_layout(self.rows)
+        self.total_seats = self.compiled['total_seats']
+        if self.pk and self.shows.exclude(total_seats=self.total_seats).exists():
+            raise ValidationError(
+                f'Shows using this layout have a different seat count than {self.total_seats}; '
+                f'create a new layout instead'
+            )
+
+    def save(self, *args, **kwargs):
+        from .layouts import LayoutCache
+        from .seating import SeatIndex
+
+        self.full_clean()
+        adding = self._state.adding
+        # Incremented in the database so concurrent saves can't lose a version
+        self.version = 1 if adding else models.F('version') + 1
+        super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=['version'])
+            # Row ends and aisles may have moved; drop the shows' seat indexes
+            show_ids = list(self.shows.values_list('id', flat=True))
+            transaction.on_commit(lambda: SeatIndex.invalidate_many(show_ids))
+        # Publish the compiled layout only once the new version is visible
+        transaction.on_commit(lambda: LayoutCache.store(self))
+
+
+class Venue(models.Model):
+    """A cinema; every screen and show belongs to one venue"""
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=100, unique=True)
+    city = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Screen(models.Model):
+    """A named auditorium within a venue"""
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='screens')
+    name = models.CharField(max_length=100)
+    layout = models.ForeignKey(
+        ScreenLayout, on_delete=models.PROTECT, related_name='screens', null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['venue', 'name']
+        unique_together = ['venue', 'name']
+
+    def __str__(self):
+        return f"{self.venue.name} - {self.name}"
+
+    def clean(self):
+        """Validate the layout against the seat counts of the screen's shows"""
+        from django.core.exceptions import ValidationError
+
+        if self.pk and self.layout_id and self.shows.exclude(
+            total_seats=self.layout.total_seats
+        ).exists():
+            raise ValidationError(
+                f'Shows on this screen have a different seat count than the layout '
+                f'({self.layout.total_seats})'
+            )
+
+    def save(self, *args, **kwargs):
+        from .seating import SeatIndex
+        from .versions import BookingVersion
+
+        self.full_clean()
+        super().save(*args, **kwargs)
+        # Shows keep a copy of the screen's venue and name for flat listings and history
+        moved = list(
+            self.shows.exclude(venue_id=self.venue_id, screen_name=self.name)
+            .values_list('id', flat=True)
+        )
+        if moved:
+            Show.objects.filter(id__in=moved).update(venue_id=self.venue_id, screen_name=self.name)
+            BookingVersion.shows_changed(moved)
+        if self.layout_id:
+            show_ids = list(
+                self.shows.exclude(layout_id=self.layout_id).values_list('id', flat=True)
+            )
+            if show_ids:
+                Show.objects.filter(id__in=show_ids).update(layout_id=self.layout_id)
+                transaction.on_commit(lambda: SeatIndex.invalidate_many(show_ids))
+
 
 class Show(models.Model):
     """Show model linking movies to specific screenings"""
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='shows')
+    # Denormalized from the screen so venue-scoped queries need no join
+    venue = models.ForeignKey(
+        Venue, on_delete=models.PROTECT, related_name='shows', null=True, blank=True
+    )
+    screen = models.ForeignKey(
+        Screen, on_delete=models.PROTECT, related_name='shows', null=True, blank=True
+    )
     screen_name = models.CharField(max_length=100)
     date_time = models.DateTimeField()
     total_seats = models.PositiveIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(500)]
     )
+    layout = models.ForeignKey(
+        ScreenLayout, on_delete=models.PROTECT, related_name='shows', null=True, blank=True
+    )
+    base_price = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    # {"tiers": {"premium": 1.5}, "surge": [{"occupancy": 0.8, "multiplier": 1.2}]}
+    pricing_rules = models.JSONField(default=dict, blank=True)
+    # Serve bookings from an in-memory seat map (see booking.hotshow)
+    hot_mode = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['date_time']
-        unique_together = ['screen_name', 'date_time']
+        constraints = [
+            # Screen names only need to be unique within a venue; the index
+            # behind this constraint also serves per-screen schedules
+            models.UniqueConstraint(
+                fields=['venue', 'screen_name', 'date_time'], name='unique_venue_screen_slot'
+            ),
+            # Shows not yet assigned to a venue (see convert_screen_names)
+            models.UniqueConstraint(
+                fields=['screen_name', 'date_time'],
+                condition=models.Q(venue__isnull=True),
+                name='unique_unassigned_screen_slot'
+            ),
+        ]
+        indexes = [
+            # Range scans by show time (reminder window, listings by date)
+            models.Index(fields=['date_time']),
+            # Venue-scoped listings, by time and by movie
+            models.Index(fields=['venue', 'date_time']),
+            models.Index(fields=['venue', 'movie', 'date_time']),
+        ]
 
     def __str__(self):
         return f"{self.movie.title} - {self.screen_name} at {self.date_time}"
 
+    def clean(self):
+        """Validate the seat count against the screen layout, and the pricing rules"""
+        from django.core.exceptions import ValidationError
+        from .pricing import validate_pricing_rules
+
+        if self.layout_id and self.layout.total_seats != self.total_seats:
+            raise ValidationError(
+                f'Total seats ({self.total_seats}) must match the layout ({self.layout.total_seats})'
+            )
+        validate_pricing_rules(self.pricing_rules)
+
+    def save(self, *args, **kwargs):
+        if self.screen_id:
+            self.venue_id = self.screen.venue_id
+            self.screen_name = self.screen.name
+            # Screens created by convert_screen_names have no layout yet; their
+            # shows keep their own until one is assigned
+            if self.screen.layout_id:
+                self.layout_id = self.screen.layout_id
+        from .versions import BookingVersion
+
+        # Enforces clean(): the seat count must match the layout
+        self.full_clean()
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Booking listings show the time and screen; clients must refetch them
+            BookingVersion.shows_changed([self.id])
+
     @property
     def available_seats(self):
         """Calculate available seats for this show"""
@@ -58,18 +248,40 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
-    show = models.ForeignKey(Show, on_delete=models.CASCADE, related_name='bookings')
+    # No database-level constraints: with BOOKING_SHARDS configured, bookings
+    # live in a different database from their users and shows
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='bookings', db_constraint=False
+    )
+    show = models.ForeignKey(
+        Show, on_delete=models.CASCADE, related_name='bookings', db_constraint=False
+    )
     seat_number = models.PositiveIntegerField(
         validators=[MinValueValidator(1)]
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='booked')
+    # Price locked in when the seat was booked
+    price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    # Set once the reminder scheduler has attempted this booking's reminder
+    reminded_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
-        unique_together = ['show', 'seat_number', 'status']
+        constraints = [
+            # A seat can be booked once at a time, but cancelled any number
+            # of times (e.g. cancelled again after a waitlist re-booking)
+            models.UniqueConstraint(
+                fields=['show', 'seat_number'],
+                condition=models.Q(status='booked'),
+                name='unique_booked_seat'
+            ),
+        ]
+        indexes = [
+            # Delta sync: a user's bookings changed since a timestamp
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.show} - Seat {self.seat_number} ({self.status})"
@@ -98,5 +310,227 @@ class Booking(models.Model):
                 )
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        from .db_routers import booking_shard
+
+        # Validation queries run against the show's shard
+        with booking_shard(self.show_id):
+            self.full_clean()
+            super().save(*args, **kwargs)
+
+
+class WaitlistEntry(models.Model):
+    """Position in a sold-out show's FIFO waitlist"""
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('offered', 'Offered'),
+        ('accepted', 'Accepted'),
+        ('expired', 'Expired'),
+        ('left', 'Left'),
+    ]
+    ACTIVE_STATUSES = ['waiting', 'offered']
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries')
+    show = models.ForeignKey(Show, on_delete=models.CASCADE, related_name='waitlist_entries')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='waiting')
+    offered_seat = models.PositiveIntegerField(null=True, blank=True)
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            # One active entry per user and show, even under concurrent joins
+            models.UniqueConstraint(
+                fields=['show', 'user'],
+                condition=models.Q(status__in=['waiting', 'offered']),
+                name='unique_active_waitlist_entry'
+            ),
+        ]
+        indexes = [
+            # Next waiter and active holds are found by (show, status) in id order
+            models.Index(fields=['show', 'status', 'id']),
+            models.Index(fields=['status', 'hold_expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.show} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied Idempotency-Key"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    # Null while the first request with the key is still running
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ['user', 'key']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
+
+
+class ArchivedBooking(models.Model):
+    """Booking moved out of the hot table by the archive_bookings command.
+
+    Show and movie details are denormalized so history can be read without
+    joining the live tables.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    show_id = models.BigIntegerField()
+    movie_title = models.CharField(max_length=200)
+    venue_name = models.CharField(max_length=200, null=True, blank=True)
+    screen_name = models.CharField(max_length=100)
+    show_date_time = models.DateTimeField()
+    total_seats = models.PositiveIntegerField()
+    seat_number = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=Booking.STATUS_CHOICES)
+    price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.movie_title} - Seat {self.seat_number} ({self.status})"
+
+
+class BookingTombstone(models.Model):
+    """Id of a booking archived to a file rather than to ArchivedBooking.
+
+    Lets /my-bookings/?since= report it in removed_ids.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='booking_tombstones')
+    removed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'removed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.id}"
+
+
+class UserBookingsVersion(models.Model):
+    """When a user's bookings last changed; backs the /my-bookings/ ETag"""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='bookings_version'
+    )
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.version}"
+
+
+class ShowStats(models.Model):
+    """Running seat counts for a show, kept up to date by StatsService"""
+    show = models.OneToOneField(Show, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='show_stats')
+    date = models.DateField()
+    capacity = models.PositiveIntegerField(default=0)
+    booked_seats = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'show stats'
+
+    def __str__(self):
+        return f"Show {self.show_id}: {self.booked_seats}/{self.capacity}"
+
+
+class MovieDailyStats(models.Model):
+    """Seat counts for all of a movie's shows on one day"""
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    shows = models.IntegerField(default=0)
+    capacity = models.IntegerField(default=0)
+    booked_seats = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['movie', 'date']
+        verbose_name_plural = 'movie daily stats'
+
+    def __str__(self):
+        return f"{self.movie_id} on {self.date}: {self.booked_seats}/{self.capacity}"
+
+
+class ReminderCursor(models.Model):
+    """High-water mark of show times the reminder scheduler has processed.
+
+    The lease fields let only one scheduler work on the cursor at a time.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField()
+    lease_owner = models.CharField(max_length=32, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
+
+
+class BookingEvent(models.Model):
+    """Append-only record of a seat state change; the id is the sequence number.
+
+    Show, booking and user are plain ids rather than foreign keys so the log
+    outlives archiving and deletes.
+    """
+    EVENT_TYPES = [
+        ('booked', 'Booked'),
+        ('cancelled', 'Cancelled'),
+        ('hold_offered', 'Hold offered'),
+        ('hold_accepted', 'Hold accepted'),
+        ('hold_released', 'Hold released'),
+        ('hold_expired', 'Hold expired'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    show_id = models.BigIntegerField()
+    seat_number = models.PositiveIntegerField()
+    booking_id = models.BigIntegerField(null=True, blank=True)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Replaying one show's history
+            models.Index(fields=['show_id', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type} show {self.show_id} seat {self.seat_number}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Booking events are append-only')
+        super().save(*args, **kwargs)
+
+
+class EventConsumerOffset(models.Model):
+    """Last BookingEvent sequence number a named consumer has processed"""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
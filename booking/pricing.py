@@ -0,0 +1,161 @@
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from .layouts import LayoutCache
+from .seating import SeatIndex
+import json
+
+PRICE_TABLE_CACHE_KEY = 'price-table:{show_id}:{level}'
+
+CENT = Decimal('0.01')
+
+
+def is_number(value):
+    # JSON true/false load as bools, which are ints to isinstance
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_pricing_rules(rules):
+    """Validate Show.pricing_rules.
+
+    ``tiers`` maps layout tier names to price multipliers and ``surge`` is a
+    list of ``{"occupancy": 0..1, "multiplier": x}`` steps applied once the
+    show's occupancy reaches each threshold.
+    """
+    if not isinstance(rules, dict):
+        raise ValidationError('Pricing rules must be an object')
+    unknown = set(rules) - {'tiers', 'surge'}
+    if unknown:
+        raise ValidationError(f"Unknown pricing rule keys: {', '.join(sorted(unknown))}")
+
+    tiers = rules.get('tiers', {})
+    if not isinstance(tiers, dict) or any(
+        not is_number(value) or value <= 0 for value in tiers.values()
+    ):
+        raise ValidationError('Tier multipliers must be positive numbers')
+
+    surge = rules.get('surge', [])
+    if not isinstance(surge, list):
+        raise ValidationError('Surge rules must be a list')
+    thresholds = []
+    for step in surge:
+        if not isinstance(step, dict) or set(step) != {'occupancy', 'multiplier'}:
+            raise ValidationError('Each surge rule needs an occupancy and a multiplier')
+        if not is_number(step['occupancy']) or not is_number(step['multiplier']):
+            raise ValidationError('Surge occupancy and multiplier must be numbers')
+        if not 0 < step['occupancy'] <= 1 or step['multiplier'] <= 0:
+            raise ValidationError('Surge occupancy must be in (0, 1] and multipliers positive')
+        thresholds.append(step['occupancy'])
+    if thresholds != sorted(set(thresholds)):
+        raise ValidationError('Surge thresholds must be strictly increasing')
+
+
+def surge_thresholds(show):
+    return [step['occupancy'] for step in (show.pricing_rules or {}).get('surge', [])]
+
+
+def surge_level(show, occupied):
+    """Number of surge thresholds reached with `occupied` seats taken"""
+    occupancy = occupied / show.total_seats if show.total_seats else 0
+    return bisect_right(surge_thresholds(show), occupancy)
+
+
+def round_price(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class PriceTable:
+    """Seat prices for a show at one surge level"""
+
+    def __init__(self, level, multiplier, tier_prices, prices):
+        self.level = level
+        self.multiplier = multiplier
+        self.tier_prices = tier_prices
+        # Indexed by seat number; index 0 is unused
+        self.prices = prices
+
+    def price(self, seat_number):
+        return self.prices[seat_number]
+
+    def to_representation(self):
+        return {
+            'surge_level': self.level,
+            'surge_multiplier': str(self.multiplier),
+            'tier_prices': {tier: str(price) for tier, price in self.tier_prices.items()},
+            'seat_prices': [str(price) for price in self.prices[1:]],
+        }
+
+
+class PricingService:
+    """Cached per-show price tables keyed by surge level.
+
+    A table only changes when occupancy crosses a surge threshold, so each
+    level's table is computed once and reused; lookups read the table, the
+    seat index and the layout from the cache without touching the database.
+    """
+
+    @staticmethod
+    def cache_key(show_id, level):
+        return PRICE_TABLE_CACHE_KEY.format(show_id=show_id, level=level)
+
+    @staticmethod
+    def signature(show, layout_version):
+        # Editing the price, rules or layout changes the signature, which
+        # makes cached tables for the show stale
+        return json.dumps(
+            [str(show.base_price), show.pricing_rules or {}, show.layout_id, layout_version,
+             show.total_seats],
+            sort_keys=True
+        )
+
+    @staticmethod
+    def build(show, level, layout):
+        rules = show.pricing_rules or {}
+        surge = rules.get('surge', [])
+        multiplier = Decimal(str(surge[level - 1]['multiplier'])) if level else Decimal('1')
+        tier_multipliers = rules.get('tiers', {})
+        base = Decimal(show.base_price) * multiplier
+
+        def tier_price(tier):
+            return round_price(base * Decimal(str(tier_multipliers.get(tier, 1))))
+
+        if layout is None:
+            tier_prices = {'standard': tier_price('standard')}
+            prices = [None] + [tier_prices['standard']] * show.total_seats
+        else:
+            tier_prices = {tier: tier_price(tier) for tier in layout['tiers']}
+            prices = [None]
+            for _, _, count, _, tier_index, _ in layout['rows']:
+                prices.extend([tier_prices[layout['tiers'][tier_index]]] * count)
+        return PriceTable(level, multiplier, tier_prices, prices)
+
+    @staticmethod
+    def table(show, occupied=None):
+        """Return the PriceTable for the show's current occupancy.
+
+        Pass `occupied` when the caller already knows it (e.g. from a loaded
+        seat index); otherwise it comes from the cached seat index.
+        """
+        if occupied is None:
+            occupied = show.total_seats - SeatIndex.load(show).free_count
+        level = surge_level(show, occupied)
+
+        layout_version, layout = None, None
+        if show.layout_id:
+            layout_version, layout, _ = LayoutCache.get(show.layout_id)
+        signature = PricingService.signature(show, layout_version)
+
+        key = PricingService.cache_key(show.id, level)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        table = PricingService.build(show, level, layout)
+        cache.set(key, (signature, table), getattr(settings, 'PRICE_TABLE_TIMEOUT', 3600))
+        return table
+
+    @staticmethod
+    def price_for(show, seat_number, occupied=None):
+        return PricingService.table(show, occupied).price(seat_number)
@@ -0,0 +1,233 @@
+"""On-demand profiling for single requests and management command runs.
+
+A run wraps the work in cProfile or a sampling profiler and writes, into its
+own directory under PROFILING_DIR:
+
+- ``stacks.folded``: collapsed stacks for flamegraph.pl, speedscope or
+  inferno (sampling mode)
+- ``profile.prof`` and ``profile.txt``: pstats dump and top functions by
+  cumulative time (cProfile mode)
+- ``queries.json``: every SQL statement run, with its database and duration
+- ``summary.json``: what was profiled, how long it took and query totals
+"""
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from django.utils.text import slugify
+from pathlib import Path
+import cProfile
+import io
+import json
+import logging
+import pstats
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('sample', 'cprofile')
+
+PROFILE_HEADER = 'X-Profile'
+
+
+def default_mode():
+    return getattr(settings, 'PROFILING_MODE', 'sample')
+
+
+class QueryLog:
+    """Database execute wrapper recording each statement and its duration"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'database': self.alias,
+                'sql': sql,
+                'many': many,
+                'time_ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer and counts collapsed stacks"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    @staticmethod
+    def frame_name(frame):
+        code = frame.f_code
+        return f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})'
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self.frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        """Collapsed stack lines: `outer;inner;leaf count`"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfileRun:
+    """Profile the enclosed block and write its artifacts on exit"""
+
+    def __init__(self, label, mode=None, output_dir=None):
+        self.label = label
+        self.mode = mode or default_mode()
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode '{self.mode}'")
+        self.run_id = f'{timezone.now():%Y%m%d-%H%M%S}-{slugify(label)[:40]}-{uuid.uuid4().hex[:6]}'
+        self.path = Path(output_dir or settings.PROFILING_DIR) / self.run_id
+        self.status = None
+        self._stack = ExitStack()
+        self._logs = []
+        self._profiler = None
+        self._sampler = None
+
+    def __enter__(self):
+        for connection in connections.all():
+            log = QueryLog(connection.alias)
+            self._logs.append(log)
+            self._stack.enter_context(connection.execute_wrapper(log))
+
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+        else:
+            self._sampler = StackSampler(
+                threading.get_ident(), getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005)
+            )
+            self._sampler.start()
+        self._started = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is not None:
+            self._profiler.disable()
+        self.duration = time.perf_counter() - self._started
+        if self._sampler is not None:
+            self._sampler.stop()
+        self._stack.close()
+
+        try:
+            self.write()
+        except OSError as e:
+            logger.error(f"Failed to write profile {self.run_id}: {str(e)}")
+        return False
+
+    @property
+    def queries(self):
+        return [query for log in self._logs for query in log.queries]
+
+    def write(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        queries = self.queries
+
+        if self._profiler is not None:
+            self._profiler.dump_stats(self.path / 'profile.prof')
+            report = io.StringIO()
+            pstats.Stats(self._profiler, stream=report).sort_stats('cumulative').print_stats(50)
+            (self.path / 'profile.txt').write_text(report.getvalue())
+        else:
+            (self.path / 'stacks.folded').write_text(self._sampler.folded())
+
+        (self.path / 'queries.json').write_text(json.dumps(queries, indent=2))
+        (self.path / 'summary.json').write_text(json.dumps({
+            'id': self.run_id,
+            'label': self.label,
+            'mode': self.mode,
+            'status': self.status,
+            'duration_ms': round(self.duration * 1000, 3),
+            'query_count': len(queries),
+            'query_time_ms': round(sum(query['time_ms'] for query in queries), 3),
+        }, indent=2))
+        logger.info(f"Profile {self.run_id} written to {self.path}")
+        prune_profiles(self.path.parent)
+
+
+def prune_profiles(directory):
+    """Delete the oldest runs beyond PROFILING_MAX_RUNS"""
+    keep = getattr(settings, 'PROFILING_MAX_RUNS', 100)
+    runs = sorted(path for path in Path(directory).iterdir() if path.is_dir())
+    for path in runs[:max(0, len(runs) - keep)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def is_staff_request(request):
+    """Staff check that also accepts a JWT, since DRF authenticates only in the view"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    from rest_framework.exceptions import AuthenticationFailed
+    from .tokens import RevocableJWTAuthentication
+
+    try:
+        result = RevocableJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+class ProfilingMiddleware:
+    """Profiles a request when a staff user sends X-Profile, or its path is in PROFILING_PATHS.
+
+    Django drops the middleware at startup unless PROFILING_ENABLED is set,
+    so it adds no per-request work when profiling is off.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.paths = tuple(getattr(settings, 'PROFILING_PATHS', []))
+
+    def requested_mode(self, request):
+        header = request.headers.get(PROFILE_HEADER)
+        if header:
+            if not is_staff_request(request):
+                return None
+            return header if header in PROFILE_MODES else default_mode()
+        if self.paths and request.path.startswith(self.paths):
+            return default_mode()
+        return None
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        with ProfileRun(f'{request.method} {request.path}', mode) as run:
+            response = self.get_response(request)
+            run.status = response.status_code
+        response['X-Profile-Id'] = run.run_id
+        return response
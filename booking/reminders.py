@@ -0,0 +1,191 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q, prefetch_related_objects
+from django.utils import timezone
+from .db_routers import booking_aliases
+from .email_service import EmailService
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Raised when another scheduler has taken over the cursor mid-tick"""
+
+
+class ReminderScheduler:
+    """Sends reminders for a window that slides ahead of the current time.
+
+    Each tick covers show times in (high-water mark, now + lead] and then
+    advances the mark, so reminders go out `lead` before the show instead of
+    in one daily burst. Bookings made after their show entered the window
+    are picked up by the next tick, and each booking is flagged once its
+    reminder was attempted. A tick holds a lease on the cursor row, so two
+    schedulers sharing a cursor never send the same reminders.
+    """
+
+    def __init__(self, name='default', lead_hours=None, send_rate=None, stdout=None):
+        self.name = name
+        self.lead = timedelta(hours=lead_hours or getattr(settings, 'REMINDER_LEAD_HOURS', 24))
+        self.send_rate = send_rate if send_rate is not None else getattr(
+            settings, 'REMINDER_SEND_RATE', 5.0
+        )
+        self.stdout = stdout
+        self.token = uuid.uuid4().hex
+        self._next_send = 0.0
+
+    def cursor(self, now):
+        from .models import ReminderCursor
+
+        # A new cursor starts at the leading edge: reminders for earlier shows
+        # were the previous (daily) run's responsibility
+        cursor, _ = ReminderCursor.objects.get_or_create(
+            name=self.name, defaults={'high_water_mark': now + self.lead}
+        )
+        return cursor
+
+    def lease_expiry(self):
+        return timezone.now() + timedelta(seconds=getattr(settings, 'REMINDER_LEASE_SECONDS', 300))
+
+    def acquire(self, cursor):
+        """Take the cursor's lease unless another scheduler holds it"""
+        from .models import ReminderCursor
+
+        return ReminderCursor.objects.filter(pk=cursor.pk).filter(
+            Q(leased_until__isnull=True) | Q(leased_until__lte=timezone.now()) | Q(lease_owner=self.token)
+        ).update(lease_owner=self.token, leased_until=self.lease_expiry()) == 1
+
+    def renew(self, cursor):
+        """Extend the lease; False if it expired and was taken over"""
+        from .models import ReminderCursor
+
+        return ReminderCursor.objects.filter(pk=cursor.pk, lease_owner=self.token).update(
+            leased_until=self.lease_expiry()
+        ) == 1
+
+    def release(self, cursor):
+        from .models import ReminderCursor
+
+        ReminderCursor.objects.filter(pk=cursor.pk, lease_owner=self.token).update(
+            lease_owner='', leased_until=None
+        )
+
+    def due_bookings(self, start, end, created_after=None, batch_size=200):
+        """Yield unreminded booked seats for shows in (start, end], in show time order.
+
+        Bookings may be sharded away from their shows, so they are fetched
+        per batch of shows from each booking database and joined in Python.
+        """
+        from .models import Booking, Show
+
+        # Read from the primary: a lagging replica could miss bookings in a
+        # window that is then marked done
+        shows = list(
+            Show.objects.filter(date_time__gt=start, date_time__lte=end)
+            .select_related('movie').order_by('date_time', 'id')
+        )
+        for offset in range(0, len(shows), batch_size):
+            batch = {show.id: show for show in shows[offset:offset + batch_size]}
+            bookings = []
+            for alias in booking_aliases():
+                queryset = Booking.objects.using(alias).filter(
+                    show_id__in=batch, status='booked', reminded_at__isnull=True
+                )
+                if created_after is not None:
+                    queryset = queryset.filter(created_at__gt=created_after)
+                bookings.extend(queryset)
+            for booking in bookings:
+                booking.show = batch[booking.show_id]
+            prefetch_related_objects(bookings, 'user')
+            bookings.sort(key=lambda booking: (booking.show.date_time, booking.show_id, booking.id))
+            yield from bookings
+
+    def remind(self, cursor, booking):
+        """Send one reminder and flag the booking so it is not sent again"""
+        from .models import Booking
+
+        self.throttle()
+        if not self.renew(cursor):
+            raise LeaseLost(f"Reminder cursor '{self.name}' was taken over")
+        sent = EmailService.send_reminder_email(booking)
+        Booking.objects.using(booking._state.db).filter(pk=booking.pk).update(
+            reminded_at=timezone.now()
+        )
+        if not sent:
+            logger.warning(f"Reminder for booking {booking.id} failed; it will not be retried")
+        return sent
+
+    def throttle(self):
+        """Sleep as needed to stay under send_rate emails per second"""
+        if not self.send_rate or self.send_rate <= 0:
+            return
+        now = time.monotonic()
+        if self._next_send > now:
+            time.sleep(self._next_send - now)
+        self._next_send = max(now, self._next_send) + 1 / self.send_rate
+
+    def tick(self, now=None):
+        """Process the newly entered slice of the window; returns (sent, failed)"""
+        from .models import ReminderCursor
+
+        now = now or timezone.now()
+        cursor = self.cursor(now)
+        if not self.acquire(cursor):
+            logger.info(f"Reminder cursor '{self.name}' is leased by another scheduler")
+            return 0, 0
+
+        sent = failed = 0
+        try:
+            window_end = now + self.lead
+            # Bookings made after their show entered the window (flagged
+            # bookings are skipped, so these are the late ones). Bookings
+            # older than the cursor were the previous (daily) run's job.
+            late = self.due_bookings(
+                now, min(cursor.high_water_mark, window_end), created_after=cursor.created_at
+            )
+            for booking in late:
+                if self.remind(cursor, booking):
+                    sent += 1
+                else:
+                    failed += 1
+
+            if window_end <= cursor.high_water_mark:
+                return sent, failed
+
+            current_show_time = None
+            for booking in self.due_bookings(cursor.high_water_mark, window_end):
+                show_time = booking.show.date_time
+                if current_show_time is not None and show_time != current_show_time:
+                    # Every booking at earlier show times is done
+                    ReminderCursor.objects.filter(pk=cursor.pk, lease_owner=self.token).update(
+                        high_water_mark=current_show_time
+                    )
+                current_show_time = show_time
+
+                if self.remind(cursor, booking):
+                    sent += 1
+                else:
+                    failed += 1
+
+            ReminderCursor.objects.filter(pk=cursor.pk, lease_owner=self.token).update(
+                high_water_mark=window_end, updated_at=timezone.now()
+            )
+        except LeaseLost as e:
+            logger.warning(f"{str(e)}; stopping this tick")
+        finally:
+            self.release(cursor)
+        return sent, failed
+
+    def run(self, interval, max_ticks=None):
+        """Tick every `interval` seconds until interrupted (or max_ticks)"""
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            started = time.monotonic()
+            sent, failed = self.tick()
+            ticks += 1
+            if self.stdout and (sent or failed):
+                self.stdout.write(f'{timezone.now():%Y-%m-%d %H:%M:%S} sent {sent}, failed {failed}')
+            if max_ticks is None or ticks < max_ticks:
+                time.sleep(max(0, interval - (time.monotonic() - started)))
@@ -0,0 +1,101 @@
+"""OpenAPI schema generated once and served from memory.
+
+Introspecting every view and serializer is expensive, so the JSON document
+is built at most once per process. When ``OPENAPI_SCHEMA_FILE`` points at a
+file written by ``manage.py build_openapi_schema`` (e.g. during a deploy),
+that file is served instead and nothing is introspected at runtime.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_safe
+from pathlib import Path
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cached = None
+
+
+class CachedSchema:
+    """Serialized schema document and its ETag"""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = f'"openapi-{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Movie Ticket Booking API",
+        default_version='v1',
+        description="A comprehensive API for movie ticket booking system with JWT authentication",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contact@moviebooking.local"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def generate_schema():
+    """Introspect the API and return the schema as JSON bytes"""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    # No request: the document is host-independent and includes every endpoint
+    schema = OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def schema_file():
+    path = getattr(settings, 'OPENAPI_SCHEMA_FILE', '')
+    return Path(path) if path else None
+
+
+def get_schema():
+    """Return the CachedSchema, loading or generating it on first use"""
+    global _cached
+    if _cached is None:
+        with _lock:
+            if _cached is None:
+                path = schema_file()
+                if path and path.exists():
+                    body = path.read_bytes()
+                else:
+                    if path:
+                        logger.warning(f"OpenAPI schema file {path} not found; generating schema")
+                    body = generate_schema()
+                _cached = CachedSchema(body)
+    return _cached
+
+
+def clear_schema_cache():
+    global _cached
+    with _lock:
+        _cached = None
+
+
+def write_schema(path):
+    """Generate the schema and write it to path"""
+    schema = CachedSchema(generate_schema())
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(schema.body)
+    return schema
+
+
+def schema_etag(request, *args, **kwargs):
+    return get_schema().etag
+
+
+@require_safe
+@condition(etag_func=schema_etag)
+def openapi_schema_view(request, *args, **kwargs):
+    """Serve the cached schema; If-None-Match requests get a 304"""
+    response = HttpResponse(get_schema().body, content_type='application/json')
+    # Clients may reuse their copy but must revalidate; the ETag changes per deploy
+    response['Cache-Control'] = 'public, no-cache'
+    return response
@@ -0,0 +1,214 @@
+from bisect import bisect_left
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+import heapq
+import re
+import threading
+import unicodedata
+import uuid
+
+SEARCH_VERSION_KEY = 'movie-search-version'
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Per-term scores: exact word, word prefix, near miss (edit distance 1, 2)
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+FUZZY_SCORES = {1: 1.0, 2: 0.5}
+
+# Vocabulary words a short prefix may expand to; bounds the cost of "a", "th"
+MAX_PREFIX_WORDS = 256
+
+
+def normalize(text):
+    """Lowercase, strip accents and split into alphanumeric words"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(text.lower())
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def max_typos(word):
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 6 else 2
+
+
+class MovieSearchIndex:
+    """In-memory word index over movie titles.
+
+    The sorted vocabulary answers prefix queries with two bisects, and a
+    trigram index over the vocabulary finds candidate words for typo
+    tolerance, so a query never touches more than a few hundred words
+    regardless of catalogue size.
+    """
+
+    def __init__(self, movies=()):
+        self.titles = {}
+        self.phrases = {}
+        postings = defaultdict(set)
+        for movie_id, title in movies:
+            words = normalize(title)
+            self.titles[movie_id] = title
+            self.phrases[movie_id] = ' '.join(words)
+            for word in words:
+                postings[word].add(movie_id)
+
+        self.words = sorted(postings)
+        self.postings = [postings[word] for word in self.words]
+        self.grams = defaultdict(list)
+        for position, word in enumerate(self.words):
+            for gram in trigrams(word):
+                self.grams[gram].append(position)
+
+    def _prefix_range(self, prefix):
+        start = bisect_left(self.words, prefix)
+        end = bisect_left(self.words, prefix + '\uffff', start)
+        return start, end
+
+    def _fuzzy_words(self, term, limit):
+        """Vocabulary positions within `limit` edits of term, with their distance"""
+        term_grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for position in self.grams.get(gram, ()):
+                shared[position] += 1
+
+        # Each edit destroys at most three trigrams
+        needed = max(1, len(term_grams) - 3 * limit)
+        matches = []
+        for position, count in shared.items():
+            if count < needed:
+                continue
+            distance = edit_distance(term, self.words[position], limit)
+            if distance <= limit:
+                matches.append((position, distance))
+        return matches
+
+    def _term_scores(self, term, is_last):
+        """Score each movie matching one query word"""
+        scores = {}
+
+        def add(position, score):
+            for movie_id in self.postings[position]:
+                if score > scores.get(movie_id, 0):
+                    scores[movie_id] = score
+
+        start, end = self._prefix_range(term)
+        for position in range(start, min(end, start + MAX_PREFIX_WORDS)):
+            if self.words[position] == term:
+                add(position, EXACT_SCORE)
+            elif is_last:
+                # Only the word being typed is treated as a prefix
+                add(position, PREFIX_SCORE)
+
+        limit = max_typos(term)
+        if limit:
+            for position, distance in self._fuzzy_words(term, limit):
+                if distance:
+                    add(position, FUZZY_SCORES[distance])
+        return scores
+
+    def search(self, query, limit=20):
+        """Return up to `limit` (movie_id, title, score) tuples, best first"""
+        terms = normalize(query)
+        if not terms or not self.titles:
+            return []
+
+        totals = None
+        for index, term in enumerate(terms):
+            scores = self._term_scores(term, is_last=index == len(terms) - 1)
+            if totals is None:
+                totals = scores
+            else:
+                # Every word of the query must match
+                totals = {
+                    movie_id: totals[movie_id] + score
+                    for movie_id, score in scores.items() if movie_id in totals
+                }
+            if not totals:
+                return []
+
+        phrase = ' '.join(terms)
+        results = []
+        for movie_id, score in totals.items():
+            if self.phrases[movie_id].startswith(phrase):
+                score += 1.0
+            results.append((movie_id, self.titles[movie_id], round(score, 2)))
+
+        return heapq.nsmallest(
+            limit, results, key=lambda result: (-result[2], len(result[1]), result[1].lower(), result[0])
+        )
+
+
+class MovieSearch:
+    """Per-process MovieSearchIndex, rebuilt when the catalogue version changes"""
+
+    _index = None
+    _version = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        # A random token, so a flushed cache also forces a rebuild
+        return cache.get_or_set(SEARCH_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+    @staticmethod
+    def invalidate():
+        """Mark every process's index as stale after a Movie change"""
+        cache.set(SEARCH_VERSION_KEY, uuid.uuid4().hex, None)
+
+    @classmethod
+    def index(cls):
+        version = cls.current_version()
+        if cls._index is not None and cls._version == version:
+            return cls._index
+        # One thread rebuilds; others keep using the previous index meanwhile
+        if cls._index is not None and not cls._lock.acquire(blocking=False):
+            return cls._index
+        if cls._index is None:
+            cls._lock.acquire()
+        try:
+            if cls._index is None or cls._version != version:
+                cls._index = cls.build()
+                cls._version = version
+            return cls._index
+        finally:
+            cls._lock.release()
+
+    @staticmethod
+    def build():
+        from .models import Movie
+
+        chunk_size = getattr(settings, 'MOVIE_SEARCH_CHUNK_SIZE', 5000)
+        return MovieSearchIndex(
+            Movie.objects.values_list('id', 'title').iterator(chunk_size=chunk_size)
+        )
+
+    @classmethod
+    def search(cls, query, limit=20):
+        return cls.index().search(query, limit)
@@ -0,0 +1,310 @@
+from bisect import bisect_right
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from .analytics import StatsService
+from .db_routers import shard_for_show
+from .events import EventLog
+from .layouts import LayoutCache
+from .versions import BookingVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEAT_INDEX_CACHE_KEY = 'seat-index:{show_id}'
+
+
+class SeatAllocationError(Exception):
+    """Raised when no block of contiguous free seats can be found"""
+
+
+class FreeRunIndex:
+    """Sorted index of runs of contiguous free seats for one show.
+
+    Runs are kept as two parallel sorted lists of inclusive (start, end)
+    seat numbers, so a lookup by seat is a single bisect and booking or
+    releasing a seat only touches the run(s) around it.
+    """
+
+    def __init__(self, total_seats, starts=None, ends=None, breaks=()):
+        self.total_seats = total_seats
+        self.starts = starts if starts is not None else []
+        self.ends = ends if ends is not None else []
+        # Seats after which a run must end (row ends and aisles)
+        self.breaks = frozenset(breaks)
+        # Read from the cache rather than built from the database
+        self.cached = False
+
+    @classmethod
+    def build(cls, total_seats, booked_seats, breaks=()):
+        """Build the index from the set of booked seat numbers"""
+        booked = set(booked_seats)
+        index = cls(total_seats, breaks=breaks)
+        run_start = None
+        for seat in range(1, total_seats + 1):
+            if seat in booked:
+                if run_start is not None:
+                    index.starts.append(run_start)
+                    index.ends.append(seat - 1)
+                    run_start = None
+                continue
+            if run_start is None:
+                run_start = seat
+            if seat in index.breaks and seat < total_seats:
+                index.starts.append(run_start)
+                index.ends.append(seat)
+                run_start = None
+        if run_start is not None:
+            index.starts.append(run_start)
+            index.ends.append(total_seats)
+        return index
+
+    @property
+    def free_count(self):
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def _run_position(self, seat):
+        """Return the position of the run containing seat, or None"""
+        position = bisect_right(self.starts, seat) - 1
+        if position >= 0 and self.ends[position] >= seat:
+            return position
+        return None
+
+    def is_free(self, seat):
+        return self._run_position(seat) is not None
+
+    def occupy(self, seat):
+        """Mark a seat as booked, splitting the run that contains it"""
+        position = self._run_position(seat)
+        if position is None:
+            return
+        start, end = self.starts[position], self.ends[position]
+        del self.starts[position]
+        del self.ends[position]
+        if seat < end:
+            self.starts.insert(position, seat + 1)
+            self.ends.insert(position, end)
+        if start < seat:
+            self.starts.insert(position, start)
+            self.ends.insert(position, seat - 1)
+
+    def release(self, seat):
+        """Mark a seat as free, merging it with adjacent runs"""
+        if seat < 1 or seat > self.total_seats or self.is_free(seat):
+            return
+        position = bisect_right(self.starts, seat)
+        start, end = seat, seat
+        if (position > 0 and self.ends[position - 1] == seat - 1
+                and seat - 1 not in self.breaks):
+            position -= 1
+            start = self.starts[position]
+            del self.starts[position]
+            del self.ends[position]
+        if (position < len(self.starts) and self.starts[position] == seat + 1
+                and seat not in self.breaks):
+            end = self.ends[position]
+            del self.starts[position]
+            del self.ends[position]
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+
+    def best_block(self, quantity, preferred_seat=None):
+        """Return the contiguous block of seats closest to preferred_seat"""
+        if preferred_seat is None:
+            preferred_seat = (self.total_seats + 1) / 2
+        best = None
+        for start, end in zip(self.starts, self.ends):
+            if end - start + 1 < quantity:
+                continue
+            # Centre the block on the preferred seat, clamped to the run
+            block_start = int(preferred_seat - (quantity - 1) / 2)
+            block_start = max(start, min(block_start, end - quantity + 1))
+            distance = abs(block_start + (quantity - 1) / 2 - preferred_seat)
+            if best is None or distance < best[0]:
+                best = (distance, block_start)
+        if best is None:
+            return None
+        return list(range(best[1], best[1] + quantity))
+
+    def nearest_free(self, quantity, preferred_seat=None):
+        """Return the quantity free seats nearest preferred_seat, or None"""
+        if self.free_count < quantity:
+            return None
+        if preferred_seat is None:
+            preferred_seat = (self.total_seats + 1) / 2
+        free = [seat for start, end in zip(self.starts, self.ends) for seat in range(start, end + 1)]
+        return sorted(sorted(free, key=lambda seat: abs(seat - preferred_seat))[:quantity])
+
+    def to_cache(self):
+        return (self.total_seats, self.starts, self.ends, sorted(self.breaks))
+
+    @classmethod
+    def from_cache(cls, value):
+        total_seats, starts, ends, breaks = value
+        index = cls(total_seats, list(starts), list(ends), breaks)
+        index.cached = True
+        return index
+
+
+class SeatIndex:
+    """Cache-backed storage for per-show free-run indexes"""
+
+    @staticmethod
+    def cache_key(show_id):
+        return SEAT_INDEX_CACHE_KEY.format(show_id=show_id)
+
+    @staticmethod
+    def rebuild(show):
+        """Rebuild the index for a show from the database and cache it"""
+        from .waitlist import WaitlistService
+
+        # Seats held for waitlisted users are not up for allocation
+        unavailable = show.booked_seat_numbers + WaitlistService.held_seat_numbers(show.id)
+        index = FreeRunIndex.build(
+            show.total_seats,
+            unavailable,
+            LayoutCache.breaks(show.layout_id)
+        )
+        SeatIndex.store(show.id, index)
+        return index
+
+    @staticmethod
+    def load(show):
+        """Return the cached index for a show, rebuilding it on a miss"""
+        value = cache.get(SeatIndex.cache_key(show.id))
+        if value is None or value[0] != show.total_seats:
+            return SeatIndex.rebuild(show)
+        return FreeRunIndex.from_cache(value)
+
+    @staticmethod
+    def store(show_id, index):
+        cache.set(
+            SeatIndex.cache_key(show_id),
+            index.to_cache(),
+            getattr(settings, 'SEAT_INDEX_TIMEOUT', 300)
+        )
+
+    @staticmethod
+    def invalidate(show_id):
+        cache.delete(SeatIndex.cache_key(show_id))
+
+    @staticmethod
+    def invalidate_many(show_ids):
+        cache.delete_many([SeatIndex.cache_key(show_id) for show_id in show_ids])
+
+    @staticmethod
+    def _update(show_id, seat_numbers, booked):
+        # Not atomic: a concurrent update can be lost. A lost booking shows
+        # up as an IntegrityError and a lost release as a missing block;
+        # the allocator rebuilds from the database in both cases
+        value = cache.get(SeatIndex.cache_key(show_id))
+        if value is None:
+            # Nothing cached yet; the next allocation rebuilds from the DB
+            return
+        index = FreeRunIndex.from_cache(value)
+        for seat in seat_numbers:
+            if booked:
+                index.occupy(seat)
+            else:
+                index.release(seat)
+        SeatIndex.store(show_id, index)
+
+    @staticmethod
+    def seats_booked(show_id, seat_numbers):
+        """Apply booked seats to the cached index once the transaction commits"""
+        transaction.on_commit(lambda: SeatIndex._update(show_id, seat_numbers, True))
+
+    @staticmethod
+    def seats_released(show_id, seat_numbers):
+        """Apply released seats to the cached index once the transaction commits"""
+        transaction.on_commit(lambda: SeatIndex._update(show_id, seat_numbers, False))
+
+
+class SeatAllocator:
+    """Allocates the best available block of contiguous seats for a show"""
+
+    @staticmethod
+    def choose(index, quantity, preferred_seat=None, seat_numbers=None, contiguous=True):
+        """Pick seats from the index, or None if the request cannot be met"""
+        if seat_numbers is not None:
+            if all(index.is_free(seat) for seat in seat_numbers):
+                return list(seat_numbers)
+            return None
+        seats = index.best_block(quantity, preferred_seat)
+        if seats is None and not contiguous:
+            seats = index.nearest_free(quantity, preferred_seat)
+        return seats
+
+    @staticmethod
+    def allocate(show, user, quantity, preferred_seat=None):
+        """Atomically book quantity contiguous seats near preferred_seat"""
+        return SeatAllocator.allocate_group(show, [user] * quantity, preferred_seat)
+
+    @staticmethod
+    def allocate_group(show, users, preferred_seat=None, seat_numbers=None, contiguous=True):
+        """Atomically book one seat per user, in order.
+
+        Seats are seat_numbers when given, otherwise the best contiguous
+        block near preferred_seat; without `contiguous` a group too large
+        for any block gets the free seats nearest preferred_seat.
+        """
+        from .models import Booking, Show
+        from .pricing import PricingService
+
+        quantity = len(users)
+        shard = shard_for_show(show.pk)
+        for attempt in range(2):
+            try:
+                with transaction.atomic(), transaction.atomic(using=shard):
+                    # Serialize allocations per show while the index is in use
+                    show = Show.objects.select_for_update().get(pk=show.pk)
+                    if show.hot_mode:
+                        # The show's engine owns its seats (see booking.hotshow)
+                        raise SeatAllocationError(
+                            'This show only takes single-seat bookings right now'
+                        )
+                    index = SeatIndex.rebuild(show) if attempt else SeatIndex.load(show)
+                    seats = SeatAllocator.choose(index, quantity, preferred_seat, seat_numbers, contiguous)
+                    if seats is None and index.cached:
+                        # A lost cache update can hide free seats; check the database
+                        index = SeatIndex.rebuild(show)
+                        seats = SeatAllocator.choose(
+                            index, quantity, preferred_seat, seat_numbers, contiguous
+                        )
+                    if seats is None:
+                        if seat_numbers is not None:
+                            taken = [seat for seat in seat_numbers if not index.is_free(seat)]
+                            raise SeatAllocationError(
+                                f"Seats {', '.join(map(str, taken))} are not available"
+                            )
+                        raise SeatAllocationError(
+                            f'No block of {quantity} adjacent seats is available for this show'
+                            if contiguous else f'Fewer than {quantity} seats are available for this show'
+                        )
+
+                    # Price at the occupancy before this booking
+                    prices = PricingService.table(
+                        show, occupied=show.total_seats - index.free_count
+                    )
+                    bookings = Booking.objects.using(shard).bulk_create([
+                        Booking(
+                            user=user, show=show, seat_number=seat, status='booked',
+                            price=prices.price(seat)
+                        )
+                        for user, seat in zip(users, seats)
+                    ])
+
+                    EventLog.bookings_created(bookings)
+                    StatsService.seats_booked(show, len(bookings))
+                    BookingVersion.bump(*{user.id for user in users})
+
+                    for seat in seats:
+                        index.occupy(seat)
+                    transaction.on_commit(lambda: SeatIndex.store(show.id, index))
+                    return bookings
+            except IntegrityError:
+                # The cached index was stale; retry once against the database
+                logger.warning(f"Stale seat index for show {show.id}, rebuilding")
+                SeatIndex.invalidate(show.id)
+
+        raise SeatAllocationError('Seats were taken concurrently. Please try again.')
@@ -1,8 +1,19 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from .models import Movie, Show, Booking
+from django.db.models import Count
+from .models import (
+    Movie, Show, Booking, Venue, Screen, WaitlistEntry, ArchivedBooking, ShowStats, MovieDailyStats, BookingEvent
+)
+from .analytics import occupancy
+from .waitlist import WaitlistService
+from .accounts import UserImportService
+from .export import EXPORT_FORMATS
+from .db_routers import booking_aliases
+from abc import ABC, abstractmethod
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -25,6 +36,51 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
+class BulkUserRowSerializer(serializers.ModelSerializer):
+    """One account in a bulk registration"""
+    password = serializers.CharField(write_only=True, min_length=8)
+
+    class Meta:
+        model = User
+        fields = ['username', 'email', 'first_name', 'last_name', 'password']
+        extra_kwargs = {
+            # Uniqueness is checked for the whole batch in one query
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
+
+    def validate_username(self, value):
+        return User.normalize_username(value)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+
+class BulkUserRegistrationSerializer(serializers.Serializer):
+    """Batch of accounts registered by staff, created all or nothing"""
+    users = BulkUserRowSerializer(many=True, allow_empty=False)
+
+    def validate_users(self, rows):
+        limit = self.context.get('max_users', getattr(settings, 'USER_IMPORT_MAX_USERS', 1000))
+        if len(rows) > limit:
+            raise serializers.ValidationError(f"At most {limit} users can be registered at once")
+
+        usernames = [row['username'] for row in rows]
+        taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        seen, errors = set(), []
+        for position, username in enumerate(usernames, 1):
+            if username in taken:
+                errors.append(f"Row {position}: username '{username}' is already taken")
+            elif username in seen:
+                errors.append(f"Row {position}: username '{username}' appears more than once")
+            seen.add(username)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def create(self, validated_data):
+        return UserImportService.create_users(validated_data['users'])
+
+
 class UserLoginSerializer(serializers.Serializer):
     """Serializer for user login"""
     username = serializers.CharField()
@@ -47,6 +103,36 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
 
+class LoginUserSerializer(serializers.Serializer):
+    """User details returned on login (documentation only)"""
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    email = serializers.CharField()
+
+
+class LoginResponseSerializer(serializers.Serializer):
+    """Login response with JWT tokens (documentation only)"""
+    access = serializers.CharField()
+    refresh = serializers.CharField()
+    user = LoginUserSerializer()
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """Refresh token exchanged for a new access (and rotated refresh) token"""
+    refresh = serializers.CharField()
+
+
+class TokenRefreshResponseSerializer(serializers.Serializer):
+    """Tokens returned by the refresh endpoint (documentation only)"""
+    access = serializers.CharField()
+    refresh = serializers.CharField()
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Refresh token to revoke on logout"""
+    refresh = serializers.CharField()
+
+
 class MovieSerializer(serializers.ModelSerializer):
     """Serializer for Movie model"""
     shows_count = serializers.SerializerMethodField()
@@ -59,6 +145,114 @@ class MovieSerializer(serializers.ModelSerializer):
         return obj.shows.count()
 
 
+class FlatListSerializer(ABC):
+    """Read-only list serializer that builds output straight from values() rows.
+
+    Avoids per-field to_representation calls on hot list endpoints; the
+    output has the same shape as the matching ModelSerializer.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    @abstractmethod
+    def get_rows(cls, queryset):
+        """Return the values() rows for a page of the queryset"""
+
+    @property
+    def data(self):
+        return self.rows
+
+
+class MovieFlatSerializer(FlatListSerializer):
+    """Flat counterpart of MovieSerializer"""
+
+    @classmethod
+    def get_rows(cls, queryset):
+        return queryset.annotate(shows_count=Count('shows')).values(
+            'id', 'title', 'duration_minutes', 'shows_count', 'created_at'
+        )
+
+
+class ShowFlatSerializer(FlatListSerializer):
+    """Flat counterpart of ShowSerializer"""
+
+    @classmethod
+    def get_rows(cls, queryset):
+        return queryset.values(
+            'id', 'movie_id', 'movie__title', 'movie__duration_minutes', 'movie__created_at',
+            'venue_id', 'screen_id', 'screen_name', 'date_time', 'total_seats', 'layout_id',
+            'base_price', 'created_at'
+        )
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        show_ids = [row['id'] for row in rows]
+        movie_ids = {row['movie_id'] for row in rows}
+
+        # One query each for seat state and show counts across the whole page
+        booked = {show_id: [] for show_id in show_ids}
+        for alias in booking_aliases():
+            for show_id, seat_number in Booking.objects.using(alias).filter(
+                show_id__in=show_ids, status='booked'
+            ).values_list('show_id', 'seat_number'):
+                booked[show_id].append(seat_number)
+        shows_count = dict(
+            Show.objects.filter(movie_id__in=movie_ids)
+            .values('movie_id').annotate(count=Count('id'))
+            .values_list('movie_id', 'count')
+        )
+
+        return [
+            {
+                'id': row['id'],
+                'movie': {
+                    'id': row['movie_id'],
+                    'title': row['movie__title'],
+                    'duration_minutes': row['movie__duration_minutes'],
+                    'shows_count': shows_count.get(row['movie_id'], 0),
+                    'created_at': row['movie__created_at'],
+                },
+                'venue': row['venue_id'],
+                'screen': row['screen_id'],
+                'screen_name': row['screen_name'],
+                'date_time': row['date_time'],
+                'total_seats': row['total_seats'],
+                'layout': row['layout_id'],
+                'base_price': str(row['base_price']),
+                'available_seats': row['total_seats'] - len(booked[row['id']]),
+                'booked_seat_numbers': booked[row['id']],
+                'created_at': row['created_at'],
+            }
+            for row in rows
+        ]
+
+
+class ScreenSerializer(serializers.ModelSerializer):
+    """Serializer for Screen model"""
+
+    class Meta:
+        model = Screen
+        fields = ['id', 'name', 'layout']
+
+
+class VenueSerializer(serializers.ModelSerializer):
+    """Serializer for Venue model with its screens"""
+    screens = ScreenSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Venue
+        fields = ['id', 'name', 'slug', 'city', 'screens']
+
+
+class VenueShowsFilterSerializer(serializers.Serializer):
+    """Query parameters for a venue's show listing"""
+    movie = serializers.IntegerField(required=False, min_value=1)
+    date = serializers.DateField(required=False)
+
+
 class ShowSerializer(serializers.ModelSerializer):
     """Serializer for Show model"""
     movie = MovieSerializer(read_only=True)
@@ -69,8 +263,8 @@ class ShowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Show
         fields = [
-            'id', 'movie', 'movie_id', 'screen_name', 'date_time', 
-            'total_seats', 'available_seats', 'booked_seat_numbers', 'created_at'
+            'id', 'movie', 'movie_id', 'venue', 'screen', 'screen_name', 'date_time',
+            'total_seats', 'layout', 'base_price', 'available_seats', 'booked_seat_numbers', 'created_at'
         ]
 
     def validate_movie_id(self, value):
@@ -111,8 +305,7 @@ class BookingSerializer(serializers.ModelSerializer):
             )
         
         # Check if seat is already booked
-        existing_booking = Booking.objects.filter(
-            show=show,
+        existing_booking = show.bookings.filter(
             seat_number=seat_number,
             status='booked'
         )
@@ -142,10 +335,13 @@ class BookingCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 f"Seat number {value} exceeds total seats ({show.total_seats})"
             )
+
+        # Hot shows check availability in memory (see booking.hotshow)
+        if not self.context.get('check_availability', True):
+            return value
         
         # Check if seat is already booked
-        existing_booking = Booking.objects.filter(
-            show=show,
+        existing_booking = show.bookings.filter(
             seat_number=value,
             status='booked'
         )
@@ -155,8 +351,89 @@ class BookingCreateSerializer(serializers.Serializer):
                 f"Seat {value} is already booked for this show"
             )
         
+        # Check if seat is held for someone on the waitlist
+        holders = WaitlistService.seat_holders(show.id, value)
+        if holders and self.context['request'].user.id not in holders:
+            raise serializers.ValidationError(
+                f"Seat {value} is being held for a waitlisted customer"
+            )
+        
+        return value
+
+
+class BestSeatsBookingSerializer(serializers.Serializer):
+    """Serializer for booking the best available block of seats"""
+    quantity = serializers.IntegerField(min_value=1, max_value=10)
+    preferred_seat = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_quantity(self, value):
+        show = self.context['show']
+        if value > show.total_seats:
+            raise serializers.ValidationError(
+                f"Quantity {value} exceeds total seats ({show.total_seats})"
+            )
         return value
 
+    def validate_preferred_seat(self, value):
+        show = self.context['show']
+        if value > show.total_seats:
+            raise serializers.ValidationError(
+                f"Seat number {value} exceeds total seats ({show.total_seats})"
+            )
+        return value
+
+
+class GroupBookingSerializer(serializers.Serializer):
+    """Serializer for booking one seat per user in a single transaction"""
+    usernames = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+    seat_numbers = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+    preferred_seat = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        show = self.context['show']
+        usernames = attrs['usernames']
+        if len(usernames) > show.total_seats:
+            raise serializers.ValidationError(
+                {'usernames': f"Group of {len(usernames)} exceeds total seats ({show.total_seats})"}
+            )
+        if len(set(usernames)) != len(usernames):
+            raise serializers.ValidationError({'usernames': 'Each user can only be listed once'})
+
+        seat_numbers = attrs.get('seat_numbers')
+        if seat_numbers is not None:
+            if len(seat_numbers) != len(usernames):
+                raise serializers.ValidationError({'seat_numbers': 'Provide one seat number per user'})
+            if len(set(seat_numbers)) != len(seat_numbers):
+                raise serializers.ValidationError({'seat_numbers': 'Seat numbers must be distinct'})
+            if max(seat_numbers) > show.total_seats:
+                raise serializers.ValidationError(
+                    {'seat_numbers': f"Seat numbers cannot exceed total seats ({show.total_seats})"}
+                )
+        if attrs.get('preferred_seat', 0) > show.total_seats:
+            raise serializers.ValidationError(
+                {'preferred_seat': f"Seat number exceeds total seats ({show.total_seats})"}
+            )
+
+        users = User.objects.in_bulk(usernames, field_name='username')
+        missing = [username for username in usernames if username not in users]
+        if missing:
+            raise serializers.ValidationError({'usernames': f"Unknown users: {', '.join(missing)}"})
+        attrs['users'] = [users[username] for username in usernames]
+        return attrs
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """Serializer for waitlist entries"""
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'show', 'status', 'offered_seat', 'hold_expires_at', 'created_at'
+        ]
+        read_only_fields = fields
+
 
 class BookingDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for booking with show and movie info"""
@@ -166,7 +443,7 @@ class BookingDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = [
-            'id', 'seat_number', 'status', 'created_at', 'updated_at',
+            'id', 'seat_number', 'status', 'price', 'created_at', 'updated_at',
             'show_details', 'movie_title'
         ]
 
@@ -179,4 +456,108 @@ class BookingDetailSerializer(serializers.ModelSerializer):
         }
 
     def get_movie_title(self, obj):
-        return obj.show.movie.title
\ No newline at end of file
+        return obj.show.movie.title
+
+
+class ArchivedBookingSerializer(serializers.ModelSerializer):
+    """Archived booking in the same shape as BookingDetailSerializer"""
+    show_details = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedBooking
+        fields = [
+            'id', 'seat_number', 'status', 'price', 'created_at', 'updated_at',
+            'show_details', 'movie_title'
+        ]
+
+    def get_show_details(self, obj):
+        return {
+            'id': obj.show_id,
+            'screen_name': obj.screen_name,
+            'date_time': obj.show_date_time,
+            'total_seats': obj.total_seats
+        }
+
+
+class UserBookingsQuerySerializer(serializers.Serializer):
+    """Query parameters for the user's booking list"""
+    archived = serializers.BooleanField(default=False)
+    since = serializers.DateTimeField(required=False)
+
+
+class BookingExportSerializer(serializers.Serializer):
+    """Query parameters for the staff booking export"""
+    start = serializers.DateField()
+    end = serializers.DateField()
+    output = serializers.ChoiceField(choices=list(EXPORT_FORMATS), default='csv')
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    gzip = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['end'] < data['start']:
+            raise serializers.ValidationError("End date must not be before start date")
+        return data
+
+
+class ShowStatsSerializer(serializers.ModelSerializer):
+    """Rollup counts for one show"""
+    screen_name = serializers.CharField(source='show.screen_name')
+    date_time = serializers.DateTimeField(source='show.date_time')
+    occupancy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShowStats
+        fields = [
+            'show', 'movie', 'screen_name', 'date_time', 'date', 'capacity',
+            'booked_seats', 'cancellations', 'occupancy', 'updated_at'
+        ]
+
+    def get_occupancy(self, obj):
+        return occupancy(obj.booked_seats, obj.capacity)
+
+
+class MovieDailyStatsSerializer(serializers.ModelSerializer):
+    """Rollup counts for a movie's shows on one day"""
+    occupancy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MovieDailyStats
+        fields = [
+            'movie', 'date', 'shows', 'capacity', 'booked_seats',
+            'cancellations', 'occupancy', 'updated_at'
+        ]
+
+    def get_occupancy(self, obj):
+        return occupancy(obj.booked_seats, obj.capacity)
+
+
+class StatsRangeSerializer(serializers.Serializer):
+    """Date range for daily analytics"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['end'] < data['start']:
+            raise serializers.ValidationError("End date must not be before start date")
+        return data
+
+
+class MovieSearchSerializer(serializers.Serializer):
+    """Query parameters for movie search"""
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
+class BookingEventSerializer(serializers.ModelSerializer):
+    """Serializer for BookingEvent log entries"""
+
+    class Meta:
+        model = BookingEvent
+        fields = ['id', 'event_type', 'show_id', 'seat_number', 'booking_id', 'user_id', 'created_at']
+
+
+class EventTailSerializer(serializers.Serializer):
+    """Query parameters for tailing the event log"""
+    after = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+    show_id = serializers.IntegerField(required=False)
@@ -0,0 +1,133 @@
+"""Setup and cross-shard reads for bookings split across BOOKING_SHARDS.
+
+Routing itself lives in :mod:`booking.db_routers`; this module prepares new
+shard databases and merges per-shard results back into one ordered list.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import prefetch_related_objects
+from .db_routers import booking_aliases, shard_id_floor
+from itertools import islice
+import heapq
+
+
+def reserve_id_range(alias):
+    """Start the shard's booking ids at its floor so ids are unique across shards"""
+    from .models import Booking
+
+    connection = connections[alias]
+    table = Booking._meta.db_table
+    floor = shard_id_floor(alias)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, floor])
+            elif row[0] < floor:
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [floor, table])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)})))",
+                [table, floor]
+            )
+        else:
+            raise ImproperlyConfigured(f'Booking shards are not supported on {connection.vendor}')
+
+
+def prepare_shard(alias):
+    """Create the booking table on a shard and reserve its id range"""
+    call_command('migrate', database=alias, run_syncdb=True, verbosity=0)
+    reserve_id_range(alias)
+
+
+class ScatterGatherList:
+    """Read-only ordered list over the same query run on every booking database.
+
+    Each queryset must already be ordered consistently with `key`. Slicing
+    fetches at most `stop` rows from each database and merges them, so a
+    page costs one bounded query per shard; Django and DRF paginators can
+    use it in place of a queryset.
+    """
+
+    def __init__(self, querysets, key, reverse=False, prefetch=()):
+        self.querysets = querysets
+        self.key = key
+        self.reverse = reverse
+        self.prefetch = prefetch
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start, stop = item.start or 0, item.stop
+        if stop is None:
+            raise ValueError('ScatterGatherList slices need an upper bound')
+        merged = heapq.merge(
+            *(list(queryset[:stop]) for queryset in self.querysets),
+            key=self.key,
+            reverse=self.reverse
+        )
+        rows = list(islice(merged, start, stop))
+        if self.prefetch:
+            # Related shows, movies and users are on the primary, so they
+            # are fetched in bulk rather than joined
+            prefetch_related_objects(rows, *self.prefetch)
+        return rows
+
+
+def scatter(queryset, key, reverse=False, prefetch=()):
+    """Run a Booking queryset on every booking database as one ordered list"""
+    return ScatterGatherList(
+        [queryset.using(alias) for alias in booking_aliases()], key, reverse, prefetch
+    )
+
+
+def iter_joined_rows(queryset, fields, chunk_size=1000, using=None):
+    """Yield tuples of `fields` for a Booking queryset on a shard, in id order.
+
+    Shards cannot join to users and shows, so ``user__`` and ``show__``
+    lookups are resolved with one query per chunk against `using`.
+    """
+    from django.contrib.auth.models import User
+    from .models import Show
+
+    fields = list(fields)
+    related = {
+        'user': (User, [field[6:] for field in fields if field.startswith('user__')]),
+        'show': (Show, [field[6:] for field in fields if field.startswith('show__')]),
+    }
+    columns = [field for field in fields if not field.startswith(('user__', 'show__'))]
+    columns = list(dict.fromkeys(['id', 'user_id', 'show_id'] + columns))
+
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by('id').values(*columns)[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]['id']
+
+        lookups = {}
+        for name, (model, names) in related.items():
+            ids = {row[f'{name}_id'] for row in chunk}
+            lookups[name] = {
+                row['id']: row
+                for row in model.objects.using(using).filter(id__in=ids).values('id', *names)
+            } if names else {}
+
+        for row in chunk:
+            values = []
+            for field in fields:
+                prefix = field[:6]
+                if prefix in ('user__', 'show__'):
+                    values.append(lookups[prefix[:4]].get(row[f'{prefix[:4]}_id'], {}).get(field[6:]))
+                else:
+                    values.append(row[field])
+            yield tuple(values)
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .analytics import StatsService
+from .db_routers import shard_aliases, shard_for_show
+from .search import MovieSearch
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """Run PRAGMA statements for each configured setting"""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS (WAL journaling, busy timeout, sync level) on connect"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if pragmas:
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor, pragmas)
+
+
+@receiver(post_save, sender='booking.Show')
+def update_show_stats(sender, instance, raw=False, **kwargs):
+    """Keep the show's rollup row and its day's capacity in step with the show"""
+    if not raw:
+        StatsService.show_saved(instance)
+
+
+@receiver(pre_delete, sender='booking.Show')
+def remove_show_stats(sender, instance, **kwargs):
+    StatsService.show_deleted(instance)
+
+
+# The delete cascade only reaches bookings on the database of the deleted
+# row; with BOOKING_SHARDS configured they are removed from the shards here
+
+@receiver(pre_delete, sender='booking.Show')
+def delete_sharded_show_bookings(sender, instance, **kwargs):
+    from .models import Booking
+
+    alias = shard_for_show(instance.id)
+    if alias is not None:
+        Booking.objects.using(alias).filter(show_id=instance.id).delete()
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_user_bookings(sender, instance, **kwargs):
+    from .models import Booking
+
+    for alias in shard_aliases():
+        Booking.objects.using(alias).filter(user_id=instance.id).delete()
+
+
+@receiver(post_save, sender='booking.Movie')
+@receiver(post_delete, sender='booking.Movie')
+def invalidate_movie_search(sender, **kwargs):
+    """Rebuild the title index once the change is visible to other processes"""
+    transaction.on_commit(MovieSearch.invalidate)
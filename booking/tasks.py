@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'BOOKING_TASK_WORKERS', 4),
+            thread_name_prefix='booking-task'
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Background task {func.__qualname__} failed: {str(e)}")
+    finally:
+        # Worker threads hold their own connections; don't leak them
+        close_old_connections()
+
+
+def run_async(func, *args, **kwargs):
+    """Run func in a background worker thread, or inline when tasks are eager"""
+    if getattr(settings, 'BOOKING_TASKS_ALWAYS_EAGER', False):
+        return func(*args, **kwargs)
+    _get_executor().submit(_run, func, args, kwargs)
+
+
+def run_async_on_commit(func, *args, **kwargs):
+    """Schedule func in the background once the current transaction commits"""
+    transaction.on_commit(lambda: run_async(func, *args, **kwargs))
@@ -1,11 +1,52 @@
 from django.test import TestCase
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, AnonymousUser
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Movie, Show, Booking
+from django.core.cache import cache
+from django.core import mail
+from django.test import override_settings
+from django.utils import timezone
+from .models import (
+    Movie, Show, Booking, ScreenLayout, WaitlistEntry, IdempotencyKey, ArchivedBooking,
+    ShowStats, MovieDailyStats, ReminderCursor, BookingEvent, Venue, Screen
+)
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+from .seating import FreeRunIndex, SeatIndex
+from .search import MovieSearchIndex
+from .reminders import ReminderScheduler
+from .events import CounterProjection, EventLog, SeatMapProjection
+from .analytics import StatsService
+from .layouts import LayoutCache
+from .pricing import PricingService
+from .throttling import AdmissionQueue
+from .hotshow import HotShowEngine, SeatCommand, SeatUnavailable, engine_for, stop_engines
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from .waitlist import WaitlistService
+from .idempotency import _fingerprint, purge_expired_keys
+from .tokens import TokenRevocationStore
+from .caching import check_shared_cache
+from .pagination import estimate_row_count
+from .db_routers import ReplicaRouter, pin_to_primary, shard_for_show, use_replicas
+from .sharding import prepare_shard
+from .serializers import BulkUserRegistrationSerializer, MovieSerializer, ShowSerializer
+from .accounts import UserImportError
+from .schema import clear_schema_cache, get_schema
+from rest_framework.renderers import JSONRenderer
+import csv
+import gzip
+import json
+import os
+import tempfile
+import time
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
 
 class MovieModelTest(TestCase):
@@ -198,4 +239,1637 @@ class BookingAPITest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class FreeRunIndexTest(TestCase):
+    def test_build_and_incremental_updates(self):
+        index = FreeRunIndex.build(10, [3, 4, 8])
+        self.assertEqual(list(zip(index.starts, index.ends)), [(1, 2), (5, 7), (9, 10)])
+
+        index.occupy(6)
+        self.assertEqual(list(zip(index.starts, index.ends)), [(1, 2), (5, 5), (7, 7), (9, 10)])
+
+        index.release(6)
+        index.release(8)
+        self.assertEqual(list(zip(index.starts, index.ends)), [(1, 2), (5, 10)])
+        self.assertEqual(index.free_count, 8)
+
+    def test_best_block_near_preferred_seat(self):
+        index = FreeRunIndex.build(20, [9, 10, 11])
+        self.assertEqual(index.best_block(3, preferred_seat=10), [6, 7, 8])
+        self.assertEqual(index.best_block(2, preferred_seat=1), [1, 2])
+        self.assertIsNone(index.best_block(10, preferred_seat=10))
+
+
+class BestSeatsBookingAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        self.show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=datetime.now() + timedelta(days=1),
+            total_seats=10
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def test_book_best_seats(self):
+        Booking.objects.create(user=self.user, show=self.show, seat_number=5, status='booked')
+
+        url = reverse('book-best-seats', kwargs={'show_id': self.show.id})
+        response = self.client.post(url, {'quantity': 3, 'preferred_seat': 6}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['seat_numbers'], [6, 7, 8])
+        self.assertEqual(self.show.available_seats, 6)
+
+    def test_book_best_seats_uses_updated_index(self):
+        url = reverse('book-best-seats', kwargs={'show_id': self.show.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'quantity': 4, 'preferred_seat': 10}, format='json')
+
+        single = reverse('book-seat', kwargs={'show_id': self.show.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(single, {'seat_number': 1}, format='json')
+
+        index = SeatIndex.load(self.show)
+        self.assertEqual(list(zip(index.starts, index.ends)), [(2, 6)])
+
+        response = self.client.post(url, {'quantity': 3, 'preferred_seat': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['seat_numbers'], [2, 3, 4])
+
+    def test_lost_release_falls_back_to_database(self):
+        url = reverse('book-best-seats', kwargs={'show_id': self.show.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'quantity': 10}, format='json')
+        # Released without the cached index hearing about it
+        Booking.objects.filter(show=self.show, seat_number__in=[4, 5, 6]).delete()
+
+        response = self.client.post(url, {'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['seat_numbers'], [4, 5, 6])
+
+    def test_book_best_seats_no_block_available(self):
+        for seat in (3, 6, 9):
+            Booking.objects.create(user=self.user, show=self.show, seat_number=seat, status='booked')
+
+        url = reverse('book-best-seats', kwargs={'show_id': self.show.id})
+        response = self.client.post(url, {'quantity': 3}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScreenLayoutTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.layout = ScreenLayout.objects.create(
+            name="Small Screen",
+            rows=[
+                {'label': 'A', 'seats': 6, 'section': 'Front', 'aisles_after': [3]},
+                {'label': 'B', 'seats': 4, 'section': 'Back', 'tier': 'premium'},
+            ]
+        )
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        self.show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=datetime.now() + timedelta(days=1),
+            total_seats=10,
+            layout=self.layout
+        )
+
+    def test_layout_compilation(self):
+        compiled = self.layout.compiled
+        self.assertEqual(self.layout.total_seats, 10)
+        self.assertEqual(compiled['breaks'], [3, 6, 10])
+        self.assertEqual(compiled['left'][4], 0)
+        self.assertEqual(compiled['right'][4], 5)
+        self.assertEqual(compiled['tiers'], ['standard', 'premium'])
+
+    def test_layout_endpoint_supports_etag(self):
+        url = reverse('layout-detail', kwargs={'layout_id': self.layout.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['rows'][1][0], 'B')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_seat_index_respects_aisles_and_rows(self):
+        index = SeatIndex.load(self.show)
+        self.assertEqual(list(zip(index.starts, index.ends)), [(1, 3), (4, 6), (7, 10)])
+        self.assertIsNone(index.best_block(5))
+
+        index.occupy(2)
+        index.release(2)
+        self.assertEqual(list(zip(index.starts, index.ends)), [(1, 3), (4, 6), (7, 10)])
+
+    def test_show_seat_count_must_match_layout(self):
+        self.show.total_seats = 12
+        with self.assertRaises(ValidationError):
+            self.show.save()
+
+    def test_compiled_layout_is_cached_on_commit(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.layout.rows = [{'label': 'A', 'seats': 10}]
+            self.layout.save()
+        self.assertIsNone(cache.get(LayoutCache.cache_key(self.layout.id)))
+        for callback in callbacks:
+            callback()
+        self.assertIsNotNone(cache.get(LayoutCache.cache_key(self.layout.id)))
+
+    def test_layout_edit_bumps_version_and_drops_seat_indexes(self):
+        SeatIndex.load(self.show)
+        version = self.layout.version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.layout.rows = [{'label': 'A', 'seats': 10, 'aisles_after': [5]}]
+            self.layout.save()
+        self.assertEqual(self.layout.version, version + 1)
+        self.assertIsNone(cache.get(SeatIndex.cache_key(self.show.id)))
+        index = SeatIndex.load(self.show)
+        self.assertEqual(list(zip(index.starts, index.ends)), [(1, 5), (6, 10)])
+
+        self.layout.rows = [{'label': 'A', 'seats': 12}]
+        with self.assertRaises(ValidationError):
+            self.layout.save()
+
+
+@override_settings(BOOKING_TASKS_ALWAYS_EAGER=True)
+class WaitlistAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.holder = User.objects.create_user(username='holder', password='testpass123')
+        self.waiter = User.objects.create_user(
+            username='waiter', password='testpass123', email='waiter@example.com'
+        )
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        self.show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=2
+        )
+        self.booking = Booking.objects.create(
+            user=self.holder, show=self.show, seat_number=1, status='booked'
+        )
+        Booking.objects.create(user=self.holder, show=self.show, seat_number=2, status='booked')
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def test_cancellation_offers_seat_to_next_waiter(self):
+        self.authenticate(self.waiter)
+        response = self.client.post(reverse('join-waitlist', kwargs={'show_id': self.show.id}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['position'], 1)
+
+        self.authenticate(self.holder)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', kwargs={'booking_id': self.booking.id}))
+
+        entry = WaitlistEntry.objects.get(user=self.waiter)
+        self.assertEqual(entry.status, 'offered')
+        self.assertEqual(entry.offered_seat, 1)
+        self.assertEqual(mail.outbox[-1].to, ['waiter@example.com'])
+
+        # The held seat can only be booked by the waiter
+        url = reverse('book-seat', kwargs={'show_id': self.show.id})
+        self.authenticate(self.other)
+        response = self.client.post(url, {'seat_number': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.authenticate(self.waiter)
+        response = self.client.post(url, {'seat_number': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'accepted')
+
+        # The seat already has a cancelled booking; cancelling again is routine
+        booking_id = response.data['booking']['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('cancel-booking', kwargs={'booking_id': booking_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            Booking.objects.filter(show=self.show, seat_number=1, status='cancelled').count(), 2
+        )
+
+    def test_expired_hold_passes_to_next_waiter(self):
+        WaitlistEntry.objects.create(
+            show=self.show, user=self.waiter, status='offered', offered_seat=1,
+            hold_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        next_entry = WaitlistEntry.objects.create(show=self.show, user=self.other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(WaitlistService.expire_holds(), 1)
+
+        next_entry.refresh_from_db()
+        self.assertEqual(next_entry.status, 'offered')
+        self.assertEqual(next_entry.offered_seat, 1)
+
+    def test_cannot_join_when_seats_available(self):
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        self.authenticate(self.waiter)
+        response = self.client.post(reverse('join-waitlist', kwargs={'show_id': self.show.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_held_seats_count_as_unavailable_for_join(self):
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        WaitlistEntry.objects.create(
+            show=self.show, user=self.waiter, status='offered', offered_seat=1,
+            hold_expires_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        self.authenticate(self.other)
+        url = reverse('join-waitlist', kwargs={'show_id': self.show.id})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(WaitlistEntry.objects.filter(user=self.other).count(), 1)
+
+    def test_hold_rechecked_inside_booking_transaction(self):
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        # The seat is offered to the waiter between validation and the insert
+        self.authenticate(self.other)
+        with mock.patch.object(
+            WaitlistService, 'seat_holders', side_effect=[[], [self.waiter.id]]
+        ):
+            response = self.client.post(
+                reverse('book-seat', kwargs={'show_id': self.show.id}),
+                {'seat_number': 1}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.filter(user=self.other).exists())
+
+class AdmissionControlTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        self.show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=100
+        )
+        self.url = reverse('book-seat', kwargs={'show_id': self.show.id})
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    @override_settings(BOOKING_ADMISSION={'USER_RATE': 0.01, 'USER_BURST': 2})
+    def test_user_token_bucket(self):
+        self.authenticate(self.user)
+        for seat in (1, 2):
+            response = self.client.post(self.url, {'seat_number': seat}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(self.url, {'seat_number': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(BOOKING_ADMISSION={'SHOW_RATE': 0.01, 'SHOW_BURST': 1, 'MAX_QUEUE': 1})
+    def test_show_virtual_queue(self):
+        self.authenticate(self.user)
+        response = self.client.post(self.url, {'seat_number': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.authenticate(other)
+        response = self.client.post(self.url, {'seat_number': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.data['queue_position'], 1)
+
+        # A retry keeps its ticket instead of joining the back of the queue
+        response = self.client.post(self.url, {'seat_number': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.data['queue_position'], 1)
+
+        self.authenticate(User.objects.create_user(username='third', password='testpass123'))
+        response = self.client.post(self.url, {'seat_number': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(Booking.objects.filter(seat_number__in=[2, 3]).exists())
+
+        # Once the ticket's slot comes up its holder is admitted
+        cache.set(AdmissionQueue(self.show.id).ticket_key(other.pk), time.time() - 1)
+        self.authenticate(other)
+        response = self.client.post(self.url, {'seat_number': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class IdempotencyKeyTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        self.show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=100
+        )
+        self.url = reverse('book-seat', kwargs={'show_id': self.show.id})
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+    def test_retry_replays_stored_response(self):
+        first = self.client.post(
+            self.url, {'seat_number': 1}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123'
+        )
+        retry = self.client.post(
+            self.url, {'seat_number': 1}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123'
+        )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['booking']['id'], first.data['booking']['id'])
+        self.assertEqual(Booking.objects.filter(show=self.show).count(), 1)
+
+    def test_key_reused_for_different_request(self):
+        self.client.post(self.url, {'seat_number': 1}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        response = self.client.post(
+            self.url, {'seat_number': 2}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123'
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_retry_while_pending_is_rejected(self):
+        body = {'seat_number': 1}
+        IdempotencyKey.objects.create(
+            user=self.user, key='abc-123',
+            request_fingerprint=_fingerprint(SimpleNamespace(method='POST', path=self.url, data=body)),
+            expires_at=timezone.now() + timedelta(seconds=30)
+        )
+        response = self.client.post(self.url, body, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(Booking.objects.filter(show=self.show).exists())
+
+    def test_failed_booking_is_not_stored(self):
+        with mock.patch('booking.views.StatsService.seats_booked', side_effect=RuntimeError):
+            failed = self.client.post(
+                self.url, {'seat_number': 1}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123'
+            )
+        retry = self.client.post(
+            self.url, {'seat_number': 1}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123'
+        )
+
+        self.assertEqual(failed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', retry)
+
+    def test_expired_keys_are_purged(self):
+        IdempotencyKey.objects.create(
+            user=self.user, key='old', request_fingerprint='x', status_code=201,
+            response_body={}, expires_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(purge_expired_keys(), 1)
+
+
+class ArchiveBookingsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        self.past_show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() - timedelta(days=10),
+            total_seats=100
+        )
+        self.upcoming_show = Show.objects.create(
+            movie=self.movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=100
+        )
+        for seat in (1, 2, 3):
+            Booking.objects.create(user=self.user, show=self.past_show, seat_number=seat)
+        self.active = Booking.objects.create(user=self.user, show=self.upcoming_show, seat_number=1)
+
+    def test_archive_moves_past_bookings(self):
+        call_command('archive_bookings', chunk_size=2, stdout=StringIO())
+
+        self.assertEqual(list(Booking.objects.values_list('id', flat=True)), [self.active.id])
+        self.assertEqual(ArchivedBooking.objects.filter(user=self.user).count(), 3)
+
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        response = self.client.get(reverse('user-bookings'))
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get(reverse('user-bookings'), {'archived': 'true'})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['results'][0]['movie_title'], 'Test Movie')
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.force_login(self.admin)
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+
+    def add_shows_with_bookings(self, count):
+        for i in range(count):
+            show = Show.objects.create(
+                movie=Movie.objects.create(title=f"Movie {i}", duration_minutes=100),
+                screen_name=f"Screen {i}",
+                date_time=timezone.now() + timedelta(days=1),
+                total_seats=100
+            )
+            Booking.objects.create(user=self.admin, show=show, seat_number=1)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelists_use_constant_queries(self):
+        for url in ('/admin/booking/show/', '/admin/booking/booking/'):
+            self.add_shows_with_bookings(2)
+            few = self.changelist_queries(url)
+            self.add_shows_with_bookings(8)
+            many = self.changelist_queries(url)
+            self.assertEqual(few, many, url)
+
+        self.assertGreaterEqual(estimate_row_count(Booking), Booking.objects.count())
+
+
+@override_settings(REPLICA_DATABASES=['replica_1', 'replica_2'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.router = ReplicaRouter()
+
+    def test_reads_use_replica_only_inside_block(self):
+        self.assertIsNone(self.router.db_for_read(Movie))
+        with use_replicas(self.user):
+            self.assertIn(self.router.db_for_read(Movie), ['replica_1', 'replica_2'])
+            self.assertEqual(self.router.db_for_write(Movie), 'default')
+        self.assertIsNone(self.router.db_for_read(Movie))
+
+    def test_user_is_pinned_to_primary_after_write(self):
+        pin_to_primary(self.user)
+        with use_replicas(self.user):
+            self.assertIsNone(self.router.db_for_read(Booking))
+        with use_replicas(AnonymousUser()):
+            self.assertIsNotNone(self.router.db_for_read(Booking))
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'booking'))
+        self.assertIsNone(self.router.allow_migrate('default', 'booking'))
+
+
+class FlatListSerializerTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movie = Movie.objects.create(
+            title="Test Movie",
+            duration_minutes=120
+        )
+        for i in range(3):
+            show = Show.objects.create(
+                movie=self.movie,
+                screen_name=f"Screen {i}",
+                date_time=timezone.now() + timedelta(days=i + 1),
+                total_seats=50
+            )
+            Booking.objects.create(user=self.user, show=show, seat_number=i + 1)
+
+    def assertMatchesModelSerializer(self, response, serializer):
+        expected = json.loads(JSONRenderer().render(serializer.data))
+        self.assertEqual(response.json()['results'], expected)
+
+    def test_movie_list_matches_model_serializer(self):
+        response = self.client.get(reverse('movie-list'))
+        self.assertMatchesModelSerializer(
+            response, MovieSerializer(Movie.objects.all(), many=True)
+        )
+
+    def test_movie_shows_match_model_serializer(self):
+        url = reverse('movie-shows', kwargs={'movie_id': self.movie.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertLessEqual(len(context.captured_queries), 5)
+        self.assertMatchesModelSerializer(
+            response, ShowSerializer(Show.objects.filter(movie=self.movie), many=True)
+        )
+
+
+class LazyDocsTest(APITestCase):
+    def test_schema_includes_declared_docs(self):
+        response = self.client.get('/swagger/?format=openapi')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        schema = json.loads(response.content)
+        login = schema['paths']['/login/']['post']['responses']['200']
+        self.assertEqual(login['schema']['$ref'], '#/definitions/LoginResponse')
+        book_params = schema['paths']['/shows/{show_id}/book/']['post']['parameters']
+        self.assertIn('Idempotency-Key', [param['name'] for param in book_params])
+
+    def test_docs_ui_is_served(self):
+        self.assertEqual(self.client.get('/redoc/').status_code, status.HTTP_200_OK)
+
+
+class CachedSchemaTest(APITestCase):
+    def setUp(self):
+        clear_schema_cache()
+
+    def tearDown(self):
+        clear_schema_cache()
+
+    def test_schema_generated_once_and_supports_etag(self):
+        self.assertIs(get_schema(), get_schema())
+        response = self.client.get(reverse('schema-json'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], get_schema().etag)
+
+        response = self.client.get(reverse('schema-json'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_prebuilt_schema_file_is_served(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openapi.json')
+            call_command('build_openapi_schema', output=path, stdout=StringIO())
+            with open(path, 'rb') as schema_file:
+                body = schema_file.read()
+            self.assertIn('/login/', json.loads(body)['paths'])
+
+            with override_settings(OPENAPI_SCHEMA_FILE=path):
+                response = self.client.get(reverse('schema-json'))
+        self.assertEqual(response.content, body)
+
+
+class BookingExportTest(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=50
+        )
+        for seat in range(1, 6):
+            Booking.objects.create(user=self.user, show=self.show, seat_number=seat)
+        self.today = timezone.now().date().isoformat()
+        self.url = reverse('export-bookings')
+
+    def test_staff_streams_csv(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.url, {'start': self.today, 'end': self.today})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([int(row['seat_number']) for row in rows], [1, 2, 3, 4, 5])
+        self.assertEqual(rows[0]['movie_title'], 'Test Movie')
+
+    def test_gzipped_ndjson(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(
+            self.url, {'start': self.today, 'end': self.today, 'output': 'ndjson', 'gzip': 'true'}
+        )
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])['username'], 'testuser')
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'start': self.today, 'end': self.today})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bookings.csv')
+            call_command(
+                'export_bookings', start=self.today, end=self.today, output=path, stderr=StringIO()
+            )
+            with open(path) as export_file:
+                self.assertEqual(len(export_file.read().splitlines()), 6)
+
+
+class AnalyticsRollupTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        show_time = timezone.now() + timedelta(days=1)
+        self.show = Show.objects.create(
+            movie=self.movie, screen_name="Screen 1", date_time=show_time, total_seats=10
+        )
+        Show.objects.create(
+            movie=self.movie, screen_name="Screen 2", date_time=show_time, total_seats=30
+        )
+
+    def book(self, seat_number):
+        self.client.force_authenticate(user=self.user)
+        # Rollups are written once the booking commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('book-seat', kwargs={'show_id': self.show.id}), {'seat_number': seat_number}
+            )
+
+    def test_rollups_follow_bookings_and_cancellations(self):
+        for seat in (1, 2, 3):
+            self.book(seat)
+        booking = Booking.objects.get(show=self.show, seat_number=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', kwargs={'booking_id': booking.id}))
+
+        stats = ShowStats.objects.get(show=self.show)
+        self.assertEqual((stats.capacity, stats.booked_seats, stats.cancellations), (10, 2, 1))
+        daily = MovieDailyStats.objects.get(movie=self.movie)
+        self.assertEqual((daily.shows, daily.capacity, daily.booked_seats), (2, 40, 2))
+
+        self.client.force_authenticate(user=self.staff)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('movie-daily-stats', kwargs={'movie_id': self.movie.id}))
+        self.assertLessEqual(len(context.captured_queries), 2)
+        self.assertEqual(response.data['days'][0]['occupancy'], 0.05)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        for seat in (1, 2):
+            self.book(seat)
+        incremental = list(MovieDailyStats.objects.values('shows', 'capacity', 'booked_seats'))
+
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(
+            list(MovieDailyStats.objects.values('shows', 'capacity', 'booked_seats')), incremental
+        )
+        self.assertEqual(ShowStats.objects.get(show=self.show).booked_seats, 2)
+
+    def test_rollup_deltas_are_batched_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            StatsService.seats_booked(self.show, 2)
+            StatsService.seats_cancelled(self.show)
+        # Nothing touches the rollup rows inside the booking transaction
+        self.assertEqual(ShowStats.objects.get(show=self.show).booked_seats, 0)
+
+        # Deltas committed while another thread is writing join its next batch
+        with StatsService._flush_lock:
+            for callback in callbacks:
+                callback()
+            self.assertEqual(ShowStats.objects.get(show=self.show).booked_seats, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            StatsService.seats_booked(self.show)
+        stats = ShowStats.objects.get(show=self.show)
+        self.assertEqual((stats.booked_seats, stats.cancellations), (2, 1))
+        self.assertEqual(MovieDailyStats.objects.get(movie=self.movie).booked_seats, 2)
+
+    def test_analytics_requires_staff(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('show-stats', kwargs={'show_id': self.show.id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MovieSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for title in ["Avengers: Endgame", "The Avengers", "Avatar", "The Dark Knight"]:
+            Movie.objects.create(title=title, duration_minutes=120)
+
+    def test_index_prefix_and_typo_matching(self):
+        index = MovieSearchIndex([(1, "Avengers: Endgame"), (2, "The Avengers"), (3, "Avatar")])
+        self.assertEqual([result[0] for result in index.search("aven")], [1, 2])
+        self.assertEqual([result[0] for result in index.search("avengrs endgam")], [1])
+        self.assertEqual([result[0] for result in index.search("av")], [3, 1, 2])
+        self.assertEqual(index.search("zzz"), [])
+
+    def test_search_endpoint_ranks_results(self):
+        response = self.client.get(reverse('movie-search'), {'q': 'the avngers'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([movie['title'] for movie in response.data['results']], ["The Avengers"])
+        self.assertEqual(response.data['results'][0]['shows_count'], 0)
+
+    def test_index_rebuilt_after_movie_change(self):
+        self.client.get(reverse('movie-search'), {'q': 'inception'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Movie.objects.create(title="Inception", duration_minutes=148)
+        response = self.client.get(reverse('movie-search'), {'q': 'incep'})
+        self.assertEqual([movie['title'] for movie in response.data['results']], ["Inception"])
+
+
+class TokenRevocationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def test_refresh_rotates_and_revokes_old_token(self):
+        url = reverse('token-refresh')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertNotEqual(response.data['refresh'], str(self.refresh))
+
+        response = self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_can_be_claimed_once(self):
+        self.assertTrue(TokenRevocationStore.claim(self.refresh))
+        self.assertFalse(TokenRevocationStore.claim(self.refresh))
+        self.assertTrue(TokenRevocationStore.is_revoked(self.refresh))
+
+    def test_local_cache_flagged_by_deploy_check(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['booking.E001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_logout_revokes_refresh_and_access_tokens(self):
+        access = str(self.refresh.access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.post(reverse('user-logout'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            self.client.get(reverse('user-bookings')).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.client.credentials()
+        response = self.client.post(reverse('token-refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ReminderSchedulerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.now = timezone.now()
+
+    def book_show(self, hours_ahead, screen_name):
+        show = Show.objects.create(
+            movie=self.movie,
+            screen_name=screen_name,
+            date_time=self.now + timedelta(hours=hours_ahead),
+            total_seats=50
+        )
+        return Booking.objects.create(user=self.user, show=show, seat_number=1)
+
+    def test_each_booking_reminded_once_as_window_slides(self):
+        scheduler = ReminderScheduler(send_rate=0)
+        ReminderCursor.objects.create(name='default', high_water_mark=self.now)
+        self.book_show(2, "Screen 1")
+        self.book_show(25, "Screen 2")
+
+        self.assertEqual(scheduler.tick(now=self.now), (1, 0))
+        self.assertEqual(scheduler.tick(now=self.now + timedelta(minutes=30)), (0, 0))
+        self.assertEqual(scheduler.tick(now=self.now + timedelta(hours=2)), (1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_late_booking_reminded_on_next_tick(self):
+        scheduler = ReminderScheduler(send_rate=0)
+        ReminderCursor.objects.create(name='default', high_water_mark=self.now)
+        self.book_show(2, "Screen 1")
+        self.assertEqual(scheduler.tick(now=self.now), (1, 0))
+
+        # Booked after the show entered the window
+        late = Booking.objects.create(
+            user=self.user, show=Show.objects.get(screen_name="Screen 1"), seat_number=2
+        )
+        self.assertEqual(scheduler.tick(now=self.now + timedelta(minutes=1)), (1, 0))
+        self.assertEqual(scheduler.tick(now=self.now + timedelta(minutes=2)), (0, 0))
+        self.assertIsNotNone(Booking.objects.get(pk=late.pk).reminded_at)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_leased_cursor_is_skipped(self):
+        ReminderCursor.objects.create(
+            name='default', high_water_mark=self.now, lease_owner='other',
+            leased_until=timezone.now() + timedelta(minutes=5)
+        )
+        self.book_show(2, "Screen 1")
+        self.assertEqual(ReminderScheduler(send_rate=0).tick(now=self.now), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_new_cursor_starts_at_leading_edge(self):
+        self.book_show(2, "Screen 1")
+        call_command('send_reminder_emails', once=True, rate=0, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        cursor = ReminderCursor.objects.get(name='default')
+        self.assertGreater(cursor.high_water_mark, self.now + timedelta(hours=23))
+
+
+@override_settings(BOOKING_TASKS_ALWAYS_EAGER=True)
+@override_settings(EVENT_LOG_COMMIT_LAG_SECONDS=0)
+class BookingEventLogTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.waiter = User.objects.create_user(
+            username='waiter', email='waiter@example.com', password='testpass123'
+        )
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=3
+        )
+
+    def test_write_paths_append_events_and_replay(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            reverse('book-best-seats', kwargs={'show_id': self.show.id}), {'quantity': 3}
+        )
+        WaitlistService.join(self.show, self.waiter)
+        booking = Booking.objects.get(show=self.show, seat_number=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', kwargs={'booking_id': booking.id}))
+
+        self.assertEqual(
+            list(BookingEvent.objects.values_list('event_type', flat=True)),
+            ['booked', 'booked', 'booked', 'cancelled', 'hold_offered']
+        )
+        seat_map = SeatMapProjection().replay(show_id=self.show.id)
+        self.assertEqual(seat_map.snapshot(self.show.id), {'booked': [1, 3], 'held': [2]})
+        counters = CounterProjection().replay()
+        self.assertEqual(
+            counters.snapshot(self.show.id), {'booked_seats': 2, 'cancellations': 1}
+        )
+
+    def test_consumer_tails_in_batches(self):
+        EventLog.record('booked', self.show.id, [1, 2, 3], user_id=self.user.id)
+        seen = []
+        self.assertEqual(EventLog.consume('audit', seen.extend, batch_size=2), 2)
+        self.assertEqual(EventLog.consume('audit', seen.extend, batch_size=2), 1)
+        self.assertEqual(EventLog.consume('audit', seen.extend, batch_size=2), 0)
+        self.assertEqual([event.seat_number for event in seen], [1, 2, 3])
+
+        with self.assertRaises(ValueError):
+            seen[0].save()
+
+    @override_settings(EVENT_LOG_COMMIT_LAG_SECONDS=5)
+    def test_tail_stops_below_events_inside_commit_lag(self):
+        settled = EventLog.record('booked', self.show.id, [1, 2])
+        BookingEvent.objects.filter(id__in=[event.id for event in settled]).update(
+            created_at=timezone.now() - timedelta(seconds=10)
+        )
+        EventLog.record('booked', self.show.id, [3])
+        late = EventLog.record('booked', self.show.id, [4])
+        BookingEvent.objects.filter(id=late[0].id).update(
+            created_at=timezone.now() - timedelta(seconds=10)
+        )
+
+        self.assertEqual([event.seat_number for event in EventLog.tail()], [1, 2])
+
+
+class DynamicPricingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        layout = ScreenLayout.objects.create(
+            name="Small Screen",
+            rows=[
+                {'label': 'A', 'seats': 6},
+                {'label': 'B', 'seats': 4, 'tier': 'premium'},
+            ]
+        )
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=10,
+            layout=layout,
+            base_price=Decimal('10.00'),
+            pricing_rules={
+                'tiers': {'premium': 1.5},
+                'surge': [{'occupancy': 0.5, 'multiplier': 1.2}]
+            }
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_price_locked_in_and_surges_past_threshold(self):
+        url = reverse('book-best-seats', kwargs={'show_id': self.show.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'quantity': 5, 'preferred_seat': 1}, format='json')
+        self.assertEqual(
+            [booking['price'] for booking in response.data['bookings']], ['10.00'] * 5
+        )
+
+        response = self.client.post(
+            reverse('book-seat', kwargs={'show_id': self.show.id}), {'seat_number': 9}
+        )
+        self.assertEqual(response.data['booking']['price'], '18.00')
+
+        pricing = self.client.get(
+            reverse('show-seat-map', kwargs={'show_id': self.show.id})
+        ).data['pricing']
+        self.assertEqual(pricing['surge_level'], 1)
+        self.assertEqual(pricing['tier_prices'], {'standard': '12.00', 'premium': '18.00'})
+
+    def test_price_lookup_is_query_free_when_cached(self):
+        PricingService.price_for(self.show, 1)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(PricingService.price_for(self.show, 7), Decimal('15.00'))
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_invalid_pricing_rules_rejected(self):
+        for rules in (
+            {'surge': [{'occupancy': 1.5, 'multiplier': 2}]},
+            {'surge': [{'occupancy': '0.5', 'multiplier': 2}]},
+            {'surge': [{'occupancy': 0.5, 'multiplier': 'x'}]},
+            {'tiers': {'premium': True}},
+        ):
+            self.show.pricing_rules = rules
+            with self.assertRaises(ValidationError):
+                self.show.full_clean()
+
+
+class VenueTest(APITestCase):
+    def setUp(self):
+        self.movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.other_movie = Movie.objects.create(title="Other Movie", duration_minutes=90)
+        self.downtown = Venue.objects.create(name="Downtown", slug="downtown")
+        self.uptown = Venue.objects.create(name="Uptown", slug="uptown")
+        self.show_time = timezone.now() + timedelta(days=1)
+
+    def create_show(self, venue, movie, hours=0):
+        screen, _ = Screen.objects.get_or_create(venue=venue, name="Screen 1")
+        return Show.objects.create(
+            movie=movie,
+            screen=screen,
+            date_time=self.show_time + timedelta(hours=hours),
+            total_seats=50
+        )
+
+    def test_shows_are_scoped_to_their_venue(self):
+        # The same screen name and time at two venues does not clash
+        downtown_show = self.create_show(self.downtown, self.movie)
+        self.create_show(self.uptown, self.movie)
+        self.create_show(self.downtown, self.other_movie, hours=3)
+        self.assertEqual(downtown_show.venue, self.downtown)
+        self.assertEqual(downtown_show.screen_name, "Screen 1")
+
+        url = reverse('venue-shows', kwargs={'venue_id': self.downtown.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(all(show['venue'] == self.downtown.id for show in response.data['results']))
+
+        response = self.client.get(url, {'movie': self.movie.id})
+        self.assertEqual([show['id'] for show in response.data['results']], [downtown_show.id])
+
+        response = self.client.get(reverse('venue-shows', kwargs={'venue_id': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_venue_movies_count_only_that_venues_shows(self):
+        self.create_show(self.downtown, self.movie)
+        self.create_show(self.downtown, self.movie, hours=3)
+        self.create_show(self.uptown, self.movie)
+        self.create_show(self.uptown, self.other_movie, hours=3)
+
+        response = self.client.get(reverse('venue-movies', kwargs={'venue_id': self.downtown.id}))
+        movies = response.data['results']
+        self.assertEqual([movie['title'] for movie in movies], ["Test Movie"])
+        self.assertEqual(movies[0]['shows_count'], 2)
+
+    def test_screen_edits_reach_its_shows(self):
+        show = self.create_show(self.downtown, self.movie)
+        screen = show.screen
+        layout = ScreenLayout.objects.create(name="Fifty", rows=[{'label': 'A', 'seats': 50}])
+        screen.venue = self.uptown
+        screen.name = "Screen 9"
+        screen.layout = layout
+        with self.captureOnCommitCallbacks(execute=True):
+            screen.save()
+
+        show.refresh_from_db()
+        self.assertEqual(show.venue, self.uptown)
+        self.assertEqual(show.screen_name, "Screen 9")
+        self.assertEqual(show.layout, layout)
+        new_show = Show.objects.create(
+            movie=self.other_movie, screen=screen,
+            date_time=self.show_time + timedelta(hours=3), total_seats=50
+        )
+        self.assertEqual(new_show.layout, layout)
+
+        # A layout whose seat count doesn't match the screen's shows is refused
+        screen.layout = ScreenLayout.objects.create(name="Ten", rows=[{'label': 'A', 'seats': 10}])
+        with self.assertRaises(ValidationError):
+            screen.save()
+
+    def test_convert_screen_names_assigns_legacy_shows(self):
+        for i, name in enumerate(["Screen 1", "Screen 1", "Screen 2"]):
+            Show.objects.create(
+                movie=self.movie,
+                screen_name=name,
+                date_time=self.show_time + timedelta(hours=i),
+                total_seats=50
+            )
+
+        out = StringIO()
+        call_command('convert_screen_names', venue="Main Street", stdout=out)
+
+        venue = Venue.objects.get(slug='main-street')
+        self.assertEqual(
+            sorted(venue.screens.values_list('name', flat=True)), ["Screen 1", "Screen 2"]
+        )
+        self.assertFalse(Show.objects.filter(venue__isnull=True).exists())
+        self.assertTrue(all(show.screen.name == show.screen_name for show in venue.shows.all()))
+        self.assertIn('Shows converted: 3', out.getvalue())
+
+
+class ShardedBookingTest(APITestCase):
+    """Bookings split over two SQLite shard files"""
+    shards = ['booking_shard_1', 'booking_shard_2']
+
+    def setUp(self):
+        cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for alias in self.shards:
+            connections.settings[alias] = dict(
+                connections.settings['default'], NAME=os.path.join(self.tmpdir.name, f'{alias}.sqlite3')
+            )
+        settings_override = override_settings(BOOKING_SHARDS=self.shards)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for alias in self.shards:
+            prepare_shard(alias)
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.shows = [
+            Show.objects.create(
+                movie=movie,
+                screen_name=f"Screen {i}",
+                date_time=timezone.now() + timedelta(days=1),
+                total_seats=20
+            )
+            for i in range(2)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        for alias in self.shards:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        self.tmpdir.cleanup()
+
+    def book(self, show, seat_number):
+        return self.client.post(
+            reverse('book-seat', kwargs={'show_id': show.id}), {'seat_number': seat_number}
+        )
+
+    def test_bookings_are_pinned_to_their_shows_shard(self):
+        first, second = self.shows
+        self.assertNotEqual(shard_for_show(first.id), shard_for_show(second.id))
+
+        booking_id = self.book(first, 1).data['booking']['id']
+        response = self.client.post(
+            reverse('book-best-seats', kwargs={'show_id': second.id}), {'quantity': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.book(first, 1).status_code, status.HTTP_400_BAD_REQUEST)
+
+        for show, seats in ((first, 1), (second, 2)):
+            self.assertEqual(
+                Booking.objects.using(shard_for_show(show.id)).filter(show_id=show.id).count(), seats
+            )
+            self.assertEqual(len(show.booked_seat_numbers), seats)
+        self.assertFalse(Booking.objects.using('default').exists())
+
+        # The booking id identifies its shard
+        response = self.client.post(reverse('cancel-booking', kwargs={'booking_id': booking_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.booked_seat_numbers, [])
+
+    def test_user_bookings_merge_shards_newest_first(self):
+        for seat in range(1, 4):
+            for show in self.shows:
+                self.book(show, seat)
+
+        response = self.client.get(reverse('user-bookings'))
+        self.assertEqual(response.data['count'], 6)
+        created = [booking['created_at'] for booking in response.data['results']]
+        self.assertEqual(created, sorted(created, reverse=True))
+        self.assertEqual(
+            {booking['show_details']['id'] for booking in response.data['results']},
+            {show.id for show in self.shows}
+        )
+
+    def test_export_and_stats_rebuild_read_every_shard(self):
+        for show in self.shows:
+            self.book(show, 1)
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(
+            [ShowStats.objects.get(show=show).booked_seats for show in self.shows], [1, 1]
+        )
+
+        self.client.force_authenticate(user=self.staff)
+        today = timezone.now().date().isoformat()
+        response = self.client.get(reverse('export-bookings'), {'start': today, 'end': today})
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['username'] for row in rows}, {'testuser'})
+        self.assertEqual({row['movie_title'] for row in rows}, {'Test Movie'})
+
+    def test_deleting_show_or_user_removes_sharded_bookings(self):
+        first, second = self.shows
+        self.book(first, 1)
+        self.book(second, 1)
+
+        first.delete()
+        self.assertFalse(Booking.objects.using(shard_for_show(first.id)).exists())
+        self.assertTrue(Booking.objects.using(shard_for_show(second.id)).exists())
+
+        self.user.delete()
+        self.assertFalse(
+            any(Booking.objects.using(alias).exists() for alias in self.shards)
+        )
+
+    def test_admin_uses_stats_and_hides_bookings(self):
+        admin_user = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.force_login(admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.shows[0], 1)
+
+        response = self.client.get(reverse('admin:booking_show_changelist'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, '<td class="field-available_seats">19</td>', html=True)
+        response = self.client.get(reverse('admin:booking_booking_changelist'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProfilingTest(APITestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=10
+        )
+        self.url = reverse('show-seat-map', kwargs={'show_id': self.show.id})
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def run_dir(self, response):
+        return os.path.join(self.tmpdir.name, response['X-Profile-Id'])
+
+    def test_staff_header_writes_profile_and_sql_log(self):
+        self.authenticate(self.staff)
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.tmpdir.name):
+            response = self.client.get(self.url, HTTP_X_PROFILE='cprofile')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        run_dir = self.run_dir(response)
+        self.assertTrue(os.path.exists(os.path.join(run_dir, 'profile.prof')))
+        with open(os.path.join(run_dir, 'queries.json')) as f:
+            queries = json.load(f)
+        self.assertTrue(any('booking_show' in query['sql'] for query in queries))
+        with open(os.path.join(run_dir, 'summary.json')) as f:
+            summary = json.load(f)
+        self.assertEqual(summary['status'], 200)
+        self.assertEqual(summary['query_count'], len(queries))
+
+    def test_header_ignored_for_non_staff_and_when_disabled(self):
+        self.authenticate(self.user)
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.tmpdir.name):
+            response = self.client.get(self.url, HTTP_X_PROFILE='sample')
+        self.assertNotIn('X-Profile-Id', response)
+
+        # Middleware is loaded per client; a new one sees profiling disabled
+        self.client = self.client_class()
+        self.authenticate(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='sample')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_profiling_paths_setting_samples_stacks(self):
+        with self.settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=self.tmpdir.name, PROFILING_PATHS=['/shows/']
+        ):
+            response = self.client.get(self.url)
+        self.assertTrue(os.path.exists(os.path.join(self.run_dir(response), 'stacks.folded')))
+
+    def test_profile_command(self):
+        out = StringIO()
+        call_command(
+            'profile_command', 'rebuild_stats', mode='cprofile', output_dir=self.tmpdir.name, stdout=out
+        )
+        self.assertIn('Profile written to', out.getvalue())
+        [run_id] = os.listdir(self.tmpdir.name)
+        with open(os.path.join(self.tmpdir.name, run_id, 'summary.json')) as f:
+            summary = json.load(f)
+        self.assertEqual(summary['label'], 'command rebuild_stats')
+        self.assertGreater(summary['query_count'], 0)
+
+
+@override_settings(BOOKING_TASKS_ALWAYS_EAGER=True)
+class UserBookingsSyncTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=10
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('user-bookings')
+
+    def book(self, seat_number):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('book-seat', kwargs={'show_id': self.show.id}), {'seat_number': seat_number}
+            ).data['booking']
+
+    def test_unchanged_bookings_answer_304_without_queries(self):
+        self.book(1)
+        etag = self.client.get(self.url)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any('booking_booking' in query['sql'] for query in context.captured_queries))
+
+        self.book(2)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_show_and_movie_edits_change_etag_and_since(self):
+        booking = self.book(1)
+        etag = self.client.get(self.url)['ETag']
+        since = booking['updated_at']
+
+        self.show.date_time += timedelta(hours=2)
+        self.show.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with override_settings(BOOKINGS_SYNC_LAG_SECONDS=0):
+            self.show.movie.title = "Renamed Movie"
+            self.show.movie.save()
+            response = self.client.get(self.url, {'since': since}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['results']], [booking['id']])
+
+    def test_etag_depends_on_query(self):
+        self.book(1)
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'archived': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cancellation_changes_etag(self):
+        booking = self.book(1)
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', kwargs={'booking_id': booking['id']}))
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK
+        )
+
+    @override_settings(BOOKINGS_SYNC_LAG_SECONDS=0)
+    def test_since_returns_only_changed_rows(self):
+        first = self.book(1)
+        second = self.book(2)
+        since = second['updated_at']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cancel-booking', kwargs={'booking_id': first['id']}))
+        third = self.book(3)
+
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(
+            sorted(booking['id'] for booking in response.data['results']),
+            [first['id'], third['id']]
+        )
+        self.assertEqual(response.data['removed_ids'], [])
+
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_since_overlaps_by_sync_lag(self):
+        booking = self.book(1)
+        response = self.client.get(self.url, {'since': booking['updated_at']})
+        self.assertEqual([row['id'] for row in response.data['results']], [booking['id']])
+
+    @override_settings(BOOKINGS_SYNC_LAG_SECONDS=0)
+    def test_bookings_archived_to_file_are_reported_removed(self):
+        booking = self.book(1)
+        since = booking['updated_at']
+        Show.objects.filter(pk=self.show.pk).update(date_time=timezone.now() - timedelta(days=10))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            call_command(
+                'archive_bookings', output=os.path.join(tmpdir, 'bookings.jsonl.gz'), stdout=StringIO()
+            )
+
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['removed_ids'], [booking['id']])
+
+
+@override_settings(BOOKING_TASKS_ALWAYS_EAGER=True, HOT_SHOW_EAGER=True)
+class HotShowTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        movie = Movie.objects.create(title="Premiere", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=10,
+            hot_mode=True
+        )
+        self.url = reverse('book-seat', kwargs={'show_id': self.show.id})
+
+    def tearDown(self):
+        stop_engines()
+
+    def book(self, user, seat_number):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'seat_number': seat_number})
+
+    def test_conflicts_are_checked_in_memory(self):
+        response = self.book(self.user, 1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(engine_for(self.show).booked, {1})
+        self.assertTrue(BookingEvent.objects.filter(
+            event_type='booked', booking_id=response.data['booking']['id'], user_id=self.user.id
+        ).exists())
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.book(self.other, 1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('seat_number', response.data)
+        self.assertFalse(any('booking_booking' in query['sql'] for query in context.captured_queries))
+
+    def test_batch_rejects_duplicates_and_resyncs_stale_state(self):
+        engine = engine_for(self.show)
+        engine.heartbeat()
+        # Booked behind the engine's back, e.g. before the show turned hot
+        Booking.objects.create(user=self.other, show=self.show, seat_number=2)
+
+        commands = [
+            SeatCommand('book', self.user, 2),
+            SeatCommand('book', self.user, 3),
+            SeatCommand('book', self.other, 3),
+        ]
+        for command in commands:
+            command.future.set_running_or_notify_cancel()
+        engine.process(commands)
+
+        self.assertIsInstance(commands[0].future.exception(), SeatUnavailable)
+        self.assertEqual(commands[1].future.result().seat_number, 3)
+        self.assertIsInstance(commands[2].future.exception(), SeatUnavailable)
+        self.assertEqual(engine.booked, {2, 3})
+        self.assertEqual(Booking.objects.filter(show=self.show, status='booked').count(), 2)
+
+    def test_conflicting_booking_fails_alone(self):
+        booking = Booking.objects.create(user=self.other, show=self.show, seat_number=1)
+        engine = engine_for(self.show)
+        engine.heartbeat()
+        Booking.objects.create(user=self.other, show=self.show, seat_number=2)
+
+        commands = [
+            SeatCommand('cancel', self.other, 1, booking),
+            SeatCommand('book', self.user, 2),
+            SeatCommand('book', self.user, 3),
+        ]
+        for command in commands:
+            command.future.set_running_or_notify_cancel()
+        engine.process(commands)
+
+        self.assertEqual(commands[0].future.result().status, 'cancelled')
+        self.assertIsInstance(commands[1].future.exception(), SeatUnavailable)
+        self.assertEqual(commands[2].future.result().seat_number, 3)
+        self.assertEqual(engine.booked, {2, 3})
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'cancelled')
+
+    def test_retryable_without_the_lease(self):
+        cache.set(HotShowEngine.lease_key(self.show.id), 'another-process')
+        response = self.book(self.user, 1)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Booking.objects.exists())
+
+        # The owner died: its lease expires and this process takes over
+        cache.delete(HotShowEngine.lease_key(self.show.id))
+        response = self.book(self.user, 1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        engine = engine_for(self.show)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('cancel-booking', kwargs={'booking_id': response.data['booking']['id']})
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Booking.objects.get().status, 'cancelled')
+        self.assertEqual(engine.booked, set())
+
+    def test_block_allocation_refused_while_hot(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('book-best-seats', kwargs={'show_id': self.show.id}), {'quantity': 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+
+
+class BulkRegistrationTest(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.force_authenticate(user=self.staff)
+        self.url = reverse('user-bulk-signup')
+
+    def rows(self, *usernames):
+        return [
+            {'username': username, 'email': f'{username}@corp.example', 'password': 'employeepass1'}
+            for username in usernames
+        ]
+
+    def test_creates_users_with_hashed_passwords(self):
+        response = self.client.post(self.url, {'users': self.rows('alice', 'bob', 'carol')}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([user['username'] for user in response.data['users']], ['alice', 'bob', 'carol'])
+
+        alice = User.objects.get(username='alice')
+        self.assertEqual(alice.email, 'alice@corp.example')
+        self.assertTrue(alice.check_password('employeepass1'))
+        self.assertNotEqual(alice.password, 'employeepass1')
+
+    def test_invalid_batch_creates_nobody(self):
+        rows = self.rows('alice', 'staff', 'alice') + [{'username': 'dave', 'password': 'short'}]
+        response = self.client.post(self.url, {'users': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.data['users'][3])
+
+        response = self.client.post(self.url, {'users': self.rows('alice', 'staff', 'alice')}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['users']), 2)
+        self.assertEqual(User.objects.count(), 1)
+
+        self.client.force_authenticate(user=User.objects.create_user(username='customer'))
+        response = self.client.post(self.url, {'users': self.rows('erin')}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_concurrent_signup_fails_the_batch(self):
+        serializer = BulkUserRegistrationSerializer(data={'users': self.rows('alice', 'bob')})
+        self.assertTrue(serializer.is_valid())
+        # Registered between validation and the insert
+        User.objects.create_user(username='bob')
+
+        with self.assertRaises(UserImportError):
+            serializer.save()
+        self.assertFalse(User.objects.filter(username='alice').exists())
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            writer = csv.DictWriter(handle, fieldnames=['username', 'email', 'password'])
+            writer.writeheader()
+            writer.writerows(self.rows('alice', 'bob'))
+        self.addCleanup(os.remove, handle.name)
+
+        call_command('import_users', handle.name, '--dry-run', stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='alice').exists())
+
+        out = StringIO()
+        call_command('import_users', handle.name, stdout=out)
+        self.assertIn('Users created: 2', out.getvalue())
+        self.assertTrue(User.objects.get(username='bob').check_password('employeepass1'))
+
+
+@override_settings(BOOKING_TASKS_ALWAYS_EAGER=True)
+class GroupBookingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.employees = [
+            User.objects.create_user(username=f'employee{i}', email=f'employee{i}@corp.example')
+            for i in range(6)
+        ]
+        movie = Movie.objects.create(title="Test Movie", duration_minutes=120)
+        self.show = Show.objects.create(
+            movie=movie,
+            screen_name="Screen 1",
+            date_time=timezone.now() + timedelta(days=1),
+            total_seats=10
+        )
+        self.client.force_authenticate(user=self.staff)
+        self.url = reverse('book-group', kwargs={'show_id': self.show.id})
+
+    def usernames(self, count):
+        return [user.username for user in self.employees[:count]]
+
+    def test_group_is_seated_together(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'usernames': self.usernames(3)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        seats = response.data['seat_numbers']
+        self.assertEqual(seats, list(range(seats[0], seats[0] + 3)))
+        self.assertEqual(
+            list(
+                Booking.objects.filter(show=self.show).order_by('seat_number')
+                .values_list('user__username', flat=True)
+            ),
+            self.usernames(3)
+        )
+        self.assertEqual(BookingEvent.objects.filter(event_type='booked').count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_retry_with_idempotency_key_books_once(self):
+        data = {'usernames': self.usernames(2)}
+        first = self.client.post(self.url, data, format='json', HTTP_IDEMPOTENCY_KEY='group-1')
+        retry = self.client.post(self.url, data, format='json', HTTP_IDEMPOTENCY_KEY='group-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['seat_numbers'], first.data['seat_numbers'])
+        self.assertEqual(Booking.objects.filter(show=self.show).count(), 2)
+
+        Show.objects.filter(pk=self.show.pk).update(hot_mode=True)
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_large_group_gets_nearest_free_seats(self):
+        for seat in (5, 6):
+            Booking.objects.create(user=self.staff, show=self.show, seat_number=seat)
+        SeatIndex.invalidate(self.show.id)
+
+        response = self.client.post(self.url, {'usernames': self.usernames(6)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(response.data['seat_numbers']), [2, 3, 4, 7, 8, 9])
+
+        response = self.client.post(self.url, {'usernames': ['employee0', 'nobody']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_explicit_seats_are_booked_all_or_nothing(self):
+        Booking.objects.create(user=self.staff, show=self.show, seat_number=2)
+        SeatIndex.invalidate(self.show.id)
+
+        data = {'usernames': self.usernames(2), 'seat_numbers': [1, 2]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.filter(show=self.show).count(), 1)
+
+        data['seat_numbers'] = [1, 3]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Booking.objects.get(show=self.show, seat_number=3).user, self.employees[1]
+        )
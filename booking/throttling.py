@@ -0,0 +1,195 @@
+from functools import wraps
+from math import ceil
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+import threading
+import time
+
+DEFAULT_ADMISSION = {
+    'USER_RATE': 2.0,
+    'USER_BURST': 10,
+    'SHOW_RATE': 50.0,
+    'SHOW_BURST': 100,
+    'MAX_IN_FLIGHT': 20,
+    'MAX_QUEUE': 500,
+    'QUEUE_WINDOW': 30,
+}
+
+# Makes read-modify-write of bucket state atomic within a process; across
+# processes a shared cache gives approximate limits, which is sufficient here
+_bucket_lock = threading.Lock()
+
+
+def admission_setting(name):
+    return getattr(settings, 'BOOKING_ADMISSION', {}).get(name, DEFAULT_ADMISSION[name])
+
+
+class TokenBucket:
+    """Cache-backed token bucket refilled continuously at `rate` tokens/second"""
+
+    def __init__(self, key, rate, capacity):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+
+    def consume(self, tokens=1):
+        """Take tokens from the bucket; return seconds to wait, or 0 if allowed"""
+        if self.rate <= 0:
+            return 0
+        with _bucket_lock:
+            now = time.time()
+            level, updated = cache.get(self.key, (self.capacity, now))
+            level = min(self.capacity, level + (now - updated) * self.rate)
+            if level >= tokens:
+                cache.set(self.key, (level - tokens, now), self.ttl)
+                return 0
+            cache.set(self.key, (level, now), self.ttl)
+            return (tokens - level) / self.rate
+
+    @property
+    def ttl(self):
+        # A bucket idle long enough to refill completely can be forgotten
+        return int(self.capacity / self.rate) + 1
+
+
+class UserBookingThrottle(BaseThrottle):
+    """Per-user token bucket for booking endpoints"""
+
+    def allow_request(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return True
+        bucket = TokenBucket(
+            f'throttle:booking-user:{request.user.pk}',
+            admission_setting('USER_RATE'),
+            admission_setting('USER_BURST')
+        )
+        self.wait_seconds = bucket.consume()
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AdmissionQueue:
+    """FIFO virtual queue of per-client tickets for one show.
+
+    A client turned away gets a ticket for the next admission slot. Slots are
+    1/SHOW_RATE seconds apart, so the queue drains at the show's admission
+    rate. Retrying with a ticket keeps the client's place until its slot
+    comes up, and newcomers queue behind existing tickets instead of jumping
+    ahead. Tickets not used within QUEUE_WINDOW of their slot expire.
+    """
+
+    def __init__(self, show_id):
+        self.show_id = show_id
+        rate = admission_setting('SHOW_RATE')
+        # Without a show rate only in-flight overflow queues, so space slots
+        # by how quickly in-flight requests are expected to free up
+        self.interval = 1 / rate if rate > 0 else 1 / max(admission_setting('MAX_IN_FLIGHT'), 1)
+        self.slot_key = f'admission:next-slot:{show_id}'
+
+    def ticket_key(self, client):
+        return f'admission:ticket:{self.show_id}:{client}'
+
+    def ticket(self, client):
+        """Return the slot time of the client's ticket, or None"""
+        return cache.get(self.ticket_key(client))
+
+    def is_waiting(self, now):
+        """Whether tickets issued earlier are still waiting for their slots"""
+        return cache.get(self.slot_key, 0) > now
+
+    def take_ticket(self, client, now, wait=0):
+        """Queue the client at the back; returns its slot time, or None when full"""
+        with _bucket_lock:
+            slot = max(cache.get(self.slot_key, 0), now + wait)
+            if self.position(slot, now) > admission_setting('MAX_QUEUE'):
+                return None
+            window = admission_setting('QUEUE_WINDOW')
+            timeout = ceil(slot - now) + window
+            cache.set(self.slot_key, slot + self.interval, timeout)
+            cache.set(self.ticket_key(client), slot, timeout)
+        return slot
+
+    def admit(self, client):
+        cache.delete(self.ticket_key(client))
+
+    def position(self, slot, now):
+        """1-based number of slots until (and including) the given one"""
+        return max(1, ceil((slot - now) / self.interval))
+
+    def queued_response(self, slot, now):
+        """429 with the client's queue position, or 503 when it has no ticket"""
+        retry_after = max(1, ceil(slot - now)) if slot is not None else max(
+            1, ceil(admission_setting('MAX_QUEUE') * self.interval)
+        )
+        if slot is None:
+            response = Response(
+                {'error': 'Booking queue is full. Please try again later.', 'retry_after': retry_after},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        else:
+            response = Response(
+                {
+                    'error': 'High demand for this show. You have been placed in the queue.',
+                    'queue_position': self.position(slot, now),
+                    'retry_after': retry_after
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+
+def admission_control(view_func):
+    """Admit at most SHOW_RATE requests/second and MAX_IN_FLIGHT concurrent
+    requests per show; everything else gets a ticket in the show's
+    AdmissionQueue and a Retry-After instead of reaching the database.
+    """
+    @wraps(view_func)
+    def wrapper(request, show_id, *args, **kwargs):
+        admission_queue = AdmissionQueue(show_id)
+        client = request.user.pk if request.user.is_authenticated else request.META.get('REMOTE_ADDR')
+        now = time.time()
+
+        slot = admission_queue.ticket(client)
+        if slot is not None:
+            if slot > now:
+                return admission_queue.queued_response(slot, now)
+            # The ticket's slot has come up; it was reserved from the show's rate
+            admission_queue.admit(client)
+        elif admission_queue.is_waiting(now):
+            slot = admission_queue.take_ticket(client, now)
+            return admission_queue.queued_response(slot, now)
+        else:
+            bucket = TokenBucket(
+                f'throttle:booking-show:{show_id}',
+                admission_setting('SHOW_RATE'),
+                admission_setting('SHOW_BURST')
+            )
+            wait = bucket.consume()
+            if wait:
+                slot = admission_queue.take_ticket(client, now, wait)
+                return admission_queue.queued_response(slot, now)
+
+        in_flight_key = f'admission:in-flight:{show_id}'
+        cache.add(in_flight_key, 0, admission_setting('QUEUE_WINDOW'))
+        try:
+            in_flight = cache.incr(in_flight_key)
+        except ValueError:
+            in_flight = 1
+        try:
+            if in_flight > admission_setting('MAX_IN_FLIGHT'):
+                slot = admission_queue.take_ticket(client, now)
+                return admission_queue.queued_response(slot, now)
+            return view_func(request, show_id, *args, **kwargs)
+        finally:
+            try:
+                cache.decr(in_flight_key)
+            except ValueError:
+                pass
+
+    return wrapper
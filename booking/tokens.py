@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+import time
+
+
+class TokenRevocationStore:
+    """Cache-backed set of revoked token JTIs.
+
+    Each entry lives only until the token it revokes would have expired
+    anyway, so the store purges itself and never grows past the number of
+    tokens revoked within one token lifetime.
+    """
+
+    @staticmethod
+    def key(jti):
+        return f'revoked-jti:{jti}'
+
+    @staticmethod
+    def remaining(token):
+        return int(token.get('exp', 0) - time.time()) + 1
+
+    @staticmethod
+    def revoke(token):
+        """Revoke a simplejwt token until its expiry"""
+        jti = token.get(api_settings.JTI_CLAIM)
+        remaining = TokenRevocationStore.remaining(token)
+        if jti and remaining > 0:
+            cache.set(TokenRevocationStore.key(jti), 1, remaining)
+
+    @staticmethod
+    def claim(token):
+        """Revoke a token for single use; False if it was already revoked.
+
+        cache.add is atomic, so of two concurrent refreshes with the same
+        token exactly one wins.
+        """
+        jti = token.get(api_settings.JTI_CLAIM)
+        remaining = TokenRevocationStore.remaining(token)
+        if not jti or remaining <= 0:
+            return False
+        return cache.add(TokenRevocationStore.key(jti), 1, remaining)
+
+    @staticmethod
+    def is_revoked(token):
+        jti = token.get(api_settings.JTI_CLAIM)
+        return bool(jti) and cache.get(TokenRevocationStore.key(jti)) is not None
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWT authentication that also rejects access tokens revoked at logout"""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if TokenRevocationStore.is_revoked(token):
+            raise InvalidToken({'detail': 'Token has been revoked', 'code': 'token_revoked'})
+        return token
@@ -4,14 +4,39 @@ from . import views
 urlpatterns = [
     # Authentication endpoints
     path('signup/', views.UserRegistrationView.as_view(), name='user-signup'),
+    path('signup/bulk/', views.bulk_registration_view, name='user-bulk-signup'),
     path('login/', views.login_view, name='user-login'),
+    path('token/refresh/', views.token_refresh_view, name='token-refresh'),
+    path('logout/', views.logout_view, name='user-logout'),
     
     # Movie endpoints
     path('movies/', views.MovieListView.as_view(), name='movie-list'),
+    path('movies/search/', views.movie_search_view, name='movie-search'),
     path('movies/<int:movie_id>/shows/', views.MovieShowsView.as_view(), name='movie-shows'),
     
+    # Venue endpoints
+    path('venues/', views.VenueListView.as_view(), name='venue-list'),
+    path('venues/<int:venue_id>/shows/', views.VenueShowsView.as_view(), name='venue-shows'),
+    path('venues/<int:venue_id>/movies/', views.VenueMoviesView.as_view(), name='venue-movies'),
+    
+    # Seat layout endpoints
+    path('layouts/<int:layout_id>/', views.layout_detail_view, name='layout-detail'),
+    path('shows/<int:show_id>/seat-map/', views.show_seat_map_view, name='show-seat-map'),
+    
     # Booking endpoints
     path('shows/<int:show_id>/book/', views.book_seat_view, name='book-seat'),
+    path('shows/<int:show_id>/book-best/', views.book_best_seats_view, name='book-best-seats'),
+    path('shows/<int:show_id>/book-group/', views.group_booking_view, name='book-group'),
     path('bookings/<int:booking_id>/cancel/', views.cancel_booking_view, name='cancel-booking'),
+    path('bookings/export/', views.export_bookings_view, name='export-bookings'),
+    
+    # Analytics endpoints (staff only)
+    path('events/', views.booking_events_view, name='booking-events'),
+    path('analytics/shows/<int:show_id>/', views.show_stats_view, name='show-stats'),
+    path('analytics/movies/<int:movie_id>/daily/', views.movie_daily_stats_view, name='movie-daily-stats'),
     path('my-bookings/', views.UserBookingsView.as_view(), name='user-bookings'),
+    
+    # Waitlist endpoints
+    path('shows/<int:show_id>/waitlist/', views.join_waitlist_view, name='join-waitlist'),
+    path('waitlist/<int:entry_id>/leave/', views.leave_waitlist_view, name='leave-waitlist'),
 ]
\ No newline at end of file
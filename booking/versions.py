@@ -0,0 +1,67 @@
+from collections import defaultdict
+from django.utils import timezone
+from .db_routers import shard_for_show
+import hashlib
+import time
+
+
+class BookingVersion:
+    """Per-user marker of when the user's bookings last changed.
+
+    Booking writes bump it inside their own transaction, so a new version
+    is visible exactly when the change is, to every process. /my-bookings/
+    compares it with the client's ETag, answering 304 without reading any
+    bookings when nothing changed.
+    """
+
+    @staticmethod
+    def get(user_id):
+        """Return the user's current version; 0 until their bookings first change"""
+        from .models import UserBookingsVersion
+
+        version = UserBookingsVersion.objects.filter(user_id=user_id).values_list(
+            'version', flat=True
+        ).first()
+        return version or 0
+
+    @staticmethod
+    def etag(user_id, query=''):
+        """ETag for one listing of the user's bookings; `query` tells pages and filters apart"""
+        version = BookingVersion.get(user_id)
+        if not query:
+            return f'"bookings-{version}"'
+        return f'"bookings-{version}-{hashlib.sha256(query.encode()).hexdigest()[:16]}"'
+
+    @staticmethod
+    def bump(*user_ids):
+        """Move the users' versions forward; call inside the transaction making the change"""
+        from .models import UserBookingsVersion
+
+        version = time.time_ns()
+        UserBookingsVersion.objects.bulk_create(
+            [UserBookingsVersion(user_id=user_id, version=version) for user_id in set(user_ids)],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['version']
+        )
+
+    @staticmethod
+    def shows_changed(show_ids):
+        """Mark bookings on edited shows as changed; call inside the transaction making the edit.
+
+        Listings embed the show and movie, so their bookings' updated_at is
+        touched (for ?since=) and their users' versions bumped (for the ETag).
+        """
+        from .models import Booking
+
+        by_alias = defaultdict(list)
+        for show_id in show_ids:
+            by_alias[shard_for_show(show_id)].append(show_id)
+        now = timezone.now()
+        user_ids = set()
+        for alias, ids in by_alias.items():
+            bookings = Booking.objects.using(alias).filter(show_id__in=ids)
+            user_ids.update(bookings.values_list('user_id', flat=True).distinct())
+            bookings.update(updated_at=now)
+        if user_ids:
+            BookingVersion.bump(*user_ids)
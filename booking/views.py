@@ -1,22 +1,66 @@
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.db import transaction
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
-from .models import Movie, Show, Booking
+from django.utils import timezone
+from django.utils.http import parse_etags, urlencode
+from datetime import datetime, time, timedelta
+from .models import (
+    Movie, Show, Booking, Venue, ScreenLayout, WaitlistEntry, ArchivedBooking, BookingTombstone, ShowStats,
+    MovieDailyStats
+)
 from .serializers import (
-    UserRegistrationSerializer, UserLoginSerializer, MovieSerializer,
-    ShowSerializer, BookingSerializer, BookingCreateSerializer, BookingDetailSerializer
+    UserRegistrationSerializer, BulkUserRegistrationSerializer, UserLoginSerializer, LoginResponseSerializer,
+    MovieSerializer, TokenRefreshSerializer, TokenRefreshResponseSerializer, LogoutSerializer,
+    ShowSerializer, BookingCreateSerializer, BookingDetailSerializer,
+    BestSeatsBookingSerializer, GroupBookingSerializer, WaitlistEntrySerializer, ArchivedBookingSerializer,
+    MovieFlatSerializer, ShowFlatSerializer, BookingExportSerializer, ShowStatsSerializer,
+    MovieDailyStatsSerializer, StatsRangeSerializer, MovieSearchSerializer,
+    BookingEventSerializer, EventTailSerializer, VenueSerializer, VenueShowsFilterSerializer,
+    UserBookingsQuerySerializer
+)
+from .docs import (
+    api_doc, DocResponse, DocParameter, IN_HEADER, IN_QUERY, TYPE_STRING, TYPE_INTEGER
 )
+from .accounts import UserImportError
+from .analytics import StatsService
 from .email_service import EmailService
+from .events import EventLog
+from .hotshow import HotShowUnavailable, SeatUnavailable, engine_for
+from .layouts import LayoutCache
+from .pricing import PricingService
+from .tasks import run_async
+from .throttling import UserBookingThrottle, admission_control
+from .tokens import TokenRevocationStore
+from .versions import BookingVersion
+from .idempotency import idempotent, transient_failure
+from .db_routers import (
+    choose_replica, pin_to_primary, shard_for_booking, shard_for_show, use_replicas
+)
+from .export import EXPORT_FORMATS, export_filename, export_rows, iter_export, iter_gzip
+from .search import MovieSearch
+from .sharding import scatter
+from .seating import SeatAllocator, SeatAllocationError, SeatIndex
+from .waitlist import WaitlistService, WaitlistError
 import logging
 
 logger = logging.getLogger(__name__)
 
+idempotency_key_parameter = DocParameter(
+    'Idempotency-Key',
+    IN_HEADER,
+    description='Client-generated key; retries with the same key replay the original response',
+    type=TYPE_STRING,
+    required=False
+)
+
 
 class UserRegistrationView(generics.CreateAPIView):
     """User registration endpoint"""
@@ -24,11 +68,11 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
 
-    @swagger_auto_schema(
+    @api_doc(
         operation_description="Register a new user",
         responses={
-            201: openapi.Response('User created successfully'),
-            400: openapi.Response('Validation error')
+            201: DocResponse('User created successfully'),
+            400: DocResponse('Validation error')
         }
     )
     def post(self, request, *args, **kwargs):
@@ -43,30 +87,42 @@ class UserRegistrationView(generics.CreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@swagger_auto_schema(
+@api_doc(
+    method='post',
+    operation_description="Register a batch of users at once, all or nothing (staff only)",
+    request_body=BulkUserRegistrationSerializer,
+    responses={
+        201: DocResponse('Users created successfully'),
+        400: DocResponse('Validation error; no users were created'),
+        403: DocResponse('Staff only')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def bulk_registration_view(request):
+    """Register many users in one request for corporate onboarding"""
+    serializer = BulkUserRegistrationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        users = serializer.save()
+    except UserImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    logger.info(f"Bulk registration of {len(users)} users by user {request.user.id}")
+    return Response({
+        'message': 'Users created successfully',
+        'users': [{'user_id': user.id, 'username': user.username} for user in users]
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_doc(
     method='post',
     operation_description="Authenticate user and return JWT tokens",
     request_body=UserLoginSerializer,
     responses={
-        200: openapi.Response(
-            'Login successful',
-            openapi.Schema(
-                type=openapi.TYPE_OBJECT,
-                properties={
-                    'access': openapi.Schema(type=openapi.TYPE_STRING),
-                    'refresh': openapi.Schema(type=openapi.TYPE_STRING),
-                    'user': openapi.Schema(
-                        type=openapi.TYPE_OBJECT,
-                        properties={
-                            'id': openapi.Schema(type=openapi.TYPE_INTEGER),
-                            'username': openapi.Schema(type=openapi.TYPE_STRING),
-                            'email': openapi.Schema(type=openapi.TYPE_STRING),
-                        }
-                    )
-                }
-            )
-        ),
-        400: openapi.Response('Invalid credentials')
+        200: DocResponse('Login successful', LoginResponseSerializer),
+        400: DocResponse('Invalid credentials')
     }
 )
 @api_view(['POST'])
@@ -91,61 +147,338 @@ def login_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class MovieListView(generics.ListAPIView):
+@api_doc(
+    method='post',
+    operation_description="Exchange a refresh token for a new access token without logging in again",
+    request_body=TokenRefreshSerializer,
+    responses={
+        200: DocResponse('Tokens refreshed', TokenRefreshResponseSerializer),
+        400: DocResponse('Validation error'),
+        401: DocResponse('Refresh token invalid, expired or revoked')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def token_refresh_view(request):
+    """Issue a new access token; the refresh token is rotated and the old one revoked"""
+    serializer = TokenRefreshSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        refresh = RefreshToken(serializer.validated_data['refresh'])
+    except TokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+        # Claiming the JTI revokes it; a concurrent refresh with the same token loses
+        revoked = not TokenRevocationStore.claim(refresh)
+    else:
+        revoked = TokenRevocationStore.is_revoked(refresh)
+    if revoked:
+        return Response({'error': 'Token has been revoked'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    data = {'access': str(refresh.access_token)}
+    if jwt_settings.ROTATE_REFRESH_TOKENS:
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data['refresh'] = str(refresh)
+    else:
+        data['refresh'] = serializer.validated_data['refresh']
+    return Response(data)
+
+
+@api_doc(
+    method='post',
+    operation_description="Revoke the refresh token and the access token used for this request",
+    request_body=LogoutSerializer,
+    responses={
+        200: DocResponse('Logged out'),
+        400: DocResponse('Invalid refresh token'),
+        401: DocResponse('Authentication required')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def logout_view(request):
+    """Log out by revoking the caller's tokens"""
+    serializer = LogoutSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        refresh = RefreshToken(serializer.validated_data['refresh'])
+    except TokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+        return Response(
+            {'error': 'You can only revoke your own tokens'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    TokenRevocationStore.revoke(refresh)
+    if request.auth is not None:
+        TokenRevocationStore.revoke(request.auth)
+    return Response({'message': 'Logged out successfully'})
+
+
+class FlatListMixin:
+    """Serve list responses from values() rows via flat_serializer_class"""
+    flat_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.flat_serializer_class.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.flat_serializer_class(page).data)
+        return Response(self.flat_serializer_class(rows).data)
+
+
+class MovieListView(FlatListMixin, generics.ListAPIView):
     """List all movies"""
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.order_by('title')
     serializer_class = MovieSerializer
+    flat_serializer_class = MovieFlatSerializer
     permission_classes = [permissions.AllowAny]
 
-    @swagger_auto_schema(
+    @api_doc(
         operation_description="Get list of all movies",
         responses={200: MovieSerializer(many=True)}
     )
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+        with use_replicas(request.user):
+            return super().get(request, *args, **kwargs)
 
 
-class MovieShowsView(generics.ListAPIView):
+@api_doc(
+    method='get',
+    operation_description="Search movie titles by word prefix, tolerating small typos",
+    query_serializer=MovieSearchSerializer,
+    responses={
+        200: DocResponse('Ranked matching movies'),
+        400: DocResponse('Missing or invalid query')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def movie_search_view(request):
+    """Rank movies against the in-memory title index"""
+    serializer = MovieSearchSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    matches = MovieSearch.search(
+        serializer.validated_data['q'], serializer.validated_data['limit']
+    )
+    scores = {movie_id: score for movie_id, _, score in matches}
+    with use_replicas(request.user):
+        rows = {
+            row['id']: row
+            for row in MovieFlatSerializer.get_rows(Movie.objects.filter(id__in=scores))
+        }
+    results = [
+        dict(rows[movie_id], score=score) for movie_id, score in scores.items() if movie_id in rows
+    ]
+    return Response({'query': serializer.validated_data['q'], 'results': results})
+
+
+class MovieShowsView(FlatListMixin, generics.ListAPIView):
     """List all shows for a specific movie"""
     serializer_class = ShowSerializer
+    flat_serializer_class = ShowFlatSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
         movie_id = self.kwargs['movie_id']
-        return Show.objects.filter(movie_id=movie_id).order_by('date_time')
+        shows = Show.objects.filter(movie_id=movie_id)
+        venue_id = self.request.query_params.get('venue')
+        if venue_id and venue_id.isdigit():
+            shows = shows.filter(venue_id=venue_id)
+        return shows.order_by('date_time')
 
-    @swagger_auto_schema(
-        operation_description="Get all shows for a specific movie",
+    @api_doc(
+        operation_description="Get all shows for a specific movie, optionally at one venue",
+        manual_parameters=[
+            DocParameter('venue', IN_QUERY, description='Venue ID', type=TYPE_INTEGER)
+        ],
         responses={
             200: ShowSerializer(many=True),
-            404: openapi.Response('Movie not found')
+            404: DocResponse('Movie not found')
         }
     )
     def get(self, request, *args, **kwargs):
         movie_id = self.kwargs['movie_id']
-        if not Movie.objects.filter(id=movie_id).exists():
-            return Response(
-                {'error': 'Movie not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+        with use_replicas(request.user):
+            if not Movie.objects.filter(id=movie_id).exists():
+                return Response(
+                    {'error': 'Movie not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return super().get(request, *args, **kwargs)
+
+
+class VenueListView(generics.ListAPIView):
+    """List all venues with their screens"""
+    queryset = Venue.objects.prefetch_related('screens').order_by('name')
+    serializer_class = VenueSerializer
+    permission_classes = [permissions.AllowAny]
+
+    @api_doc(
+        operation_description="Get list of all venues and their screens",
+        responses={200: VenueSerializer(many=True)}
+    )
+    def get(self, request, *args, **kwargs):
+        with use_replicas(request.user):
+            return super().get(request, *args, **kwargs)
+
+
+class VenueScopedMixin:
+    """Resolve the venue in the URL, answering 404 for unknown venues"""
+
+    def get(self, request, *args, **kwargs):
+        with use_replicas(request.user):
+            if not Venue.objects.filter(id=self.kwargs['venue_id']).exists():
+                return Response(
+                    {'error': 'Venue not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return super().get(request, *args, **kwargs)
+
+
+class VenueShowsView(VenueScopedMixin, FlatListMixin, generics.ListAPIView):
+    """List shows at one venue"""
+    serializer_class = ShowSerializer
+    flat_serializer_class = ShowFlatSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        # Every filter leads with venue_id so the (venue, ...) indexes apply
+        shows = Show.objects.filter(venue_id=self.kwargs['venue_id'])
+        filters = VenueShowsFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        if 'movie' in filters.validated_data:
+            shows = shows.filter(movie_id=filters.validated_data['movie'])
+        if 'date' in filters.validated_data:
+            start = timezone.make_aware(datetime.combine(filters.validated_data['date'], time.min))
+            shows = shows.filter(date_time__gte=start, date_time__lt=start + timedelta(days=1))
+        return shows.order_by('date_time')
+
+    @api_doc(
+        operation_description="Get shows at a venue, optionally for one movie or day",
+        query_serializer=VenueShowsFilterSerializer,
+        responses={
+            200: ShowSerializer(many=True),
+            400: DocResponse('Invalid filters'),
+            404: DocResponse('Venue not found')
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class VenueMoviesView(VenueScopedMixin, FlatListMixin, generics.ListAPIView):
+    """List movies with shows at one venue"""
+    serializer_class = MovieSerializer
+    flat_serializer_class = MovieFlatSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        # shows_count is annotated over the same join, so it counts only
+        # this venue's shows
+        return Movie.objects.filter(shows__venue_id=self.kwargs['venue_id']).order_by('title')
+
+    @api_doc(
+        operation_description="Get movies showing at a venue",
+        responses={
+            200: MovieSerializer(many=True),
+            404: DocResponse('Venue not found')
+        }
+    )
+    def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
 
-@swagger_auto_schema(
+@api_doc(
+    method='get',
+    operation_description="Get the compiled seat layout (rows, sections, tiers, adjacency)",
+    responses={
+        200: DocResponse('Compiled layout'),
+        304: DocResponse('Layout not modified'),
+        404: DocResponse('Layout not found')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def layout_detail_view(request, layout_id):
+    """Serve the cached layout blob shared by every show on a screen"""
+    try:
+        version, _, payload = LayoutCache.get(layout_id)
+    except ScreenLayout.DoesNotExist:
+        return Response({'error': 'Layout not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    etag = f'"layout-{layout_id}-v{version}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+@api_doc(
+    method='get',
+    operation_description="Get the booked seats and current seat prices for a show along with its layout reference",
+    responses={
+        200: DocResponse('Seat map'),
+        404: DocResponse('Show not found')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def show_seat_map_view(request, show_id):
+    """Return the seat state for a show; the layout itself is fetched separately"""
+    show = get_object_or_404(Show, id=show_id)
+    booked = show.booked_seat_numbers
+    return Response({
+        'show_id': show.id,
+        'layout_id': show.layout_id,
+        'layout_version': LayoutCache.get(show.layout_id)[0] if show.layout_id else None,
+        'total_seats': show.total_seats,
+        'available_seats': show.total_seats - len(booked),
+        'booked_seat_numbers': booked,
+        'pricing': PricingService.table(show).to_representation()
+    })
+
+
+@api_doc(
     method='post',
     operation_description="Book a seat for a specific show",
+    manual_parameters=[idempotency_key_parameter],
     request_body=BookingCreateSerializer,
     responses={
-        201: openapi.Response('Booking created successfully', BookingDetailSerializer),
-        400: openapi.Response('Validation error or seat already booked'),
-        404: openapi.Response('Show not found')
+        201: DocResponse('Booking created successfully', BookingDetailSerializer),
+        400: DocResponse('Validation error or seat already booked'),
+        404: DocResponse('Show not found'),
+        429: DocResponse('Rate limited or queued; see Retry-After'),
+        503: DocResponse('Booking queue is full, or hot show busy; see Retry-After')
     }
 )
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserBookingThrottle])
+@idempotent
+@admission_control
 def book_seat_view(request, show_id):
     """Book a seat for a specific show"""
     show = get_object_or_404(Show, id=show_id)
+
+    try:
+        engine = engine_for(show)
+    except HotShowUnavailable as e:
+        return hot_show_unavailable(show.id, e)
+    if engine is not None:
+        return book_hot_seat(request, show, engine)
     
     serializer = BookingCreateSerializer(
         data=request.data, 
@@ -153,52 +486,210 @@ def book_seat_view(request, show_id):
     )
     
     if serializer.is_valid():
+        seat_number = serializer.validated_data['seat_number']
         try:
-            with transaction.atomic():
-                booking = Booking.objects.create(
+            # Priced before the transaction, so a seat index rebuild on a
+            # cache miss never runs while it is open
+            price = PricingService.price_for(show, seat_number)
+            # The booking is written to the show's shard (the primary when
+            # bookings are not sharded); events and stats to the primary
+            with transaction.atomic(), transaction.atomic(using=shard_for_show(show.id)):
+                # Offers are made under the show's row lock (see
+                # WaitlistService.offer_seat), so re-check the hold under it
+                Show.objects.select_for_update().filter(pk=show.id).first()
+                holders = WaitlistService.seat_holders(show.id, seat_number)
+                if holders and request.user.id not in holders:
+                    return Response({
+                        'seat_number': [f"Seat {seat_number} is being held for a waitlisted customer"]
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                booking = show.bookings.create(
                     user=request.user,
-                    show=show,
-                    seat_number=serializer.validated_data['seat_number'],
-                    status='booked'
+                    seat_number=seat_number,
+                    status='booked',
+                    price=price
                 )
-                
-                # Send booking confirmation email
-                try:
-                    EmailService.send_booking_confirmation(booking)
-                    logger.info(f"Confirmation email sent for booking {booking.id}")
-                except Exception as e:
-                    logger.error(f"Failed to send confirmation email for booking {booking.id}: {str(e)}")
-                
-                response_serializer = BookingDetailSerializer(booking)
-                return Response({
-                    'message': 'Seat booked successfully',
-                    'booking': response_serializer.data
-                }, status=status.HTTP_201_CREATED)
-                
+                EventLog.bookings_created([booking])
+                SeatIndex.seats_booked(show.id, [booking.seat_number])
+                StatsService.seats_booked(show)
+                BookingVersion.bump(request.user.id)
+                if holders:
+                    WaitlistService.accept(show.id, request.user, booking.seat_number)
         except Exception as e:
-            return Response(
-                {'error': 'Booking failed. Please try again.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return transient_failure('Booking failed. Please try again.')
+
+        # Send booking confirmation email once committed, so SMTP latency
+        # never holds the booking transaction (and its event ids) open
+        try:
+            EmailService.send_booking_confirmation(booking)
+            logger.info(f"Confirmation email sent for booking {booking.id}")
+        except Exception as e:
+            logger.error(f"Failed to send confirmation email for booking {booking.id}: {str(e)}")
+
+        pin_to_primary(request.user)
+        response_serializer = BookingDetailSerializer(booking)
+        return Response({
+            'message': 'Seat booked successfully',
+            'booking': response_serializer.data
+        }, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@swagger_auto_schema(
+def hot_show_unavailable(show_id, error):
+    """503 for a hot show whose engine is in another process or down; the client retries"""
+    logger.warning(f"Hot show engine unavailable for show {show_id}: {str(error)}")
+    response = Response(
+        {'error': 'This show is busy. Please try again.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def book_hot_seat(request, show, engine):
+    """Book through the show's in-memory engine"""
+    serializer = BookingCreateSerializer(
+        data=request.data,
+        context={'show': show, 'request': request, 'check_availability': False}
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        booking = engine.book(request.user, serializer.validated_data['seat_number'])
+    except SeatUnavailable as e:
+        return Response({'seat_number': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+    except HotShowUnavailable as e:
+        return hot_show_unavailable(show.id, e)
+    booking.show = show
+
+    try:
+        EmailService.send_booking_confirmation(booking)
+        logger.info(f"Confirmation email sent for booking {booking.id}")
+    except Exception as e:
+        logger.error(f"Failed to send confirmation email for booking {booking.id}: {str(e)}")
+
+    pin_to_primary(request.user)
+    return Response({
+        'message': 'Seat booked successfully',
+        'booking': BookingDetailSerializer(booking).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_doc(
+    method='post',
+    operation_description="Book the best available block of adjacent seats for a show",
+    manual_parameters=[idempotency_key_parameter],
+    request_body=BestSeatsBookingSerializer,
+    responses={
+        201: DocResponse('Seats booked successfully', BookingDetailSerializer(many=True)),
+        400: DocResponse('Validation error, no adjacent seats available, or show in hot mode'),
+        404: DocResponse('Show not found'),
+        429: DocResponse('Rate limited or queued; see Retry-After'),
+        503: DocResponse('Booking queue is full')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([UserBookingThrottle])
+@idempotent
+@admission_control
+def book_best_seats_view(request, show_id):
+    """Book the best available block of adjacent seats for a show"""
+    show = get_object_or_404(Show, id=show_id)
+
+    serializer = BestSeatsBookingSerializer(data=request.data, context={'show': show})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        bookings = SeatAllocator.allocate(
+            show,
+            request.user,
+            serializer.validated_data['quantity'],
+            serializer.validated_data.get('preferred_seat')
+        )
+    except SeatAllocationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    pin_to_primary(request.user)
+
+    for booking in bookings:
+        try:
+            EmailService.send_booking_confirmation(booking)
+            logger.info(f"Confirmation email sent for booking {booking.id}")
+        except Exception as e:
+            logger.error(f"Failed to send confirmation email for booking {booking.id}: {str(e)}")
+
+    return Response({
+        'message': 'Seats booked successfully',
+        'seat_numbers': [booking.seat_number for booking in bookings],
+        'bookings': BookingDetailSerializer(bookings, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_doc(
+    method='post',
+    operation_description="Book one seat per user for a group in one transaction (staff only)",
+    manual_parameters=[idempotency_key_parameter],
+    request_body=GroupBookingSerializer,
+    responses={
+        201: DocResponse('Group booked successfully', BookingDetailSerializer(many=True)),
+        400: DocResponse('Validation error, not enough seats available, or show in hot mode'),
+        403: DocResponse('Staff only'),
+        404: DocResponse('Show not found')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+@idempotent
+def group_booking_view(request, show_id):
+    """Book seats for a group of users on a show"""
+    show = get_object_or_404(Show, id=show_id)
+
+    serializer = GroupBookingSerializer(data=request.data, context={'show': show})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        bookings = SeatAllocator.allocate_group(
+            show,
+            serializer.validated_data['users'],
+            serializer.validated_data.get('preferred_seat'),
+            seat_numbers=serializer.validated_data.get('seat_numbers'),
+            contiguous=False
+        )
+    except SeatAllocationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    logger.info(f"Group booking of {len(bookings)} seats for show {show.id} by user {request.user.id}")
+
+    # One email per member; don't hold the response for them
+    run_async(EmailService.send_group_confirmations, bookings)
+
+    return Response({
+        'message': 'Group booked successfully',
+        'seat_numbers': [booking.seat_number for booking in bookings],
+        'bookings': BookingDetailSerializer(bookings, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_doc(
     method='post',
     operation_description="Cancel a booking",
+    manual_parameters=[idempotency_key_parameter],
     responses={
-        200: openapi.Response('Booking cancelled successfully'),
-        400: openapi.Response('Cannot cancel booking'),
-        403: openapi.Response('Permission denied'),
-        404: openapi.Response('Booking not found')
+        200: DocResponse('Booking cancelled successfully'),
+        400: DocResponse('Cannot cancel booking'),
+        403: DocResponse('Permission denied'),
+        404: DocResponse('Booking not found'),
+        503: DocResponse('Hot show busy; see Retry-After')
     }
 )
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 def cancel_booking_view(request, booking_id):
     """Cancel a booking"""
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(Booking.objects.using(shard_for_booking(booking_id)), id=booking_id)
     
     # Check if user owns the booking
     if booking.user != request.user:
@@ -214,9 +705,37 @@ def cancel_booking_view(request, booking_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Cancel the booking
-    booking.status = 'cancelled'
-    booking.save()
+    try:
+        engine = engine_for(booking.show)
+        if engine is not None:
+            engine.cancel(booking)
+    except SeatUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except HotShowUnavailable as e:
+        return hot_show_unavailable(booking.show_id, e)
+
+    if engine is None:
+        # Cancel the booking
+        with transaction.atomic(), transaction.atomic(using=booking._state.db):
+            # Conditional, so only one of two concurrent cancellations counts
+            now = timezone.now()
+            if not Booking.objects.using(booking._state.db).filter(
+                pk=booking.pk, status='booked'
+            ).update(status='cancelled', updated_at=now):
+                return Response(
+                    {'error': 'Booking is already cancelled'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            booking.status, booking.updated_at = 'cancelled', now
+            EventLog.record(
+                'cancelled', booking.show_id, [booking.seat_number],
+                user_id=booking.user_id, booking_ids=[booking.id]
+            )
+            StatsService.seats_cancelled(booking.show)
+            BookingVersion.bump(booking.user_id)
+        SeatIndex.seats_released(booking.show_id, [booking.seat_number])
+        WaitlistService.seat_released(booking.show_id, booking.seat_number)
+    pin_to_primary(request.user)
     
     # Send cancellation email
     try:
@@ -231,17 +750,266 @@ def cancel_booking_view(request, booking_id):
     })
 
 
+@api_doc(
+    method='post',
+    operation_description="Join the waitlist for a sold-out show",
+    responses={
+        201: DocResponse('Joined the waitlist', WaitlistEntrySerializer),
+        400: DocResponse('Show not sold out or already on the waitlist'),
+        404: DocResponse('Show not found')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def join_waitlist_view(request, show_id):
+    """Join the waitlist for a sold-out show"""
+    show = get_object_or_404(Show, id=show_id)
+
+    try:
+        entry = WaitlistService.join(show, request.user)
+    except WaitlistError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'message': 'Added to the waitlist',
+        'position': WaitlistService.position(entry),
+        'entry': WaitlistEntrySerializer(entry).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_doc(
+    method='post',
+    operation_description="Leave a show's waitlist",
+    responses={
+        200: DocResponse('Left the waitlist'),
+        400: DocResponse('Entry is no longer active'),
+        403: DocResponse('Permission denied'),
+        404: DocResponse('Waitlist entry not found')
+    }
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def leave_waitlist_view(request, entry_id):
+    """Leave a show's waitlist"""
+    entry = get_object_or_404(WaitlistEntry, id=entry_id)
+
+    if entry.user_id != request.user.id:
+        return Response(
+            {'error': 'You can only leave your own waitlist entries'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        WaitlistService.leave(entry)
+    except WaitlistError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'message': 'Left the waitlist',
+        'entry_id': entry.id
+    })
+
+
 class UserBookingsView(generics.ListAPIView):
     """List all bookings for the authenticated user"""
     serializer_class = BookingDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    params = {}
+
+    @property
+    def archived(self):
+        return self.params.get('archived', False)
+
+    @property
+    def since(self):
+        # Delta sync applies to current bookings only
+        since = None if self.archived else self.params.get('since')
+        if since is None:
+            return None
+        # updated_at is set before commit, so a row can become visible after
+        # a newer one the client has already seen; overlap by a safety lag
+        # (clients merge results by id)
+        return since - timedelta(seconds=getattr(settings, 'BOOKINGS_SYNC_LAG_SECONDS', 5))
+
+    def get_serializer_class(self):
+        if self.archived:
+            return ArchivedBookingSerializer
+        return BookingDetailSerializer
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user).order_by('-created_at')
+        # Past bookings moved out by archive_bookings are only read on request
+        if self.archived:
+            return ArchivedBooking.objects.filter(user=self.request.user).order_by('-created_at')
+        bookings = Booking.objects.filter(user=self.request.user)
+        if self.since is not None:
+            # Rows booked, cancelled or otherwise changed since the client's last sync
+            bookings = bookings.filter(updated_at__gt=self.since)
+        # A user's bookings can be on every shard: query each for the page
+        # and merge them newest first
+        return scatter(
+            bookings.order_by('-created_at', '-id'),
+            key=lambda booking: (booking.created_at, booking.id),
+            reverse=True,
+            prefetch=['show__movie']
+        )
 
-    @swagger_auto_schema(
-        operation_description="Get all bookings for the authenticated user",
-        responses={200: BookingDetailSerializer(many=True)}
+    @api_doc(
+        operation_description=(
+            "Get all bookings for the authenticated user. Send the previous ETag in "
+            "If-None-Match to get 304 when nothing changed, or `since` (the newest "
+            "updated_at already seen) to get only changed bookings plus removed_ids "
+            "of bookings archived since then"
+        ),
+        query_serializer=UserBookingsQuerySerializer,
+        responses={
+            200: BookingDetailSerializer(many=True),
+            304: DocResponse('Bookings not modified'),
+            400: DocResponse('Invalid parameters')
+        }
     )
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
\ No newline at end of file
+        serializer = UserBookingsQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        self.params = serializer.validated_data
+
+        # Read the version before any bookings: a write that lands in between
+        # bumps it again, so a stale ETag can never hide a change
+        etag = BookingVersion.etag(
+            request.user.id, urlencode(sorted(request.query_params.lists()), doseq=True)
+        )
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            # Right after a booking or cancellation this stays on the primary
+            with use_replicas(request.user):
+                response = super().get(request, *args, **kwargs)
+                if self.since is not None:
+                    archived = ArchivedBooking.objects.filter(
+                        user=request.user, archived_at__gt=self.since
+                    ).values_list('id', flat=True)
+                    # Bookings archived to a file leave only a tombstone
+                    tombstones = BookingTombstone.objects.filter(
+                        user=request.user, removed_at__gt=self.since
+                    ).values_list('id', flat=True)
+                    response.data['removed_ids'] = sorted({*archived, *tombstones})
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+@api_doc(
+    method='get',
+    operation_description="Stream every booking created in a date range as CSV or NDJSON (staff only)",
+    query_serializer=BookingExportSerializer,
+    responses={
+        200: DocResponse('Export file'),
+        400: DocResponse('Invalid parameters'),
+        403: DocResponse('Staff only')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_bookings_view(request):
+    """Stream bookings for reconciliation without loading them into memory"""
+    serializer = BookingExportSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    rows = export_rows(
+        params['start'], params['end'], params.get('status'), using=choose_replica()
+    )
+    chunks = iter_export(rows, params['output'])
+    if params['gzip']:
+        chunks = iter_gzip(chunks)
+        content_type = 'application/gzip'
+    else:
+        content_type = f"{EXPORT_FORMATS[params['output']]}; charset=utf-8"
+
+    filename = export_filename(params['start'], params['end'], params['output'], params['gzip'])
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    logger.info(
+        f"Booking export {params['start']}..{params['end']} started by user {request.user.id}"
+    )
+    return response
+
+
+@api_doc(
+    method='get',
+    operation_description="Seat sales and occupancy for a show, from the rollup table (staff only)",
+    responses={
+        200: ShowStatsSerializer,
+        403: DocResponse('Staff only'),
+        404: DocResponse('Show not found')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def show_stats_view(request, show_id):
+    """Return the rollup row for a show"""
+    stats = ShowStats.objects.select_related('show').filter(show_id=show_id).first()
+    if stats is None:
+        show = get_object_or_404(Show, id=show_id)
+        StatsService.show_saved(show)
+        stats = ShowStats.objects.select_related('show').get(show_id=show_id)
+    return Response(ShowStatsSerializer(stats).data)
+
+
+@api_doc(
+    method='get',
+    operation_description="Daily seat sales and occupancy for a movie, from the rollup table (staff only)",
+    query_serializer=StatsRangeSerializer,
+    responses={
+        200: MovieDailyStatsSerializer(many=True),
+        400: DocResponse('Invalid date range'),
+        403: DocResponse('Staff only'),
+        404: DocResponse('Movie not found')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def movie_daily_stats_view(request, movie_id):
+    """Return a movie's per-day rollups, optionally limited to a date range"""
+    movie = get_object_or_404(Movie, id=movie_id)
+    serializer = StatsRangeSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    stats = MovieDailyStats.objects.filter(movie=movie)
+    if serializer.validated_data.get('start'):
+        stats = stats.filter(date__gte=serializer.validated_data['start'])
+    if serializer.validated_data.get('end'):
+        stats = stats.filter(date__lte=serializer.validated_data['end'])
+    return Response({
+        'movie_id': movie.id,
+        'movie_title': movie.title,
+        'days': MovieDailyStatsSerializer(stats.order_by('date'), many=True).data
+    })
+
+
+@api_doc(
+    method='get',
+    operation_description="Read booking events after a sequence number, oldest first (staff only)",
+    query_serializer=EventTailSerializer,
+    responses={
+        200: BookingEventSerializer(many=True),
+        400: DocResponse('Invalid parameters'),
+        403: DocResponse('Staff only')
+    }
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def booking_events_view(request):
+    """Tail the event log; pass the returned `next_after` as `after` to continue"""
+    serializer = EventTailSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    events = EventLog.tail(params['after'], params['limit'], show_id=params.get('show_id'))
+    return Response({
+        'events': BookingEventSerializer(events, many=True).data,
+        'next_after': events[-1].id if events else params['after']
+    })
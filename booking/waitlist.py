@@ -0,0 +1,164 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .db_routers import shard_for_show
+from .email_service import EmailService
+from .events import EventLog
+from .seating import SeatIndex
+from .tasks import run_async_on_commit
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WaitlistError(Exception):
+    """Raised when a user cannot join or leave a waitlist"""
+
+
+class WaitlistService:
+    """FIFO waitlist for sold-out shows with time-limited seat holds"""
+
+    @staticmethod
+    def hold_duration():
+        return timedelta(minutes=getattr(settings, 'WAITLIST_HOLD_MINUTES', 10))
+
+    @staticmethod
+    def join(show, user):
+        """Add a user to the end of a show's waitlist"""
+        from .models import WaitlistEntry
+
+        # Seats held for other waiters are not available to this user
+        if show.available_seats - len(WaitlistService.held_seat_numbers(show.id)) > 0:
+            raise WaitlistError('Seats are still available for this show')
+        try:
+            # The unique_active_waitlist_entry constraint catches concurrent joins
+            with transaction.atomic():
+                return WaitlistEntry.objects.create(show=show, user=user)
+        except IntegrityError:
+            raise WaitlistError('You are already on the waitlist for this show')
+
+    @staticmethod
+    def position(entry):
+        """Return the 1-based queue position of a waiting entry"""
+        from .models import WaitlistEntry
+
+        return WaitlistEntry.objects.filter(
+            show_id=entry.show_id, status='waiting', id__lte=entry.id
+        ).count()
+
+    @staticmethod
+    def leave(entry):
+        """Remove an entry from the waitlist, releasing any seat it holds"""
+        if entry.status not in entry.ACTIVE_STATUSES:
+            raise WaitlistError('You are no longer on the waitlist for this show')
+        held_seat = entry.offered_seat if entry.status == 'offered' else None
+        with transaction.atomic():
+            entry.status = 'left'
+            entry.save(update_fields=['status', 'updated_at'])
+            if held_seat is not None:
+                EventLog.record('hold_released', entry.show_id, [held_seat], user_id=entry.user_id)
+                SeatIndex.seats_released(entry.show_id, [held_seat])
+                WaitlistService.seat_released(entry.show_id, held_seat)
+
+    @staticmethod
+    def seat_holders(show_id, seat_number):
+        """Return the ids of users holding an unexpired offer for a seat"""
+        from .models import WaitlistEntry
+
+        return list(WaitlistEntry.objects.filter(
+            show_id=show_id,
+            status='offered',
+            offered_seat=seat_number,
+            hold_expires_at__gt=timezone.now()
+        ).values_list('user_id', flat=True))
+
+    @staticmethod
+    def held_seat_numbers(show_id):
+        """Return the seats currently held for waitlisted users"""
+        from .models import WaitlistEntry
+
+        return list(WaitlistEntry.objects.filter(
+            show_id=show_id, status='offered', hold_expires_at__gt=timezone.now()
+        ).values_list('offered_seat', flat=True))
+
+    @staticmethod
+    def seat_holds(show_id):
+        """Map each held seat of a show to the ids of the users holding it"""
+        from .models import WaitlistEntry
+
+        holds = defaultdict(set)
+        for seat_number, user_id in WaitlistEntry.objects.filter(
+            show_id=show_id, status='offered', hold_expires_at__gt=timezone.now()
+        ).values_list('offered_seat', 'user_id'):
+            holds[seat_number].add(user_id)
+        return holds
+
+    @staticmethod
+    def accept(show_id, user, seat_number):
+        """Mark the user's offer as accepted once they book the held seat"""
+        from .models import WaitlistEntry
+
+        accepted = WaitlistEntry.objects.filter(
+            show_id=show_id, user=user, status='offered', offered_seat=seat_number
+        ).update(status='accepted', updated_at=timezone.now())
+        if accepted:
+            EventLog.record('hold_accepted', show_id, [seat_number], user_id=user.id)
+
+    @staticmethod
+    def seat_released(show_id, seat_number):
+        """Offer a freed seat to the next waiter after the current transaction commits"""
+        run_async_on_commit(WaitlistService.offer_seat, show_id, seat_number)
+
+    @staticmethod
+    def offer_seat(show_id, seat_number):
+        """Hold a freed seat for the next waiting user, if there is one"""
+        from .models import Booking, Show, WaitlistEntry
+
+        with transaction.atomic():
+            # Serialize offers for the show so a seat is never offered twice
+            Show.objects.select_for_update().filter(pk=show_id).first()
+            if Booking.objects.using(shard_for_show(show_id)).filter(
+                show_id=show_id, seat_number=seat_number, status='booked'
+            ).exists() or WaitlistService.seat_holders(show_id, seat_number):
+                return None
+
+            entry = WaitlistEntry.objects.select_for_update().filter(
+                show_id=show_id, status='waiting'
+            ).order_by('id').first()
+            if entry is None:
+                return None
+
+            entry.status = 'offered'
+            entry.offered_seat = seat_number
+            entry.hold_expires_at = timezone.now() + WaitlistService.hold_duration()
+            entry.save(update_fields=['status', 'offered_seat', 'hold_expires_at', 'updated_at'])
+            EventLog.record('hold_offered', show_id, [seat_number], user_id=entry.user_id)
+            SeatIndex.seats_booked(show_id, [seat_number])
+
+        if EmailService.send_waitlist_offer(entry):
+            logger.info(f"Waitlist offer sent for entry {entry.id}")
+        return entry
+
+    @staticmethod
+    def expire_holds():
+        """Expire lapsed offers and pass their seats on to the next waiter"""
+        from .models import WaitlistEntry
+
+        expired = list(WaitlistEntry.objects.filter(
+            status='offered', hold_expires_at__lte=timezone.now()
+        ).values_list('id', 'show_id', 'offered_seat', 'user_id'))
+
+        expired_count = 0
+        for entry_id, show_id, seat_number, user_id in expired:
+            with transaction.atomic():
+                updated = WaitlistEntry.objects.filter(
+                    id=entry_id, status='offered'
+                ).update(status='expired', updated_at=timezone.now())
+                if updated:
+                    expired_count += 1
+                    EventLog.record('hold_expired', show_id, [seat_number], user_id=user_id)
+                    SeatIndex.seats_released(show_id, [seat_number])
+                    WaitlistService.seat_released(show_id, seat_number)
+        return expired_count
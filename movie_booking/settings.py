@@ -2,9 +2,10 @@
 Django settings for movie_booking project.
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,7 +28,6 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
-    'drf_yasg',
     'corsheaders',
     'booking',
 ]
@@ -41,14 +41,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'booking.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'movie_booking.urls'
 
+# drf_yasg is not an installed app: importing its package pulls in
+# pkg_resources at startup. Its templates and static files are located
+# without importing it, and the schema views are built on first request.
+DRF_YASG_DIR = Path(find_spec('drf_yasg').submodule_search_locations[0])
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [DRF_YASG_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -63,14 +69,70 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'movie_booking.wsgi.application'
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database: DB_ENGINE=postgres for production, sqlite (default) for development.
+# Connections are kept open for DB_CONN_MAX_AGE seconds instead of per request.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='moviebooking'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'OPTIONS': {
+                # Seconds to wait for a lock before raising "database is locked"
+                'timeout': config('SQLITE_TIMEOUT', default=20, cast=int),
+            },
+        }
+    }
+
+# Applied to every new SQLite connection (see booking.signals). WAL lets
+# readers run alongside a writer; NORMAL sync is safe with WAL.
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='normal'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=20000, cast=int),
 }
 
+# Read replicas: SQLite file names, or Postgres hosts when DB_ENGINE=postgres,
+# e.g. DATABASE_REPLICAS=replica1.sqlite3,replica2.sqlite3
+# Listing endpoints and the reminder query read from them; writes and a
+# user's reads right after a write stay on the primary.
+REPLICA_DATABASES = []
+for index, name in enumerate(config('DATABASE_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f'replica_{index}'
+    location = {'HOST': name} if DB_ENGINE == 'postgres' else {'NAME': name}
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'}, **location)
+    REPLICA_DATABASES.append(alias)
+
+# Optional booking shards, e.g. BOOKING_SHARD_DATABASES=shard1.sqlite3,shard2.sqlite3
+# Each show's bookings live on one shard (show id modulo shard count); run
+# setup_booking_shards after adding shards and before taking traffic.
+BOOKING_SHARDS = []
+for index, name in enumerate(config('BOOKING_SHARD_DATABASES', default='', cast=Csv()), start=1):
+    alias = f'booking_shard_{index}'
+    location = {'HOST': name} if DB_ENGINE == 'postgres' else {'NAME': name}
+    DATABASES[alias] = dict(DATABASES['default'], **location)
+    BOOKING_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ['booking.db_routers.BookingShardRouter', 'booking.db_routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they book or cancel
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -95,6 +157,7 @@ USE_TZ = True
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = 'static/'
+STATICFILES_DIRS = [DRF_YASG_DIR / 'static']
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -102,13 +165,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication plus a check against tokens revoked at logout
+        'booking.tokens.RevocableJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # Uses orjson when installed (pip install orjson), else DRF's encoder
+        'booking.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'booking.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
@@ -118,6 +188,8 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # /token/refresh/ rotates refresh tokens and revokes the old one in
+    # booking.tokens.TokenRevocationStore (cache entries expire with the token)
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': False,
@@ -150,8 +222,97 @@ SIMPLE_JWT = {
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Cache (shared by rate limiting, seat indexes and layouts). Use a shared
+# backend such as Redis in production so limits apply across workers.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='movie-booking'),
+    }
+}
+
+# Admission control for booking endpoints: per-user and per-show token
+# buckets (tokens/second and burst size) plus a bounded virtual queue
+BOOKING_ADMISSION = {
+    'USER_RATE': config('BOOKING_USER_RATE', default=2.0, cast=float),
+    'USER_BURST': config('BOOKING_USER_BURST', default=10, cast=int),
+    'SHOW_RATE': config('BOOKING_SHOW_RATE', default=50.0, cast=float),
+    'SHOW_BURST': config('BOOKING_SHOW_BURST', default=100, cast=int),
+    'MAX_IN_FLIGHT': config('BOOKING_MAX_IN_FLIGHT', default=20, cast=int),
+    'MAX_QUEUE': config('BOOKING_MAX_QUEUE', default=500, cast=int),
+    'QUEUE_WINDOW': config('BOOKING_QUEUE_WINDOW', default=30, cast=int),
+}
+
+# Stored responses for Idempotency-Key retries on booking and cancellation
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+# How long a key stays claimed by a request that never finished (crashed
+# worker). A retry after this runs the view again, so keep it well above the
+# slowest request, SMTP included (see EMAIL_TIMEOUT)
+IDEMPOTENCY_PENDING_SECONDS = config('IDEMPOTENCY_PENDING_SECONDS', default=300, cast=int)
+
+# Booking emails are sent during the request; bound each SMTP call
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+
+# /my-bookings/?since= reaches back this far, so bookings that commit after
+# a newer one the client already saw are still returned
+BOOKINGS_SYNC_LAG_SECONDS = config('BOOKINGS_SYNC_LAG_SECONDS', default=5, cast=int)
+
+# Event log readers skip events newer than this, so events from transactions
+# that commit late are never passed over
+EVENT_LOG_COMMIT_LAG_SECONDS = config('EVENT_LOG_COMMIT_LAG_SECONDS', default=5, cast=int)
+
+# Background tasks (waitlist promotion); eager mode runs them inline
+BOOKING_TASKS_ALWAYS_EAGER = config('BOOKING_TASKS_ALWAYS_EAGER', default=False, cast=bool)
+BOOKING_TASK_WORKERS = config('BOOKING_TASK_WORKERS', default=4, cast=int)
+
+# Hot shows (Show.hot_mode): the process holding a show's lease keeps its
+# seat map in memory and writes bookings in batches of up to
+# HOT_SHOW_BATCH_SIZE, gathered for at most HOT_SHOW_BATCH_WAIT_MS. A lease
+# not renewed for HOT_SHOW_LEASE_SECONDS passes to another process.
+HOT_SHOW_BATCH_SIZE = config('HOT_SHOW_BATCH_SIZE', default=100, cast=int)
+HOT_SHOW_BATCH_WAIT_MS = config('HOT_SHOW_BATCH_WAIT_MS', default=2, cast=float)
+HOT_SHOW_LEASE_SECONDS = config('HOT_SHOW_LEASE_SECONDS', default=10, cast=int)
+HOT_SHOW_REQUEST_TIMEOUT = config('HOT_SHOW_REQUEST_TIMEOUT', default=5, cast=float)
+# Process hot show commands inline in the request instead of on an owner thread
+HOT_SHOW_EAGER = config('HOT_SHOW_EAGER', default=False, cast=bool)
+
+# Bulk user registration (signup/bulk/, import_users): at most
+# USER_IMPORT_MAX_USERS per request, passwords hashed on
+# USER_IMPORT_HASH_WORKERS threads, inserted USER_IMPORT_BATCH_SIZE at a time
+USER_IMPORT_MAX_USERS = config('USER_IMPORT_MAX_USERS', default=1000, cast=int)
+USER_IMPORT_HASH_WORKERS = config('USER_IMPORT_HASH_WORKERS', default=4, cast=int)
+USER_IMPORT_BATCH_SIZE = config('USER_IMPORT_BATCH_SIZE', default=500, cast=int)
+
+# Rows fetched per database round trip by the streaming booking export
+BOOKING_EXPORT_CHUNK_SIZE = config('BOOKING_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Reminder scheduler (send_reminder_emails --continuous): reminders go out
+# REMINDER_LEAD_HOURS before each show, checked every REMINDER_INTERVAL_SECONDS
+REMINDER_LEAD_HOURS = config('REMINDER_LEAD_HOURS', default=24, cast=int)
+REMINDER_INTERVAL_SECONDS = config('REMINDER_INTERVAL_SECONDS', default=60, cast=int)
+REMINDER_SEND_RATE = config('REMINDER_SEND_RATE', default=5.0, cast=float)
+# A scheduler that stops renewing its cursor lease for this long is taken over
+REMINDER_LEASE_SECONDS = config('REMINDER_LEASE_SECONDS', default=300, cast=int)
+
+# On-demand profiling. With PROFILING_ENABLED, staff can send
+# `X-Profile: sample` or `X-Profile: cprofile` to profile one request, and
+# requests under PROFILING_PATHS are always profiled. Runs (stacks, pstats,
+# SQL log) are written to PROFILING_DIR, keeping the newest PROFILING_MAX_RUNS.
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_PATHS = config('PROFILING_PATHS', default='', cast=Csv())
+PROFILING_MODE = config('PROFILING_MODE', default='sample')
+PROFILING_SAMPLE_INTERVAL = config('PROFILING_SAMPLE_INTERVAL', default=0.005, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_RUNS = config('PROFILING_MAX_RUNS', default=100, cast=int)
+
+# Waitlist settings
+WAITLIST_HOLD_MINUTES = config('WAITLIST_HOLD_MINUTES', default=10, cast=int)
+
 # Swagger settings
 SWAGGER_SETTINGS = {
+    'DEFAULT_AUTO_SCHEMA_CLASS': 'booking.doc_inspectors.LazyAutoSchema',
+    # The UIs load the cached document instead of regenerating it
+    'SPEC_URL': 'schema-json',
     'SECURITY_DEFINITIONS': {
         'Bearer': {
             'type': 'apiKey',
@@ -159,4 +320,14 @@ SWAGGER_SETTINGS = {
             'in': 'header'
         }
     }
-}
\ No newline at end of file
+}
+REDOC_SETTINGS = {
+    'SPEC_URL': 'schema-json',
+}
+
+# Pre-built schema written by `manage.py build_openapi_schema`; when unset
+# or missing, the schema is generated once per process on first request
+OPENAPI_SCHEMA_FILE = config('OPENAPI_SCHEMA_FILE', default='')
+
+# Seconds the rendered /swagger/ and /redoc/ responses are cached
+SWAGGER_CACHE_TIMEOUT = config('SWAGGER_CACHE_TIMEOUT', default=0, cast=int)
@@ -1,28 +1,43 @@
 """
 URL configuration for movie_booking project.
 """
+from functools import lru_cache
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Movie Ticket Booking API",
-      default_version='v1',
-      description="A comprehensive API for movie ticket booking system with JWT authentication",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@moviebooking.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from booking.schema import api_info, openapi_schema_view
+
+
+@lru_cache(maxsize=None)
+def get_docs_view(renderer):
+    """Build the drf_yasg UI view on first use so it isn't imported at startup"""
+    from rest_framework import permissions
+    from drf_yasg.views import get_schema_view
+
+    schema_view = get_schema_view(
+       api_info(),
+       public=True,
+       permission_classes=(permissions.AllowAny,),
+    )
+    return schema_view.with_ui(renderer, cache_timeout=settings.SWAGGER_CACHE_TIMEOUT)
+
+
+def swagger_view(request, *args, **kwargs):
+    if request.GET.get('format') == 'openapi':
+        return openapi_schema_view(request)
+    return get_docs_view('swagger')(request, *args, **kwargs)
+
+
+def redoc_view(request, *args, **kwargs):
+    if request.GET.get('format') == 'openapi':
+        return openapi_schema_view(request)
+    return get_docs_view('redoc')(request, *args, **kwargs)
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('booking.urls')),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-]
\ No newline at end of file
+    path('swagger.json', openapi_schema_view, name='schema-json'),
+    path('swagger/', swagger_view, name='schema-swagger-ui'),
+    path('redoc/', redoc_view, name='schema-redoc'),
+]